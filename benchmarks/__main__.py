@@ -0,0 +1,74 @@
+"""
+    python -m benchmarks [--filter NAME] [--quick] [--output results.json]
+                         [--compare baseline.json] [--threshold 0.1]
+
+Exits with status 1 when `--compare` finds a benchmark whose throughput
+dropped by more than `--threshold` relative to the baseline.
+"""
+
+import argparse
+import fnmatch
+import sys
+
+from . import bench_connection, bench_ecs, bench_protocol, bench_reliability
+from .harness import REGISTRY, Result, compare, dump, load, run
+
+MODULES = (bench_protocol, bench_reliability, bench_ecs, bench_connection)
+
+
+def _print(result: Result):
+    print(
+        f"{result.key:<58} {result.ops_per_sec:>14,.0f} ops/s"
+        f"  p50 {result.p50_ns / 1e3:>10.1f}us"
+        f"  p99 {result.p99_ns / 1e3:>10.1f}us",
+        flush=True,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "-k",
+        "--filter",
+        action="append",
+        default=[],
+        help="glob on benchmark names, may be repeated",
+    )
+    parser.add_argument("-o", "--output", help="write JSON results here")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument(
+        "--quick", action="store_true", help="short runs, for smoke testing"
+    )
+    parser.add_argument("--min-time", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    selected = [
+        bench
+        for bench in REGISTRY
+        if not args.filter
+        or any(fnmatch.fnmatch(bench.name, f) for f in args.filter)
+    ]
+    min_time, min_calls = args.min_time, 5
+    if args.quick:
+        min_time, min_calls = 0.01, 1
+
+    results = run(selected, min_time, min_calls, report=_print)
+    if args.output:
+        dump(results, args.output)
+
+    if not args.compare:
+        return 0
+    regressions = 0
+    print()
+    for comparison in compare(results, load(args.compare)):
+        flag = ""
+        if comparison.change < -args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{comparison.key:<58} {comparison.change:>+8.1%}{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
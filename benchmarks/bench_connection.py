@@ -0,0 +1,63 @@
+import socket
+
+from ripple import Address, UdpEndpointConfig
+from ripple.connection import ReliableConnection
+from ripple.network.protocol import records
+from ripple.utils import UInt8, UInt16
+
+from .harness import benchmark
+
+# give up on a record after this many ticks rather than hang the run
+MAX_TICKS = 100_000
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _pair():
+    a = Address("127.0.0.1", _free_port())
+    b = Address("127.0.0.1", _free_port())
+    sender = ReliableConnection(UdpEndpointConfig(local_addr=a, remote_addr=b))
+    receiver = ReliableConnection(
+        UdpEndpointConfig(local_addr=b, remote_addr=a)
+    )
+
+    def close():
+        sender.close()
+        receiver.close()
+
+    return sender, receiver, close
+
+
+def _round(sender, receiver, batch):
+    for key in range(batch):
+        sender.send_record(records.Input(UInt16(key), UInt8(0), UInt8(1)))
+    sender.flush()
+    received = 0
+    for _ in range(MAX_TICKS):
+        receiver.tick()
+        while receiver.recv_record() is not None:
+            received += 1
+        # keeps acks flowing so the resend queue stays drained
+        sender.tick()
+        if received >= batch:
+            return
+    raise RuntimeError(f"only {received}/{batch} records arrived")
+
+
+@benchmark("connection.loopback", batch=[1, 64])
+def loopback(batch):
+    """
+    Reliable records over real UDP sockets on 127.0.0.1. With `batch=1`
+    every call is one record's one-way latency, larger batches measure
+    records/sec.
+    """
+    sender, receiver, close = _pair()
+
+    def op():
+        _round(sender, receiver, batch)
+
+    return op, batch, close
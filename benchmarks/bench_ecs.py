@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+
+from ripple.core.server.delta_cache import DeltaCache
+from ripple.core.server.extensions import SnapshotExtension
+from ripple.ecs.interest import GridInterest
+from ripple.ecs.observability import Observable
+from ripple.ecs.snapshot import Snapshot
+from ripple.ecs.world import World
+from ripple.network.protocol.records import Delta, Hello, SnapshotAck
+from ripple.utils import UInt8, UInt16, UInt32
+
+from .harness import benchmark
+
+ENTITIES = [1_000, 10_000, 50_000]
+
+
+@dataclass
+class Position(Observable):
+    x: UInt16
+    y: UInt16
+
+
+@dataclass
+class Velocity(Observable):
+    dx: UInt16
+    dy: UInt16
+
+
+def make_world(entities: int, moving_every: int = 2) -> World:
+    """Every entity has a Position, every `moving_every`th a Velocity."""
+    world = World()
+    for i in range(entities):
+        components = [Position(UInt16(i), UInt16(i))]
+        if i % moving_every == 0:
+            components.append(Velocity(UInt16(1), UInt16(1)))
+        world.create_entity(*components)
+    return world
+
+
+@benchmark("store.get_components", entities=ENTITIES)
+def get_components(entities):
+    world = make_world(entities)
+
+    def op():
+        for _ in world.get_components(Position, Velocity):
+            pass
+
+    return op, entities
+
+
+@benchmark("store.query_changed", entities=ENTITIES, dirty=[0.01, 0.1])
+def query_changed(entities, dirty):
+    """A system reacting to moved entities, `dirty` of them move per run."""
+    world = make_world(entities)
+    query = world.query(Position, changed=[Position])
+    list(query)
+    step = max(int(1 / dirty), 1)
+    moved = [pos for eid, (pos,) in world.get_components(Position)][::step]
+
+    def op():
+        for position in moved:
+            position.x = UInt16(position.x ^ 1)
+        for _ in query:
+            pass
+
+    return op, entities
+
+
+@benchmark("snapshot.from_world", entities=ENTITIES, dirty=[0.01, 0.1, 1.0])
+def from_world(entities, dirty):
+    """One snapshot per tick with `dirty` of the entities moved."""
+    world = make_world(entities)
+    Snapshot.from_world(world)
+    step = max(int(1 / dirty), 1)
+    moved = [pos for eid, (pos,) in world.get_components(Position)][::step]
+
+    def op():
+        for position in moved:
+            position.x = UInt16(position.x ^ 1)
+        Snapshot.from_world(world)
+
+    return op, entities
+
+
+@benchmark("snapshot.get_delta_from", entities=ENTITIES, dirty=[0.01, 0.1])
+def get_delta_from(entities, dirty):
+    world = make_world(entities)
+    before = Snapshot.from_world(world)
+    step = max(int(1 / dirty), 1)
+    for eid, (position,) in world.get_components(Position):
+        if eid % step == 0:
+            position.x = UInt16(position.x + 1)
+    after = Snapshot.from_world(world)
+
+    def op():
+        after.get_delta_from(before)
+
+    return op, entities
+
+
+class _PackingConnection:
+    """Packs what it is sent, acking every snapshot straight away."""
+
+    def __init__(self):
+        self.extension = None
+
+    def send_record(self, record, urgent=False):
+        record.pack()
+        if isinstance(record, Delta):
+            snapshot_id = record.snapshot.target_snapshot
+        else:
+            snapshot_id = record.snapshot.id
+        ack = SnapshotAck(snapshot_id=UInt16(snapshot_id))
+        self.extension.on_record(ack)
+
+
+@benchmark("snapshot.stream", clients=[10, 100], cache=[False, True])
+def stream(clients, cache):
+    """Server side of one tick for `clients` that acked the same snapshot."""
+    world = make_world(1_000)
+    current = [Snapshot.from_world(world)]
+    shared = DeltaCache() if cache else None
+    extensions = []
+    for _ in range(clients):
+        extension = SnapshotExtension(lambda: current[-1], cache=shared)
+        connection = _PackingConnection()
+        connection.extension = extension
+        extension.init(connection)
+        extension.on_record(
+            Hello(
+                protocol_version=UInt8(0),
+                client_nonce=UInt32(0),
+                app_id=UInt32(0),
+            )
+        )
+        extension.on_tick()
+        extensions.append(extension)
+    moved = [pos for eid, (pos,) in world.get_components(Position)][::10]
+
+    def op():
+        for position in moved:
+            position.x = UInt16(position.x ^ 1)
+        current.append(Snapshot.from_world(world))
+        current.pop(0)
+        for extension in extensions:
+            extension.on_tick()
+
+    return op, clients
+
+
+@benchmark("snapshot.interest", entities=ENTITIES)
+def interest(entities):
+    """
+    Per client part of a tick through a 16 unit grid: filtering two
+    snapshots and the delta between them. Entities are spread over 256 x
+    256 units, 10% of them moved in between.
+    """
+    world = World()
+    positions = []
+    for i in range(entities):
+        position = Position(UInt16(i * 7 % 256), UInt16(i * 13 % 256))
+        world.create_entity(position)
+        positions.append(position)
+    grid = GridInterest(world, Position, cell_size=16)
+    before = Snapshot.from_world(world)
+    for position in positions[::10]:
+        position.x = UInt16((position.x + 1) % 256)
+    grid.update()
+    after = Snapshot.from_world(world)
+
+    def op():
+        base = grid.filter(before, 128, 128)
+        grid.filter(after, 128, 128).get_delta_from(base)
+
+    return op, 1
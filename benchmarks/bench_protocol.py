@@ -0,0 +1,133 @@
+from io import BytesIO
+
+from ripple.ecs.snapshot import (
+    ComponentSnapshot,
+    DeltaSnapshot,
+    EntitySnapshot,
+    Snapshot,
+)
+from ripple.interfaces import DisconnectReason
+from ripple.network.protocol import Record, records
+from ripple.network.protocol.envelope import EnvelopeBuilder, EnvelopeOpener
+from ripple.network.protocol.fragmenter import Defragmenter, Fragmenter
+from ripple.utils import BytesField, UInt8, UInt16, UInt32, VarUInt
+
+from .harness import benchmark
+
+
+def _entity(eid: int, components: int = 2) -> EntitySnapshot:
+    return EntitySnapshot(
+        id=VarUInt(eid),
+        version=UInt16(1),
+        components={
+            VarUInt(cid): ComponentSnapshot(
+                id=VarUInt(cid),
+                version=UInt16(1),
+                type_id=UInt16(cid % 4),
+                data=BytesField(bytes(8)),
+            )
+            for cid in range(eid * components, (eid + 1) * components)
+        },
+    )
+
+
+SAMPLES = {
+    "hello": records.Hello(UInt8(1), UInt32(0xDEADBEEF), UInt32(7)),
+    "welcome": records.Welcome(UInt32(1), UInt16(2), UInt16(1200)),
+    "auth": records.Auth(UInt8(1), BytesField(bytes(32))),
+    "auth_result": records.AuthResult(UInt8(1), UInt32(9), BytesField(b"ok")),
+    "disconnect": records.Disconnect(
+        DisconnectReason.TIMEOUT, BytesField(b"bye")
+    ),
+    "ack": records.Ack(UInt16(100), UInt16(0xFFFF)),
+    "ping": records.Ping(UInt16(1), UInt32(1000)),
+    "input": records.Input(UInt16(32), UInt8(0), UInt8(1)),
+    "mtu_probe": records.MtuProbe(UInt16(1), BytesField(bytes(1000))),
+    "snapshot": records.Snapshot(
+        Snapshot(entities={VarUInt(e): _entity(e) for e in range(16)})
+    ),
+    "delta": records.Delta(
+        DeltaSnapshot(
+            base_snapshot=UInt16(0),
+            target_snapshot=UInt16(1),
+            spawns=[_entity(e) for e in range(4)],
+            despawns=[VarUInt(e) for e in range(4, 8)],
+            updates={},
+        )
+    ),
+}
+
+
+@benchmark("record.pack", record=list(SAMPLES))
+def record_pack(record):
+    sample = SAMPLES[record]
+    return sample.pack, 1
+
+
+@benchmark("record.unpack", record=list(SAMPLES))
+def record_unpack(record):
+    payload = SAMPLES[record].pack()
+
+    def op():
+        Record.unpack(BytesIO(payload))
+
+    return op, 1
+
+
+def _mixed_records(count: int):
+    mix = [SAMPLES["ping"], SAMPLES["input"], SAMPLES["ack"]]
+    return [mix[i % len(mix)] for i in range(count)]
+
+
+@benchmark("envelope.build", records=[64, 512])
+def envelope_build(records):
+    batch = _mixed_records(records)
+    builder = EnvelopeBuilder(budget=1200)
+
+    def op():
+        for record in batch:
+            builder.add(record)
+        builder.finish()
+
+    return op, records
+
+
+@benchmark("envelope.open", records=[64, 512])
+def envelope_open(records):
+    builder = EnvelopeBuilder(budget=1 << 16)
+    for record in _mixed_records(records):
+        builder.add(record)
+    payload = builder.finish().envelopes[0].payload
+    opener = EnvelopeOpener()
+
+    def op():
+        opener.unpack(BytesIO(payload))
+
+    return op, records
+
+
+@benchmark("fragmenter.fragment", size=[1_500, 16_000, 60_000])
+def fragment(size):
+    fragmenter = Fragmenter(mtu=1200)
+    payload = bytes(size)
+
+    def op():
+        fragmenter.fragment(payload)
+        fragmenter.finish()
+
+    return op, 1
+
+
+@benchmark("defragmenter.reassemble", size=[1_500, 16_000, 60_000])
+def reassemble(size):
+    fragmenter = Fragmenter(mtu=1200)
+    fragmenter.fragment(bytes(size))
+    fragments = [f.payload for f in fragmenter.finish()]
+    defragmenter = Defragmenter()
+
+    def op():
+        for fragment in fragments:
+            defragmenter.register_fragment(BytesIO(fragment), now=0.0)
+        defragmenter.finish()
+
+    return op, 1
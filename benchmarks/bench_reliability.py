@@ -0,0 +1,62 @@
+from ripple.network.protocol import Ack
+from ripple.reliability import AckMask
+from ripple.reliability.resend_queue import ResendQueue
+from ripple.utils import UInt16
+
+from .harness import benchmark
+
+PAYLOAD = bytes(200)
+
+
+@benchmark("resend_queue.send_ack", in_flight=[1_000, 5_000, 20_000])
+def send_ack(in_flight):
+    """Steady state: one send and one ack with `in_flight` pending."""
+    queue = ResendQueue()
+    for seq in range(in_flight):
+        queue.on_send(seq, PAYLOAD, now=0.0)
+    state = {"seq": in_flight}
+
+    def op():
+        seq = state["seq"]
+        queue.on_send(seq, PAYLOAD, now=0.0)
+        queue.on_acked((seq - in_flight,), now=0.01)
+        state["seq"] = seq + 1
+
+    return op, 1
+
+
+@benchmark("resend_queue.due_timeouts", in_flight=[1_000, 5_000, 20_000])
+def due_timeouts(in_flight):
+    """One retransmit scan per tick, nothing due yet."""
+    queue = ResendQueue()
+    for seq in range(in_flight):
+        queue.on_send(seq, PAYLOAD, now=0.0)
+
+    def op():
+        for _ in queue.due_timeouts(now=0.001):
+            pass
+
+    return op, in_flight
+
+
+@benchmark("ackmask.note_recv", reorder=[0, 3])
+def note_recv(reorder):
+    """1000 seqs across the u16 wrap, every `reorder`th swapped."""
+    seqs = [(0xFFFF - 500 + i) & 0xFFFF for i in range(1000)]
+    if reorder:
+        for i in range(0, len(seqs) - 1, reorder):
+            seqs[i], seqs[i + 1] = seqs[i + 1], seqs[i]
+
+    def op():
+        mask = AckMask(64)
+        for seq in seqs:
+            mask.note_recv(seq)
+        mask.to_ack_record()
+
+    return op, len(seqs)
+
+
+@benchmark("ack.expand_to_seqs")
+def expand_to_seqs():
+    ack = Ack(ack_base=UInt16(3), mask=UInt16(0xFFFF))
+    return ack.expand_to_seqs, 17
@@ -0,0 +1,220 @@
+"""
+Minimal benchmark harness, no dependencies beyond the standard library.
+
+A benchmark is a setup function registered with `@benchmark`. It is called
+once per parameter set and returns the operation to time, together with
+the number of logical operations (records, entities, ...) a single call
+performs and optionally a teardown callable:
+
+    @benchmark("fragmenter.fragment", size=[1_000, 60_000])
+    def fragment(size):
+        fragmenter = Fragmenter(mtu=1200)
+        payload = bytes(size)
+
+        def op():
+            fragmenter.fragment(payload)
+            fragmenter.finish()
+
+        return op, 1
+
+Every call is timed on its own with `perf_counter_ns`, so the results carry
+a latency distribution as well as throughput.
+"""
+
+import gc
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+Op = Callable[[], Any]
+Setup = Callable[..., tuple]
+
+FORMAT_VERSION = 1
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Setup
+    params: Dict[str, List[Any]] = field(default_factory=dict)
+
+    def cases(self) -> Iterable[Dict[str, Any]]:
+        keys = list(self.params)
+        for values in itertools.product(*(self.params[k] for k in keys)):
+            yield dict(zip(keys, values))
+
+
+REGISTRY: List[Benchmark] = []
+
+
+def benchmark(name: str, **params: List[Any]):
+    def register(setup: Setup) -> Setup:
+        REGISTRY.append(Benchmark(name, setup, params))
+        return setup
+
+    return register
+
+
+@dataclass
+class Result:
+    name: str
+    params: Dict[str, Any]
+    calls: int
+    ops_per_call: int
+    ops_per_sec: float
+    mean_ns: float
+    p50_ns: int
+    p99_ns: int
+    min_ns: int
+    max_ns: int
+
+    @property
+    def key(self) -> str:
+        if not self.params:
+            return self.name
+        args = ",".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.name}[{args}]"
+
+
+def _percentile(ordered: List[int], q: float) -> int:
+    return ordered[round((len(ordered) - 1) * q / 100)]
+
+
+def measure(
+    op: Op,
+    min_time: float = 0.5,
+    min_calls: int = 5,
+    max_calls: int = 1_000_000,
+    warmup: int = 3,
+) -> List[int]:
+    """Call `op` until both `min_time` and `min_calls` are reached."""
+    for _ in range(warmup):
+        op()
+    timings: List[int] = []
+    clock = time.perf_counter_ns
+    deadline = clock() + int(min_time * 1e9)
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while len(timings) < max_calls:
+            start = clock()
+            op()
+            end = clock()
+            timings.append(end - start)
+            if end >= deadline and len(timings) >= min_calls:
+                break
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return timings
+
+
+def summarise(
+    name: str, params: Dict[str, Any], ops_per_call: int, timings: List[int]
+) -> Result:
+    ordered = sorted(timings)
+    total_ns = sum(ordered)
+    return Result(
+        name=name,
+        params=params,
+        calls=len(ordered),
+        ops_per_call=ops_per_call,
+        ops_per_sec=ops_per_call * len(ordered) * 1e9 / max(total_ns, 1),
+        mean_ns=total_ns / len(ordered),
+        p50_ns=_percentile(ordered, 50),
+        p99_ns=_percentile(ordered, 99),
+        min_ns=ordered[0],
+        max_ns=ordered[-1],
+    )
+
+
+def run(
+    benchmarks: Iterable[Benchmark],
+    min_time: float = 0.5,
+    min_calls: int = 5,
+    report: Optional[Callable[[Result], None]] = None,
+) -> List[Result]:
+    results = []
+    for bench in benchmarks:
+        for params in bench.cases():
+            op, ops_per_call, *teardown = bench.setup(**params)
+            try:
+                timings = measure(op, min_time=min_time, min_calls=min_calls)
+            finally:
+                for callback in teardown:
+                    callback()
+            result = summarise(bench.name, params, ops_per_call, timings)
+            results.append(result)
+            if report is not None:
+                report(result)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def metadata() -> Dict[str, Any]:
+    return {
+        "format": FORMAT_VERSION,
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def dump(results: List[Result], path: str) -> None:
+    document = {
+        "meta": metadata(),
+        "results": [dict(asdict(r), key=r.key) for r in results],
+    }
+    with open(path, "w") as fp:
+        json.dump(document, fp, indent=2)
+        fp.write("\n")
+
+
+def load(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path) as fp:
+        document = json.load(fp)
+    return {entry["key"]: entry for entry in document["results"]}
+
+
+@dataclass
+class Comparison:
+    key: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """Relative throughput change, negative is slower."""
+        return self.current / self.baseline - 1.0
+
+
+def compare(
+    results: List[Result], baseline: Dict[str, Dict[str, Any]]
+) -> List[Comparison]:
+    return [
+        Comparison(r.key, baseline[r.key]["ops_per_sec"], r.ops_per_sec)
+        for r in results
+        if r.key in baseline and baseline[r.key]["ops_per_sec"]
+    ]
@@ -5,7 +5,7 @@ import logging
 logger = logging.getLogger()
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
-from ripple import Address, UdpEndpointConfig
+from ripple import Address, UdpEndpointConfig, setup_logging
 from ripple.connection import ReliableConnection
 from ripple.network.protocol.records import Hello
 from ripple.utils import UInt8, UInt32
@@ -14,6 +14,9 @@ from ripple.ecs.world import World
 from simulation import Simulation, ClientSnapshotExtension
 
 
+setup_logging()
+
+
 def get_connection():
     local_addr = Address("127.0.0.1", 7002)
     remote_addr = Address("127.0.0.1", 7001)
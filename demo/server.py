@@ -5,7 +5,7 @@ import logging
 logger = logging.getLogger()
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
-from ripple import Address, UdpEndpointConfig
+from ripple import Address, UdpEndpointConfig, setup_logging
 from ripple.connection import ReliableConnection
 from ripple.core.server.extensions import ClientExtension
 from ripple.ecs.world import World
@@ -13,6 +13,9 @@ from ripple.ecs.world import World
 from simulation import Simulation, ServerSnapshotExtension
 
 
+setup_logging()
+
+
 def get_connection():
     local_addr = Address("127.0.0.1", 7001)
     remote_addr = Address("127.0.0.1", 7002)
@@ -2,9 +2,7 @@ from .core.models import UdpEndpointConfig, Address, DatagramConfig, DropPolicy
 from .network.transport import UdpEndpoint
 from .connection import ReliableConnection
 from .diagnostics.logging import setup_logging
-
-
-setup_logging()
+from .diagnostics.signals import DiagnosticsLevel, set_diagnostics_level
 
 
 __all__ = [
@@ -14,4 +12,7 @@ __all__ = [
     "DropPolicy",
     "UdpEndpoint",
     "ReliableConnection",
+    "setup_logging",
+    "DiagnosticsLevel",
+    "set_diagnostics_level",
 ]
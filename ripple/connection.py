@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional, List
+from typing import Callable, Optional, List, Dict
 from collections import deque
 from dataclasses import dataclass, field
 from io import BytesIO
@@ -14,13 +14,25 @@ from .network.protocol import (
     Fragmenter,
     Defragmenter,
     Ack,
+    StreamCompressor,
 )
 from .reliability.engine import ReliabilityEngine
-from .core.models import UdpEndpointConfig
-from .utils import UInt16
-from .utils import monotonic
+from .core.models import UdpEndpointConfig, FlushPolicy
+from .core.metrics import MetricsRegistry
+from .core.clock import MonotonicClock
+from .utils.seq import MASK16
 from .diagnostics import signals as s
-from .interfaces import RecordFlags, ConnectionExtension, RecordType
+from .diagnostics.profiler import NULL_PROFILER, TickProfiler
+from .interfaces import (
+    RecordFlags,
+    RecType,
+    ConnectionExtension,
+    RecordType,
+    RecordHandler,
+    CompressorType,
+    ClockType,
+    TransportType,
+)
 from .network.health.ping_manager import JitterExtension
 
 
@@ -45,47 +57,126 @@ class ReliableConnection:
     mtu: int = 1200
     ack_bits: int = 64
     extenstions: List[ConnectionExtension] = field(default_factory=list)
+    compressor: Optional[CompressorType] = None
+    stream_compressor: Optional[StreamCompressor] = None
+    flush_policy: FlushPolicy = field(default_factory=FlushPolicy)
+    metrics: MetricsRegistry = field(default_factory=MetricsRegistry)
+    profiler: Optional[TickProfiler] = None
+    clock: ClockType = field(default_factory=MonotonicClock)
+    # (cfg, metrics=...) -> transport, e.g. SimulatedNetwork.endpoint
+    endpoint_factory: Callable[..., TransportType] = UdpEndpoint
 
     def __post_init__(self):
-        self.mtu = self.mtu
-        self.endpoint = UdpEndpoint(self.endpoint_cfg)
-        self.reliability = ReliabilityEngine(ack_bits=self.ack_bits)
-        self.builder = EnvelopeBuilder(budget=self.mtu)
+        self.signals = s.active()
+        # time of the current tick, read once from the clock per tick
+        self.now = self.clock.now()
+        self.endpoint = self.endpoint_factory(
+            self.endpoint_cfg, metrics=self.metrics
+        )
+        self.reliability = ReliabilityEngine(
+            ack_bits=self.ack_bits, metrics=self.metrics, clock=self.clock
+        )
+        self.builder = EnvelopeBuilder(
+            budget=self.mtu, compressor=self.compressor
+        )
         self.fragmenter = Fragmenter(mtu=self.mtu)
-        self.defragmenter = Defragmenter()
-        self.opener = EnvelopeOpener()
-        self._seq = UInt16(0)
-        self._rid = UInt16(0)
+        self.defragmenter = Defragmenter(
+            metrics=self.metrics, clock=self.clock
+        )
+        self.opener = EnvelopeOpener(compressor=self.compressor)
+        # plain ints, only the packet header is UInt16 typed (utils.seq)
+        self._seq = 0
+        self._rid = 0
+        self._held_since: Optional[float] = None
+        # urgent records are queued, pack them regardless of the hold
+        self._urgent = False
+        self._ticking = False
+        self._ensure_rx_size(self.mtu)
+        if self.profiler is not None and self.profiler.metrics is None:
+            self.profiler.metrics = self.metrics
 
         # Incoming records ready for consumption
         self._recv_buffer: deque[RecordType] = deque()
 
         for extension in self.extenstions:
             extension.init(self)
-        s.CONNECTION_STARTED.send(
+        self._build_dispatch()
+        self.signals.CONNECTION_STARTED.send(
             self, mtu=self.mtu, extension=self.extenstions
         )
 
-    def _get_next_seq(self):
+    def _get_next_seq(self) -> int:
         seq = self._seq
-        self._seq = seq + 1
+        self._seq = (seq + 1) & MASK16
         return seq
 
-    def _get_next_rid(self):
+    def _get_next_rid(self) -> int:
         rid = self._rid
-        self._rid = rid + 1
+        self._rid = (rid + 1) & MASK16
         return rid
 
-    def send_record(self, record: RecordType) -> None:
-        s.RECORD_QUEUED_FOR_SEND.send(self, record=record)
+    def send_record(self, record: RecordType, urgent: bool = False) -> None:
+        """
+        Queue `record` for the next flush (see `FlushPolicy`). Urgent records,
+        either passed as such or flagged URGENT by their class, are never
+        held: during a tick they go out with the end-of-tick flush, outside
+        one they are flushed straight away along with anything queued before
+        them.
+        """
+        self.signals.RECORD_QUEUED_FOR_SEND.send(self, record=record)
+        flags = record.flags()
+        if urgent:
+            flags |= RecordFlags.URGENT
         try:
-            self.builder.add(record)
+            self.builder.add(record, urgent)
         except RecordTooLarge as e:
-            s.RECORD_TOO_LARGE.send(self, record=record)
-            reliable = bool(record.flags() & RecordFlags.RELIABLE)
+            self.signals.RECORD_TOO_LARGE.send(self, record=record)
+            reliable = bool(flags & RecordFlags.RELIABLE)
             self.fragmenter.fragment(e.payload, reliable=reliable)
         except Exception as e:
-            s.RECORD_DROPPED_ON_SEND.send(self, record=record, exception=e)
+            self.signals.RECORD_DROPPED_ON_SEND.send(
+                self, record=record, exception=e
+            )
+            return
+
+        if self._held_since is None:
+            self._held_since = self.now
+
+        max_bytes = self.flush_policy.max_bytes
+        if RecordFlags.URGENT & flags:
+            if self._ticking:
+                self._urgent = True
+            else:
+                self.flush()
+        elif max_bytes is not None and self.builder.pending_bytes >= max_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        """Pack everything queued and hand it to the socket immediately."""
+        self._pack_pending()
+        self.endpoint.flush()
+
+    def send_probe(self, record: RecordType) -> int:
+        """
+        Send `record` alone in an unreliable, uncompressed datagram, bypassing
+        the envelope budget. Returns the size of the datagram on the wire.
+        """
+        return self._pack_and_send(record.pack(), False, compress=False)
+
+    def set_mtu(self, mtu: int) -> None:
+        """Change the envelope/fragment budget at runtime."""
+        self.mtu = mtu
+        self.builder.budget = mtu
+        self.fragmenter.set_mtu(mtu)
+        self._ensure_rx_size(mtu)
+        self.signals.MTU_UPDATED.send(self, mtu=mtu)
+
+    def _ensure_rx_size(self, mtu: int):
+        # peers are expected to share a budget, so never receive less than
+        # we could send ourselves
+        size = mtu + PacketHeader.size()
+        if self.endpoint.max_datagram_size < size:
+            self.endpoint.set_max_datagram_size(size)
 
     def recv_record(self) -> Optional[RecordType]:
         """Get next received record, if any."""
@@ -99,23 +190,42 @@ class ReliableConnection:
         self._recv_buffer.clear()
         return records
 
-    @monotonic
     def tick(
         self,
-        now: float,
+        now: Optional[float] = None,
         rx_budget_ms: float = 0.5,
         tx_budget_ms: float = 0.5,
         max_rx: int = 64,
         max_tx: int = 64,
     ) -> None:
+        if now is None:
+            now = self.clock.now()
+        self.now = now
+        profiler = self.profiler
+        if profiler is None:
+            profiler = NULL_PROFILER
+        t = profiler.start()
         self.endpoint.tick(rx_budget_ms, tx_budget_ms, max_rx, max_tx)
-
-        self._process_incoming()
-        self._send_pending_acks()
-        for extension in self.extenstions:
-            extension.on_tick()
+        t = profiler.lap("endpoint", t)
+        self._ticking = True
+        try:
+            self._process_incoming()
+            t = profiler.lap("incoming", t)
+            self._send_pending_acks()
+            t = profiler.lap("acks", t)
+            for extension in self.extenstions:
+                extension.on_tick()
+                t = profiler.lap(type(extension).__name__, t)
+        finally:
+            self._ticking = False
         self._process_retransmits(now=now)
+        t = profiler.lap("retransmits", t)
         self._process_outgoing(now=now)
+        profiler.lap("outgoing", t)
+
+        sample = profiler.finish()
+        if sample is not None and sample.slow:
+            self.signals.SLOW_TICK.send(self, sample=sample)
 
     def _process_incoming(self):
         while (msg := self.endpoint.try_recv()) is not None:
@@ -125,71 +235,154 @@ class ReliableConnection:
         for payload in self.defragmenter.finish():
             self._parse_records(BytesIO(payload))
 
+    def feed_packet(self, packet: bytes) -> None:
+        """Parse one datagram as if it had just been received."""
+        self._parse_packet(packet)
+        for payload in self.defragmenter.finish():
+            self._parse_records(BytesIO(payload))
+
     def _parse_packet(self, packet):
-        s.PACKET_OFFERED_FOR_PARSING.send(self, packet=packet)
+        self.signals.PACKET_OFFERED_FOR_PARSING.send(self, packet=packet)
         buffer = BytesIO(packet)
         try:
             header = PacketHeader.unpack(buffer)
         except ValueError as e:
-            s.PACKET_DROPPED.send(reason="Invalid header", exception=e)
+            self.signals.PACKET_DROPPED.send(
+                reason="Invalid header", exception=e
+            )
             return
 
+        if PacketFlags.COMPRESSED & header.flags:
+            if (payload := self._decompress(buffer)) is None:
+                return
+            buffer = BytesIO(payload)
+
         if PacketFlags.RELIABLE & header.flags:
             self.reliability.note_incoming_reliable(int(header.rid))
+            if self.stream_compressor is not None:
+                payload = buffer.getvalue()[buffer.tell() :]
+                self.stream_compressor.note_received(int(header.rid), payload)
 
         if PacketFlags.FRAGMENT & header.flags:
             self._parse_fragment(buffer)
         else:
             self._parse_records(buffer)
 
+    def _decompress(self, buffer: BytesIO) -> Optional[bytes]:
+        if self.stream_compressor is None:
+            self.signals.PACKET_DROPPED.send(
+                self, reason="No stream compressor"
+            )
+            return None
+        try:
+            return self.stream_compressor.decompress(buffer.read())
+        except Exception as e:
+            self.signals.PACKET_DROPPED.send(
+                self, reason="Undecodable", exception=e
+            )
+            return None
+
     def _parse_fragment(self, payload):
         try:
-            self.defragmenter.register_fragment(payload)
+            self.defragmenter.register_fragment(payload, now=self.now)
         except Exception as e:
-            s.FRAGMENT_DROPPED.send(self, exception=e)
+            self.signals.FRAGMENT_DROPPED.send(self, exception=e)
             return
 
     def _parse_records(self, payload):
         try:
             records = self.opener.unpack(payload)
         except Exception as e:
-            s.RECORD_DROPPED_ON_RECEIVE.send(self, exception=e)
+            self.signals.RECORD_DROPPED_ON_RECEIVE.send(self, exception=e)
             return
 
+        record_parsed = self.signals.RECORD_PARSED
+        dispatch = self._dispatch
         for record in records:
-            s.RECORD_PARSED.send(self, record=record)
-            if isinstance(record, Ack):
-                s.RECV_ACK.send(self, ack=record)
-                self.reliability.note_ack_record(record)
-                continue
-
-            consumed = False
-            for extension in self.extenstions:
-                if consumed := extension.on_record(record=record):
+            if record_parsed.receivers:
+                record_parsed.send(self, record=record)
+            for handler in dispatch[record.TYPE]:
+                if handler(record):
                     break
-
-            if not consumed:
+            else:
                 self._recv_buffer.append(record)
 
+    def _on_ack(self, record: Ack) -> bool:
+        self.signals.RECV_ACK.send(self, ack=record)
+        self.reliability.note_ack_record(record, now=self.now)
+        if self.stream_compressor is not None:
+            self.stream_compressor.note_acked(record.expand_to_seqs())
+        return True
+
+    def _build_dispatch(self):
+        """
+        Build the RecType -> handlers table, in extension order. Extensions
+        without `record_handlers` are offered every record via `on_record`.
+        """
+        dispatch: Dict[RecType, List[RecordHandler]] = {
+            rec_type: [] for rec_type in RecType
+        }
+        dispatch[RecType.ACK].append(self._on_ack)
+        for extension in self.extenstions:
+            get_handlers = getattr(extension, "record_handlers", None)
+            if get_handlers is None:
+                for handlers in dispatch.values():
+                    handlers.append(extension.on_record)
+                continue
+            for rec_type, handler in get_handlers().items():
+                dispatch[rec_type].append(handler)
+        self._dispatch = dispatch
+
     def _send_pending_acks(self):
         ack = self.reliability.make_ack_record()
         if ack is not None:
-            s.SEND_ACK.send(self, ack=ack)
+            self.signals.SEND_ACK.send(self, ack=ack)
             self.send_record(ack)
 
-    @monotonic
     def _process_retransmits(self, now: float):
+        stream = self.stream_compressor
         for seq, p in self.reliability.due_retransmits(now=now):
             payload = self.reliability.on_retransmit(seq, now=now)
-            s.RETRANSMITTING.send(
+            self.signals.RETRANSMITTING.send(
                 self, seq=seq, retries=p.retries, payload=payload
             )
-            if payload is not None:
-                # Resend the packet stored in ResendQueue
-                self.endpoint.send(payload)
+            if payload is None:
+                if stream is not None:
+                    stream.forget(seq)
+                continue
+            if stream is not None:
+                payload = self._without_baseline(seq, payload)
+            # Resend the packet stored in ResendQueue
+            self.endpoint.send(payload)
+
+    def _without_baseline(self, rid: int, packet: bytes) -> bytes:
+        """
+        `packet` with its payload compressed on its own, the peer may no
+        longer hold the baseline it was compressed against.
+        """
+        buffer = BytesIO(packet)
+        header = PacketHeader.unpack(buffer)
+        if not PacketFlags.COMPRESSED & header.flags:
+            return packet
+        if (recompressed := self.stream_compressor.recompress(rid)) is None:
+            return packet
+        payload, compressed = recompressed
+        flags = header.flags & ~PacketFlags.COMPRESSED
+        if compressed:
+            flags |= PacketFlags.COMPRESSED
+        header = PacketHeader(flags=flags, seq=header.seq, rid=header.rid)
+        return header.pack() + payload
 
-    @monotonic
     def _process_outgoing(self, now: float):
+        if self._held_since is None:
+            return
+        held_ms = (now - self._held_since) * 1000
+        if self._urgent or held_ms >= self.flush_policy.max_hold_ms:
+            self._pack_pending()
+
+    def _pack_pending(self):
+        self._held_since = None
+        self._urgent = False
         for envelope in self.builder.finish().envelopes:
             self._pack_and_send(envelope.payload, envelope.reliable)
 
@@ -201,20 +394,30 @@ class ReliableConnection:
         payload: bytes,
         reliable: bool,
         fragment: bool = False,
-    ):
+        compress: bool = True,
+    ) -> int:
         flags = PacketFlags(0)
-        rid = UInt16(0)
+        rid = 0
         if reliable:
             flags = PacketFlags.RELIABLE
             rid = self._get_next_rid()
         if fragment:
             flags |= PacketFlags.FRAGMENT
+        if compress and (stream := self.stream_compressor) is not None:
+            if reliable:
+                stream.note_sent(rid, payload)
+            if (compressed := stream.compress(payload)) is not None:
+                flags |= PacketFlags.COMPRESSED
+                payload = compressed
         header = PacketHeader(flags=flags, seq=self._get_next_seq(), rid=rid)
         payload = header.pack() + payload
-        s.PACKET_PACKED.send(self, payload=payload, rid=rid, flags=flags)
+        self.signals.PACKET_PACKED.send(
+            self, payload=payload, rid=rid, flags=flags
+        )
         self.endpoint.send(payload)
         if reliable:
-            self.reliability.note_sent(rid, payload)
+            self.reliability.note_sent(rid, payload, now=self.now)
+        return len(payload)
 
     def close(self) -> None:
         self.endpoint.close()
@@ -0,0 +1,95 @@
+from typing import Callable, Dict, Optional
+
+from ...utils import UInt16
+from ...utils.seq import seq_newer
+from ...network.protocol.records import Delta, Snapshot, SnapshotAck
+from ...ecs.history import SnapshotHistory
+from ...ecs.snapshot import Snapshot as WorldSnapshot
+from ...ecs.world import World
+from ...interfaces import ConnectionType, RecordType, RecordHandler, RecType
+
+
+class SnapshotAckExtension:
+    """
+    Client side of the server's SnapshotExtension. Keeps the last `history`
+    snapshots, rebuilds every Delta on top of the one it was encoded
+    against and acks the newest snapshot it holds. Acks are unreliable, so
+    the newest one is repeated every tick nothing newer was acked. Deltas
+    whose base is gone are dropped, the server falls back to a full
+    Snapshot.
+
+    `world` resolves component types of deltas, a delta updating a type it
+    does not know is dropped too. `on_snapshot` gets every rebuilt
+    snapshot. The records are left for the application.
+    """
+
+    def __init__(
+        self,
+        world: World,
+        history: int = 32,
+        on_snapshot: Optional[Callable[[WorldSnapshot], None]] = None,
+        **options,
+    ):
+        self.connection: ConnectionType | None = None
+        self.world = world
+        self.history = SnapshotHistory(history)
+        self.on_snapshot = on_snapshot
+        self.dropped = 0
+        # an ack went out since the last tick
+        self._acked = False
+
+    def init(self, connection: ConnectionType):
+        self.connection = connection
+
+    def on_tick(self):
+        if self.connection is None:
+            raise RuntimeError("Extension not initialised yet")
+        # acks are unreliable, repeat the newest until a newer one goes out
+        if not self._acked and (latest := self.history.latest) is not None:
+            self._ack(latest)
+        self._acked = False
+
+    def record_handlers(self) -> Dict[RecType, RecordHandler]:
+        return {
+            RecType.SNAPSHOT: self.on_full_snapshot,
+            RecType.DELTA: self.on_delta,
+        }
+
+    def on_record(self, record: RecordType) -> bool:
+        handler = self.record_handlers().get(record.TYPE)
+        return handler is not None and handler(record)
+
+    def on_full_snapshot(self, record: Snapshot) -> bool:
+        self._received(record.snapshot)
+        return False
+
+    def on_delta(self, record: Delta) -> bool:
+        delta = record.snapshot
+        base = self.history.get(delta.base_snapshot)
+        if base is None:
+            self.dropped += 1
+            return False
+        try:
+            snapshot = base.apply_delta(delta, self.world)
+        except (KeyError, ValueError):
+            # unknown component type, keep acking the old baseline
+            self.dropped += 1
+            return False
+        self._received(snapshot)
+        return False
+
+    def _received(self, snapshot: WorldSnapshot):
+        if self.connection is None:
+            raise RuntimeError("Extension not initialised yet")
+        latest = self.history.latest
+        self.history.add(snapshot)
+        if self.on_snapshot is not None:
+            self.on_snapshot(snapshot)
+        if latest is None or seq_newer(snapshot.id, latest.id):
+            self._ack(snapshot)
+
+    def _ack(self, snapshot: WorldSnapshot):
+        self.connection.send_record(
+            SnapshotAck(snapshot_id=UInt16(snapshot.id))
+        )
+        self._acked = True
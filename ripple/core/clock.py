@@ -0,0 +1,39 @@
+import time
+
+from ..utils import UInt32
+
+
+class MonotonicClock:
+    def now(self) -> float:
+        return time.monotonic()
+
+
+class SimulatedClock:
+    """
+    Clock that only moves when told to, so whole sessions can run faster
+    than real time and deterministically. `sleep` advances the clock and
+    can stand in for `time.sleep`.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+
+    def now(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float) -> float:
+        if seconds < 0:
+            raise ValueError("Time only moves forward")
+        self._now += seconds
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+
+DEFAULT_CLOCK = MonotonicClock()
+
+
+def to_ms(seconds: float) -> UInt32:
+    """Wrapping u32 millisecond timestamp, as carried by Ping/Pong."""
+    return UInt32(int(seconds * 1000))
@@ -1,7 +1,9 @@
+import threading
 import time
-from enum import Enum, auto
-from typing import Protocol, Literal
+from enum import Enum, IntEnum, auto
+from typing import Dict, List, Protocol, Literal, Tuple
 from collections import defaultdict
+from dataclasses import dataclass, field
 
 
 class Event(Enum):
@@ -90,6 +92,292 @@ class InMemoryMetrics:
         return f"{counters}\n\n{gauges}"
 
 
+class Metric(IntEnum):
+    """Counters kept by MetricsRegistry, in list order."""
+
+    PACKETS_SENT = 0
+    PACKETS_RECEIVED = auto()
+    BYTES_SENT = auto()
+    BYTES_RECEIVED = auto()
+    SEND_ERRORS = auto()
+    RX_DROPPED = auto()
+    TX_DROPPED = auto()
+    RING_DROPPED = auto()
+
+    RELIABLE_SENT = auto()
+    RELIABLE_ACKED = auto()
+    RESENT = auto()
+    RELIABLE_LOST = auto()
+
+    FRAGMENTS_RECEIVED = auto()
+    FRAGMENTS_REASSEMBLED = auto()
+    FRAGMENTS_EXPIRED = auto()
+    FRAGMENTS_EVICTED = auto()
+
+    PINGS_SENT = auto()
+    PONGS_RECEIVED = auto()
+    PINGS_LOST = auto()
+
+    TICKS = auto()
+
+
+class Latency(IntEnum):
+    """Histograms kept by MetricsRegistry, in list order."""
+
+    PING_RTT_MS = 0
+    ACK_RTT_US = auto()
+    TICK_US = auto()
+
+
+def _bucket_index(value: int, sub_bits: int) -> int:
+    sub_count = 1 << sub_bits
+    if value < sub_count:
+        return value
+    shift = value.bit_length() - sub_bits - 1
+    return ((shift + 1) << sub_bits) + (value >> shift) - sub_count
+
+
+def _bucket_upper(index: int, sub_bits: int) -> int:
+    sub_count = 1 << sub_bits
+    if index < 2 * sub_count:
+        return index
+    shift = (index >> sub_bits) - 1
+    mantissa = (index & (sub_count - 1)) + sub_count
+    return ((mantissa + 1) << shift) - 1
+
+
+@dataclass(frozen=True)
+class HistogramSnapshot:
+    sub_bits: int
+    counts: Tuple[int, ...]
+    count: int
+    total: int
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def bucket_upper(self, index: int) -> int:
+        """Largest value that lands in bucket `index`."""
+        return _bucket_upper(index, self.sub_bits)
+
+    def percentile(self, q: float) -> int:
+        """Upper bound of the bucket holding the q-th percentile (0-100)."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank:
+                return _bucket_upper(index, self.sub_bits)
+        return _bucket_upper(len(self.counts) - 1, self.sub_bits)
+
+    def diff(self, earlier: "HistogramSnapshot") -> "HistogramSnapshot":
+        return HistogramSnapshot(
+            sub_bits=self.sub_bits,
+            counts=tuple(a - b for a, b in zip(self.counts, earlier.counts)),
+            count=self.count - earlier.count,
+            total=self.total - earlier.total,
+        )
+
+    def merge(self, other: "HistogramSnapshot") -> "HistogramSnapshot":
+        if other.sub_bits != self.sub_bits:
+            raise ValueError("Cannot merge histograms of different precision")
+        return HistogramSnapshot(
+            sub_bits=self.sub_bits,
+            counts=tuple(a + b for a, b in zip(self.counts, other.counts)),
+            count=self.count + other.count,
+            total=self.total + other.total,
+        )
+
+
+class Histogram:
+    """
+    Fixed-bucket, log-linear histogram in the spirit of HdrHistogram.
+
+    Each power of two is split into `2 ** sub_bits` linear buckets, so the
+    relative error is bounded by `2 ** -sub_bits` over the whole range.
+    Values are non-negative ints; anything above `max_value` lands in the
+    last bucket. All buckets are allocated up front.
+    """
+
+    def __init__(self, max_value: int = 1 << 24, sub_bits: int = 3):
+        self.sub_bits = sub_bits
+        self.max_value = max_value
+        self.counts = [0] * (_bucket_index(max_value, sub_bits) + 1)
+        self.count = 0
+        self.total = 0
+
+    def record(self, value: int) -> None:
+        value = min(max(int(value), 0), self.max_value)
+        self.counts[_bucket_index(value, self.sub_bits)] += 1
+        self.count += 1
+        self.total += value
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            sub_bits=self.sub_bits,
+            counts=tuple(self.counts),
+            count=self.count,
+            total=self.total,
+        )
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    taken_at: float
+    counters: Tuple[int, ...]
+    latencies: Tuple[HistogramSnapshot, ...]
+    timings: Dict[str, HistogramSnapshot] = field(default_factory=dict)
+    gauges: Dict[str, float] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def __getitem__(self, metric: Metric) -> int:
+        return self.counters[metric]
+
+    def latency(self, latency: Latency) -> HistogramSnapshot:
+        return self.latencies[latency]
+
+    def rate(self, metric: Metric) -> float:
+        """Per second, only meaningful on a diff."""
+        return self.counters[metric] / self.elapsed if self.elapsed else 0.0
+
+    def ratio(self, metric: Metric, of: Metric) -> float:
+        total = self.counters[of]
+        return self.counters[metric] / total if total else 0.0
+
+    def diff(self, earlier: "MetricsSnapshot") -> "MetricsSnapshot":
+        return MetricsSnapshot(
+            taken_at=self.taken_at,
+            counters=tuple(
+                a - b for a, b in zip(self.counters, earlier.counters)
+            ),
+            latencies=tuple(
+                a.diff(b) for a, b in zip(self.latencies, earlier.latencies)
+            ),
+            timings={
+                name: (
+                    timing.diff(earlier.timings[name])
+                    if name in earlier.timings
+                    else timing
+                )
+                for name, timing in self.timings.items()
+            },
+            gauges=dict(self.gauges),
+            elapsed=self.taken_at - earlier.taken_at,
+        )
+
+
+class MetricsRegistry:
+    """
+    Per-connection counters and latency histograms.
+
+    Components increment `counts[Metric.X]` directly, which is a plain list
+    index, and record into `latencies[Latency.X]`. Scrapers call
+    `snapshot()` periodically and `diff` consecutive snapshots for rates.
+    Also usable as a MetricsSink.
+
+    `snapshot()` may run on another thread (e.g. an exporter's) than the
+    one recording, so new timing and gauge names are only added under the
+    lock it holds.
+    """
+
+    def __init__(self, sub_bits: int = 3):
+        self.sub_bits = sub_bits
+        self.counts: List[int] = [0] * len(Metric)
+        self.latencies: List[Histogram] = [
+            Histogram(sub_bits=sub_bits) for _ in Latency
+        ]
+        self.timings: Dict[str, Histogram] = {}
+        self.gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, metric: Metric, value: int = 1) -> None:
+        self.counts[metric] += value
+
+    def observe(self, latency: Latency, value: int) -> None:
+        self.latencies[latency].record(value)
+
+    def snapshot(self) -> MetricsSnapshot:
+        with self._lock:
+            timings = list(self.timings.items())
+            gauges = dict(self.gauges)
+        return MetricsSnapshot(
+            taken_at=time.monotonic(),
+            counters=tuple(self.counts),
+            latencies=tuple(h.snapshot() for h in self.latencies),
+            timings={name: h.snapshot() for name, h in timings},
+            gauges=gauges,
+        )
+
+    # ==== MetricsSink ====
+    def ring_event(
+        self, name: str, event: Event, size: int = 0, fill: float = 0.0
+    ) -> None:
+        if event in (Event.ENQUEUE_DROP_NEWEST, Event.ENQUEUE_DROP_OLDEST):
+            self.counts[Metric.RING_DROPPED] += 1
+        self.gauge(f"{name}_fill_pct", fill * 100.0)
+
+    def drain_event(
+        self, name: str, event: Event, time: float | None = None
+    ) -> None:
+        if event is Event.DRAIN_TIME and time is not None:
+            self.timing_ns(f"{name}_drain", int(time * 1e9))
+
+    def tick_event(self, event: Event, time: float) -> None:
+        self.counts[Metric.TICKS] += 1
+        self.latencies[Latency.TICK_US].record(int(time * 1e6))
+
+    def gauge(self, name: str, value: float) -> None:
+        gauges = self.gauges
+        if name in gauges:
+            gauges[name] = float(value)
+            return
+        with self._lock:
+            gauges[name] = float(value)
+
+    def timing_ns(self, name: str, delta_ns: int) -> None:
+        """Recorded in microseconds."""
+        if (histogram := self.timings.get(name)) is None:
+            histogram = Histogram(sub_bits=self.sub_bits)
+            with self._lock:
+                histogram = self.timings.setdefault(name, histogram)
+        histogram.record(delta_ns // 1000)
+
+
+class _DroppedCounts(list):
+    def __setitem__(self, index, value):
+        pass
+
+
+class _NullHistogram(Histogram):
+    def record(self, value: int) -> None:
+        pass
+
+
+class NullMetricsRegistry(MetricsRegistry):
+    """
+    Stands in for a registry when a component is built without one, so
+    counts nobody can scrape are dropped instead of piling up per
+    instance. Shared as `NULL_METRICS`.
+    """
+
+    def __init__(self, sub_bits: int = 3):
+        super().__init__(sub_bits)
+        self.counts = _DroppedCounts(self.counts)
+        self.latencies = [_NullHistogram(sub_bits=sub_bits) for _ in Latency]
+
+    def gauge(self, name: str, value: float) -> None:
+        pass
+
+    def timing_ns(self, name: str, delta_ns: int) -> None:
+        pass
+
+
+NULL_METRICS = NullMetricsRegistry()
+
+
 class Timer:
     def __init__(self):
         self.start = time.perf_counter()
@@ -7,6 +7,11 @@ from dataclasses import dataclass
 from typing import Optional
 
 
+# linux/in.h, not exposed by the socket module on every python build
+PMTUDISC_PROBE = getattr(socket, "IP_PMTUDISC_PROBE", 3)
+IPV6_MTU_DISCOVER = getattr(socket, "IPV6_MTU_DISCOVER", 23)
+
+
 class DropPolicy(Enum):
     OLDEST = auto()
     NEWEST = auto()
@@ -38,6 +43,22 @@ class DatagramConfig:
     drop_policy: DropPolicy = DropPolicy.NEWEST
 
 
+@dataclass
+class FlushPolicy:
+    """
+    When records queued with `send_record` are packed and put on the wire.
+
+    The default flushes on every tick. `max_hold_ms` lets small records wait
+    across ticks for company, `max_bytes` flushes as soon as that many bytes
+    are pending regardless of the tick. URGENT records are never held, they
+    go out at the end of the tick they were queued in, or straight away when
+    queued between ticks.
+    """
+
+    max_bytes: Optional[int] = None
+    max_hold_ms: float = 0.0
+
+
 @dataclass
 class UdpEndpointConfig:
     local_addr: Address
@@ -50,6 +71,8 @@ class UdpEndpointConfig:
     dscp: Optional[int] = None
     ipv6_only: bool = False
     reuse_addr: bool = True
+    # set DF / disable kernel fragmentation, required for MTU probing
+    dont_fragment: bool = False
 
     def get_local_socket_options(self) -> List[Tuple[int, int, Any]]:
         options = []
@@ -57,4 +80,10 @@ class UdpEndpointConfig:
             options.append((socket.SOL_SOCKET, socket.SO_REUSEADDR, 1))
         if self.local_addr.family == socket.AF_INET6 and self.ipv6_only:
             options.append((socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1))
+        if self.dont_fragment and hasattr(socket, "IP_MTU_DISCOVER"):
+            if self.local_addr.family == socket.AF_INET6:
+                level, name = socket.IPPROTO_IPV6, IPV6_MTU_DISCOVER
+            else:
+                level, name = socket.IPPROTO_IP, socket.IP_MTU_DISCOVER
+            options.append((level, name, PMTUDISC_PROBE))
         return options
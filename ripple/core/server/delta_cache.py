@@ -0,0 +1,49 @@
+from collections import OrderedDict
+from typing import Hashable, Tuple
+
+from ...network.protocol.records import Delta
+from ...ecs.snapshot import Snapshot
+
+
+DeltaKey = Tuple[int, Hashable, int, Hashable]
+
+
+class DeltaCache:
+    """
+    Delta records by baseline and target id and `interest`, what those
+    snapshots were filtered to for the client, least recently used evicted
+    past `size`. Connections that acked the same baseline get the same
+    record, so it is encoded and packed once for all of them.
+    """
+
+    def __init__(self, size: int = 64):
+        if size <= 0:
+            raise ValueError("Cache size must be positive")
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[
+            DeltaKey, Tuple[Snapshot, Snapshot, Delta]
+        ] = OrderedDict()
+
+    def get(self, snapshot: Snapshot, baseline: Snapshot) -> Delta:
+        key = (baseline.id, baseline.interest, snapshot.id, snapshot.interest)
+        entry = self._entries.get(key)
+        # ids wrap, an entry is only good for the very same snapshots
+        if entry is not None and entry[0] is baseline and entry[1] is snapshot:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        record = Delta(snapshot=snapshot.get_delta_from(baseline))
+        self._entries[key] = (baseline, snapshot, record)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        return record
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -1,13 +1,24 @@
-from typing import Dict
+from typing import Callable, Dict, Optional
 
 from ...utils import UInt8, UInt16, UInt32
-from ...network.protocol.records import Hello, Welcome
-from ...interfaces import ConnectionType, RecordType
+from ...utils.seq import seq_distance, seq_newer
+from ...network.protocol.records import (
+    Delta,
+    Hello,
+    Snapshot,
+    SnapshotAck,
+    Welcome,
+)
+from ...ecs.history import SnapshotHistory
+from .delta_cache import DeltaCache
+from ...ecs.snapshot import Snapshot as WorldSnapshot
+from ...interfaces import ConnectionType, RecordType, RecordHandler, RecType
 
 
 class ClientExtension:
-    def __init__(self, **options):
+    def __init__(self, client_id: int = 0, **options):
         self.connection: ConnectionType | None = None
+        self.client_id = client_id
 
     def init(self, connection: ConnectionType):
         self.connection = connection
@@ -16,18 +27,118 @@ class ClientExtension:
         if self.connection is None:
             raise RuntimeError("Extension not initialised yet")
 
+    def record_handlers(self) -> Dict[RecType, RecordHandler]:
+        return {RecType.HELLO: self.on_hello}
+
     def on_record(self, record: RecordType) -> bool:
+        handler = self.record_handlers().get(record.TYPE)
+        return handler is not None and handler(record)
+
+    def on_hello(self, hello: Hello) -> bool:
         if self.connection is None:
             raise RuntimeError("Extension not initialised yet")
 
-        if isinstance(record, Hello):
-            self.connection.send_record(
-                Welcome(
-                    server_nonce=UInt32(0),
-                    assigned_client_id=UInt16(0),
-                    max_record_size=UInt16(self.connection.mtu),
-                )
+        self.connection.send_record(
+            Welcome(
+                server_nonce=UInt32(0),
+                assigned_client_id=UInt16(self.client_id),
+                max_record_size=UInt16(self.connection.mtu),
             )
+        )
+        return True
+
+
+class SnapshotExtension:
+    """
+    Streams world state to the peer once it said `Hello`. Every snapshot
+    goes out as an unreliable Delta against the newest one the peer
+    acknowledged with a SnapshotAck, so a lost Delta only makes the next
+    one a bit bigger. Until the peer acks anything, or when its ack falls
+    out of the `history` window it is expected to keep too, it gets one
+    reliable full Snapshot instead.
+
+    `source` returns the current snapshot, so a server with many clients
+    builds one `Snapshot.from_world` per tick and shares it. Passing them
+    all the same `cache` also shares the deltas between clients that acked
+    the same baseline. Must come before ClientExtension, which consumes
+    the Hello.
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], Optional[WorldSnapshot]],
+        history: int = 32,
+        cache: Optional[DeltaCache] = None,
+        **options,
+    ):
+        self.connection: ConnectionType | None = None
+        self.source = source
+        self.cache = cache
+        self.history = SnapshotHistory(history)
+        self.streaming = False
+        # newest snapshot the peer acked, deltas are encoded against it
+        self.baseline: Optional[WorldSnapshot] = None
+        # full snapshot on its way, kept until acked as it may age out
+        self.full_sent: Optional[WorldSnapshot] = None
+
+    def init(self, connection: ConnectionType):
+        self.connection = connection
+
+    def on_tick(self):
+        if self.connection is None:
+            raise RuntimeError("Extension not initialised yet")
+        if not self.streaming:
+            return
+        snapshot = self.source()
+        if snapshot is None or snapshot is self.history.latest:
+            return
+        self.history.add(snapshot)
+
+        baseline = self.baseline
+        if baseline is not None:
+            age = seq_distance(snapshot.id, baseline.id)
+            if age >= self.history.size:
+                baseline = self.baseline = None
+        if baseline is None:
+            if self.full_sent is None:
+                self.full_sent = snapshot
+                self.connection.send_record(Snapshot(snapshot=snapshot))
+            return
+        if self.cache is not None:
+            record = self.cache.get(snapshot, baseline)
         else:
-            return False
+            record = Delta(snapshot=snapshot.get_delta_from(baseline))
+        self.connection.send_record(record)
+
+    def record_handlers(self) -> Dict[RecType, RecordHandler]:
+        return {
+            RecType.HELLO: self.on_hello,
+            RecType.SNAPSHOT_ACK: self.on_snapshot_ack,
+        }
+
+    def on_record(self, record: RecordType) -> bool:
+        handler = self.record_handlers().get(record.TYPE)
+        return handler is not None and handler(record)
+
+    def on_hello(self, hello: Hello) -> bool:
+        # (re)start with a full snapshot, leave the Hello to ClientExtension
+        self.streaming = True
+        self.history.clear()
+        self.baseline = None
+        self.full_sent = None
+        return False
+
+    def on_snapshot_ack(self, ack: SnapshotAck) -> bool:
+        acked = int(ack.snapshot_id)
+        baseline = self.baseline
+        if baseline is not None and not seq_newer(acked, baseline.id):
+            return True
+        snapshot = self.history.get(acked)
+        full_sent = self.full_sent
+        if snapshot is None and full_sent is not None:
+            if full_sent.id == acked:
+                snapshot = full_sent
+        if snapshot is not None:
+            self.baseline = snapshot
+            self.full_sent = None
         return True
@@ -0,0 +1,183 @@
+"""
+Compact binary packet captures and deterministic replay.
+
+File layout: a 6 byte file header (magic + version), then one record per
+datagram: `!QBH` (monotonic ns, direction, length) followed by the raw
+datagram bytes as they were seen on the socket.
+"""
+
+import mmap
+import os
+import struct
+import time
+from enum import IntEnum
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+
+MAGIC = b"RPCP"
+VERSION = 1
+_file_header = struct.Struct("!4sH")
+_record_header = struct.Struct("!QBH")
+
+
+class Direction(IntEnum):
+    RX = 0
+    TX = 1
+
+
+@dataclass
+class CapturedPacket:
+    timestamp_ns: int
+    direction: Direction
+    payload: bytes
+
+
+class CaptureWriter:
+    """
+    Appends datagrams to `path` through a userspace buffer.
+
+    Once a file grows past `max_bytes` it is rotated: `path` becomes
+    `path.1`, `path.1` becomes `path.2`, ... keeping `backups` old files.
+    `max_bytes=0` disables rotation.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 64 << 20,
+        backups: int = 3,
+        buffer_size: int = 1 << 16,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.buffer_size = buffer_size
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, "wb", buffering=self.buffer_size)
+        self._file.write(_file_header.pack(MAGIC, VERSION))
+        self._size = _file_header.size
+
+    def _rotate(self):
+        self._file.close()
+        if self.backups > 0:
+            for index in range(self.backups - 1, 0, -1):
+                src = f"{self.path}.{index}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self._open()
+
+    def write(
+        self,
+        direction: Direction,
+        payload: bytes,
+        timestamp_ns: Optional[int] = None,
+    ) -> None:
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        size = _record_header.size + len(payload)
+        if self.max_bytes and self._size + size > self.max_bytes:
+            self._rotate()
+        self._file.write(
+            _record_header.pack(timestamp_ns, direction, len(payload))
+        )
+        self._file.write(payload)
+        self._size += size
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CaptureReader:
+    """Memory-maps a capture file and iterates over its packets."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map: Optional[mmap.mmap] = None
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _file_header.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a capture file")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _file_header.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} capture")
+
+    def __iter__(self) -> Iterator[CapturedPacket]:
+        buffer = self._map
+        offset = _file_header.size
+        end = len(buffer)
+        while offset + _record_header.size <= end:
+            timestamp_ns, direction, length = _record_header.unpack_from(
+                buffer, offset
+            )
+            offset += _record_header.size
+            if offset + length > end:
+                # truncated by a crash mid-write
+                return
+            yield CapturedPacket(
+                timestamp_ns=timestamp_ns,
+                direction=Direction(direction),
+                payload=buffer[offset : offset + length],
+            )
+            offset += length
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay(
+    path: str,
+    connection,
+    speed: Optional[float] = None,
+    direction: Direction = Direction.RX,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], int] = time.monotonic_ns,
+) -> int:
+    """
+    Feed the captured `direction` packets of `path` through `connection`
+    as if they had just been received. Returns the number of packets.
+
+    `speed=None` replays as fast as possible, `speed=1.0` keeps the
+    original pacing, `2.0` twice as fast and so on. Parsed records end up
+    in the connection's receive buffer.
+    """
+    replayed = 0
+    first_ns = start_ns = 0
+    with CaptureReader(path) as reader:
+        for packet in reader:
+            if packet.direction is not direction:
+                continue
+            if speed:
+                if not replayed:
+                    first_ns, start_ns = packet.timestamp_ns, clock()
+                due_ns = (packet.timestamp_ns - first_ns) / speed
+                if (wait_ns := due_ns - (clock() - start_ns)) > 0:
+                    sleep(wait_ns / 1e9)
+            connection.feed_packet(packet.payload)
+            replayed += 1
+    return replayed
@@ -0,0 +1,522 @@
+"""
+Soak / load generator: N synthetic clients against one server.
+
+    python -m ripple.diagnostics.loadgen --clients 200 --duration 30
+
+Every client does the Hello/Welcome handshake, sends Input records at
+`input_hz` and consumes the Snapshot/Delta stream, rebuilding and acking
+every snapshot like a real client would. The server keeps one
+ReliableConnection per client (`server_port + i` talks to
+`client_port + i`) and shares one world snapshot per tick between them,
+as well as the deltas of clients that acked the same baseline.
+
+With `processes=1` server and clients tick in a single loop, over
+loopback UDP or, with `simulated=True`, over a SimulatedNetwork without
+sockets. With more processes the clients are spread over worker
+processes and the parent only runs the server, which is what the server
+tick times should be read from when sizing hardware.
+
+Delivery latency runs from the server building a snapshot to the client
+parsing it. Send times are kept in a table indexed by snapshot id that
+is shared with the workers; CLOCK_MONOTONIC is system wide.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import queue
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, List, MutableSequence, Optional, Sequence
+
+from ..connection import ReliableConnection
+from ..core.clock import MonotonicClock
+from ..core.metrics import Histogram, HistogramSnapshot, Metric
+from ..core.models import Address, UdpEndpointConfig
+from ..core.client.extensions import SnapshotAckExtension
+from ..core.server.delta_cache import DeltaCache
+from ..core.server.extensions import ClientExtension, SnapshotExtension
+from ..ecs.observability import Observable
+from ..ecs.snapshot import Snapshot
+from ..ecs.world import World
+from ..network.protocol.records import (
+    Delta,
+    Hello,
+    Input,
+    Snapshot as SnapshotRecord,
+    Welcome,
+)
+from ..network.simulator import SimulatedNetwork
+from ..network.transport import UdpEndpoint
+from ..utils import UInt8, UInt16, UInt32
+
+# snapshot ids are UInt16
+SNAPSHOT_IDS = 1 << 16
+# how long the parent waits for worker processes to start up and report
+WORKER_GRACE = 30.0
+HELLO_RETRY = 1.0
+
+
+@dataclass
+class Position(Observable):
+    x: UInt16
+    y: UInt16
+
+
+@dataclass
+class Velocity(Observable):
+    dx: UInt16
+    dy: UInt16
+
+
+@dataclass
+class LoadConfig:
+    clients: int = 100
+    duration: float = 10.0
+    tick_hz: float = 30.0
+    input_hz: float = 10.0
+    entities: int = 100
+    # share of the entities that move every tick
+    moving: float = 0.25
+    # snapshots both sides keep, an ack older than this gets a full one
+    history: int = 32
+    processes: int = 1
+    simulated: bool = False
+    host: str = "127.0.0.1"
+    server_port: int = 40000
+    client_port: int = 50000
+    mtu: int = 1200
+
+    def __post_init__(self):
+        if self.simulated and self.processes > 1:
+            raise ValueError("A simulated network cannot span processes")
+        for base in (self.server_port, self.client_port):
+            if not 0 < base or base + self.clients > 65536:
+                raise ValueError(f"{self.clients} clients do not fit {base}+")
+
+    def server_addr(self, index: int) -> Address:
+        return Address(self.host, self.server_port + index)
+
+    def client_addr(self, index: int) -> Address:
+        return Address(self.host, self.client_port + index)
+
+
+@dataclass
+class ClientReport:
+    index: int
+    welcomed: bool
+    elapsed: float
+    snapshots: int
+    inputs: int
+    bytes_sent: int
+    bytes_received: int
+    latency_us: HistogramSnapshot
+
+
+@dataclass
+class LoadReport:
+    config: LoadConfig
+    elapsed: float
+    ticks: int
+    tick_us: HistogramSnapshot
+    inputs_received: int
+    server_bytes_sent: int
+    clients: List[ClientReport] = field(default_factory=list)
+
+    @property
+    def latency_us(self) -> HistogramSnapshot:
+        merged = Histogram().snapshot()
+        for client in self.clients:
+            merged = merged.merge(client.latency_us)
+        return merged
+
+    def client_rates(self, attr: str) -> List[float]:
+        """Per client bytes/s of `bytes_sent` or `bytes_received`."""
+        return sorted(
+            getattr(c, attr) / c.elapsed for c in self.clients if c.elapsed
+        )
+
+    def summary(self) -> str:
+        tick, latency = self.tick_us, self.latency_us
+        welcomed = sum(c.welcomed for c in self.clients)
+        lines = [
+            f"clients    {welcomed}/{self.config.clients} welcomed, "
+            f"{self.elapsed:.1f}s, {self.ticks} server ticks",
+            f"tick       {_quantiles(tick)} us "
+            f"(budget {1e6 / self.config.tick_hz:.0f} us)",
+            f"latency    {_quantiles(latency)} us "
+            f"({latency.count} snapshots)",
+            f"server tx  {self.server_bytes_sent / self.elapsed:,.0f} B/s, "
+            f"{self.inputs_received} inputs received",
+        ]
+        for label, attr in (
+            ("client rx", "bytes_received"),
+            ("client tx", "bytes_sent"),
+        ):
+            rates = self.client_rates(attr)
+            if rates:
+                lines.append(
+                    f"{label}  p50 {_pick(rates, 50):,.0f} "
+                    f"p99 {_pick(rates, 99):,.0f} "
+                    f"max {rates[-1]:,.0f} B/s"
+                )
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        def histogram(snapshot: HistogramSnapshot) -> dict:
+            return {
+                "count": snapshot.count,
+                "mean": snapshot.mean,
+                **{f"p{q}": snapshot.percentile(q) for q in (50, 90, 99)},
+            }
+
+        return {
+            "config": asdict(self.config),
+            "elapsed": self.elapsed,
+            "ticks": self.ticks,
+            "tick_us": histogram(self.tick_us),
+            "latency_us": histogram(self.latency_us),
+            "inputs_received": self.inputs_received,
+            "server_bytes_sent": self.server_bytes_sent,
+            "client_rx_bytes_per_sec": self.client_rates("bytes_received"),
+            "client_tx_bytes_per_sec": self.client_rates("bytes_sent"),
+            "welcomed": sum(c.welcomed for c in self.clients),
+        }
+
+
+def _pick(ordered: Sequence[float], q: float) -> float:
+    return ordered[round((len(ordered) - 1) * q / 100)]
+
+
+def _quantiles(snapshot: HistogramSnapshot) -> str:
+    return " ".join(f"p{q} {snapshot.percentile(q)}" for q in (50, 90, 99))
+
+
+class LoadServer:
+    def __init__(
+        self,
+        config: LoadConfig,
+        sent_at: MutableSequence[int],
+        endpoint_factory: Callable = UdpEndpoint,
+    ):
+        self.config = config
+        self.sent_at = sent_at
+        self.world = World()
+        self.snapshot: Optional[Snapshot] = None
+        self.movers = []
+        # clients that acked the same snapshot share the encoded delta
+        self.deltas = DeltaCache()
+        every = round(1 / config.moving) if config.moving else 0
+        for i in range(config.entities):
+            position = Position(UInt16(i), UInt16(i))
+            if every and i % every == 0:
+                velocity = Velocity(UInt16(1), UInt16(1))
+                self.world.create_entity(position, velocity)
+                self.movers.append((position, velocity))
+            else:
+                self.world.create_entity(position)
+
+        self.connections = [
+            ReliableConnection(
+                UdpEndpointConfig(
+                    local_addr=config.server_addr(i),
+                    remote_addr=config.client_addr(i),
+                ),
+                mtu=config.mtu,
+                extenstions=[
+                    SnapshotExtension(
+                        self.current, config.history, self.deltas
+                    ),
+                    ClientExtension(client_id=i),
+                ],
+                endpoint_factory=endpoint_factory,
+            )
+            for i in range(config.clients)
+        ]
+        # clients whose socket went away, e.g. a finished worker
+        self.gone: List[ReliableConnection] = []
+        self.tick_us = Histogram()
+        self.ticks = 0
+        self.inputs = 0
+
+    def current(self) -> Optional[Snapshot]:
+        return self.snapshot
+
+    def tick(self, now: float):
+        start = time.perf_counter_ns()
+        for position, velocity in self.movers:
+            position.x += velocity.dx
+            position.y += velocity.dy
+        self.snapshot = Snapshot.from_world(self.world)
+        self.sent_at[self.snapshot.id] = time.monotonic_ns()
+
+        for connection in self.connections:
+            try:
+                connection.tick(now)
+            except ConnectionRefusedError:
+                self.gone.append(connection)
+                continue
+            self.inputs += len(connection.recv_all())
+        if self.gone:
+            self.connections = [
+                c for c in self.connections if c not in self.gone
+            ]
+        self.tick_us.record((time.perf_counter_ns() - start) // 1000)
+        self.ticks += 1
+
+    @property
+    def bytes_sent(self) -> int:
+        return sum(
+            c.metrics.counts[Metric.BYTES_SENT]
+            for c in self.connections + self.gone
+        )
+
+    def close(self):
+        for connection in self.connections + self.gone:
+            connection.close()
+
+
+class LoadClient:
+    def __init__(
+        self,
+        index: int,
+        config: LoadConfig,
+        sent_at: Sequence[int],
+        endpoint_factory: Callable = UdpEndpoint,
+    ):
+        self.index = index
+        self.sent_at = sent_at
+        world = World()
+        world.register_component_type(Position)
+        world.register_component_type(Velocity)
+        self.connection = ReliableConnection(
+            UdpEndpointConfig(
+                local_addr=config.client_addr(index),
+                remote_addr=config.server_addr(index),
+            ),
+            mtu=config.mtu,
+            extenstions=[SnapshotAckExtension(world, config.history)],
+            endpoint_factory=endpoint_factory,
+        )
+        self.latency_us = Histogram()
+        self.welcomed = False
+        self.snapshots = 0
+        self.inputs = 0
+        self.interval = 1 / config.input_hz if config.input_hz else None
+        # spread the clients' inputs over the interval
+        self._next_input = 0.0
+        self._stagger = index / max(config.clients, 1)
+        self._hello_at = 0.0
+        self._started = self._stopped = 0.0
+
+    def start(self, now: float):
+        self._started = now
+        self._send_hello(now)
+        if self.interval is not None:
+            self._next_input = now + self._stagger * self.interval
+
+    def _send_hello(self, now: float):
+        self._hello_at = now
+        self.connection.send_record(
+            Hello(
+                protocol_version=UInt8(0),
+                client_nonce=UInt32(self.index),
+                app_id=UInt32(0),
+            )
+        )
+
+    def tick(self, now: float):
+        if not self.welcomed and now - self._hello_at >= HELLO_RETRY:
+            self._send_hello(now)
+        if self.welcomed and self.interval and now >= self._next_input:
+            self.connection.send_record(
+                Input(
+                    key=UInt16(self.inputs % 4),
+                    modifiers=UInt8(0),
+                    up_down=UInt8(self.inputs % 2),
+                )
+            )
+            self.inputs += 1
+            self._next_input = max(self._next_input + self.interval, now)
+
+        self.connection.tick(now)
+        for record in self.connection.recv_all():
+            if isinstance(record, SnapshotRecord):
+                self._delivered(record.snapshot.id)
+            elif isinstance(record, Delta):
+                self._delivered(record.snapshot.target_snapshot)
+            elif isinstance(record, Welcome):
+                self.welcomed = True
+        self._stopped = now
+
+    def _delivered(self, snapshot_id: int):
+        self.snapshots += 1
+        if sent_ns := self.sent_at[int(snapshot_id)]:
+            self.latency_us.record((time.monotonic_ns() - sent_ns) // 1000)
+
+    def report(self) -> ClientReport:
+        counts = self.connection.metrics.counts
+        return ClientReport(
+            index=self.index,
+            welcomed=self.welcomed,
+            elapsed=self._stopped - self._started,
+            snapshots=self.snapshots,
+            inputs=self.inputs,
+            bytes_sent=counts[Metric.BYTES_SENT],
+            bytes_received=counts[Metric.BYTES_RECEIVED],
+            latency_us=self.latency_us.snapshot(),
+        )
+
+    def close(self):
+        self.connection.close()
+
+
+def _pace(period: float, started: float) -> float:
+    """Sleep until the next tick boundary, returns the new tick time."""
+    now = time.monotonic()
+    if (remaining := period - (now - started)) > 0:
+        time.sleep(remaining)
+        now = time.monotonic()
+    return now
+
+
+def _run_clients(
+    config: LoadConfig,
+    clients: List[LoadClient],
+    server: Optional[LoadServer] = None,
+) -> float:
+    period = 1 / config.tick_hz
+    now = start = time.monotonic()
+    for client in clients:
+        client.start(now)
+    while now - start < config.duration:
+        tick_started = now
+        if server is not None:
+            server.tick(now)
+        for client in clients:
+            client.tick(now)
+        now = _pace(period, tick_started)
+    return now - start
+
+
+def _run_inline(config: LoadConfig) -> LoadReport:
+    sent_at = [0] * SNAPSHOT_IDS
+    factory: Callable = UdpEndpoint
+    if config.simulated:
+        factory = SimulatedNetwork(MonotonicClock()).endpoint
+    server = LoadServer(config, sent_at, factory)
+    clients: List[LoadClient] = []
+    try:
+        clients = [
+            LoadClient(i, config, sent_at, factory)
+            for i in range(config.clients)
+        ]
+        elapsed = _run_clients(config, clients, server)
+        return LoadReport(
+            config=config,
+            elapsed=elapsed,
+            ticks=server.ticks,
+            tick_us=server.tick_us.snapshot(),
+            inputs_received=server.inputs,
+            server_bytes_sent=server.bytes_sent,
+            clients=[client.report() for client in clients],
+        )
+    finally:
+        for client in clients:
+            client.close()
+        server.close()
+
+
+def _client_worker(config, indices, sent_at, results):
+    clients = [LoadClient(i, config, sent_at) for i in indices]
+    try:
+        _run_clients(config, clients)
+        results.put([client.report() for client in clients])
+    finally:
+        for client in clients:
+            client.close()
+
+
+def _run_processes(config: LoadConfig) -> LoadReport:
+    ctx = mp.get_context("spawn")
+    sent_at = ctx.Array("q", SNAPSHOT_IDS, lock=False)
+    results = ctx.Queue()
+    server = LoadServer(config, sent_at)
+    shards = [
+        list(range(worker, config.clients, config.processes))
+        for worker in range(config.processes)
+    ]
+    workers = [
+        ctx.Process(
+            target=_client_worker,
+            args=(config, shard, sent_at, results),
+            daemon=True,
+        )
+        for shard in shards
+        if shard
+    ]
+    reports: List[ClientReport] = []
+    pending = len(workers)
+    try:
+        for worker in workers:
+            worker.start()
+        period = 1 / config.tick_hz
+        now = start = time.monotonic()
+        deadline = start + config.duration + WORKER_GRACE
+        while pending and now < deadline:
+            tick_started = now
+            server.tick(now)
+            try:
+                reports.extend(results.get_nowait())
+                pending -= 1
+            except queue.Empty:
+                pass
+            now = _pace(period, tick_started)
+        return LoadReport(
+            config=config,
+            elapsed=now - start,
+            ticks=server.ticks,
+            tick_us=server.tick_us.snapshot(),
+            inputs_received=server.inputs,
+            server_bytes_sent=server.bytes_sent,
+            clients=sorted(reports, key=lambda r: r.index),
+        )
+    finally:
+        for worker in workers:
+            worker.join(timeout=1.0)
+            if worker.is_alive():
+                worker.terminate()
+        server.close()
+
+
+def run(config: LoadConfig) -> LoadReport:
+    if config.processes > 1:
+        return _run_processes(config)
+    return _run_inline(config)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m ripple.diagnostics.loadgen"
+    )
+    defaults = LoadConfig()
+    for name, value in asdict(defaults).items():
+        flag = "--" + name.replace("_", "-")
+        if isinstance(value, bool):
+            parser.add_argument(flag, action="store_true")
+        else:
+            parser.add_argument(flag, type=type(value), default=value)
+    parser.add_argument("--json", help="also write the report here")
+    args = vars(parser.parse_args(argv))
+    output = args.pop("json")
+
+    report = run(LoadConfig(**args))
+    print(report.summary())
+    if output:
+        with open(output, "w") as fp:
+            json.dump(report.to_dict(), fp, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
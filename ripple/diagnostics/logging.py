@@ -36,7 +36,18 @@ def log(signal, sender, **kwargs):
         logger.info(line)
 
 
+_connected = False
+
+
 def setup_logging():
+    """
+    Log every signal through the `ripple` logger. Opt-in: this formats each
+    emission, which is far too slow for production packet rates.
+    """
+    global _connected
+    if _connected:
+        return
+    _connected = True
     for member_name in dir(signals):
         member = getattr(signals, member_name)
         if isinstance(member, Signal):
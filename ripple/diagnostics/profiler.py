@@ -0,0 +1,125 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, Optional
+
+from ..core.metrics import MetricsSink
+
+
+@dataclass
+class TickSample:
+    total_ns: int = 0
+    stages: Dict[str, int] = field(default_factory=dict)
+    slow: bool = False
+
+
+class TickProfiler:
+    """
+    Times each stage of `ReliableConnection.tick` with `perf_counter_ns`.
+
+    Every tick is timed as a whole, but only a `sample_rate` fraction of
+    them (deterministically, every 1 / sample_rate ticks) has its stages
+    timed and recorded; on the others `lap` does nothing. Each stage keeps
+    the last `window` samples for rolling percentiles and is forwarded to
+    `metrics.timing_ns` as `tick.<stage>`. Any tick that exceeds
+    `budget_ms` is passed to `on_slow_tick`, sampled or not.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        window: int = 256,
+        budget_ms: float = 16.0,
+        metrics: Optional[MetricsSink] = None,
+        on_slow_tick: Optional[Callable[[TickSample], None]] = None,
+    ):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be within [0, 1]")
+        self.sample_rate = sample_rate
+        self.window = window
+        self.budget_ns = int(budget_ms * 1e6)
+        self.metrics = metrics
+        self.on_slow_tick = on_slow_tick
+
+        self.samples: Dict[str, Deque[int]] = {}
+        self.last: Optional[TickSample] = None
+        self.slow_ticks = 0
+        self._credit = 1.0 - sample_rate
+        self._current = TickSample()
+        self._start_ns = 0
+        self._sampling = False
+
+    def should_sample(self) -> bool:
+        self._credit += self.sample_rate
+        if self._credit < 1.0:
+            return False
+        self._credit -= 1.0
+        return True
+
+    def start(self) -> int:
+        self._current = TickSample()
+        self._sampling = self.should_sample()
+        self._start_ns = time.perf_counter_ns()
+        return self._start_ns
+
+    def lap(self, stage: str, since_ns: int) -> int:
+        """Attribute the time since `since_ns` to `stage`."""
+        if not self._sampling:
+            return since_ns
+        now_ns = time.perf_counter_ns()
+        delta_ns = now_ns - since_ns
+        stages = self._current.stages
+        stages[stage] = stages.get(stage, 0) + delta_ns
+        self._record(stage, delta_ns)
+        return now_ns
+
+    def _record(self, stage: str, delta_ns: int):
+        if (history := self.samples.get(stage)) is None:
+            history = self.samples[stage] = deque(maxlen=self.window)
+        history.append(delta_ns)
+        if self.metrics is not None:
+            self.metrics.timing_ns(f"tick.{stage}", delta_ns)
+
+    def finish(self) -> TickSample:
+        sample = self._current
+        sample.total_ns = time.perf_counter_ns() - self._start_ns
+        if self._sampling:
+            self._record("total", sample.total_ns)
+            self.last = sample
+        if sample.total_ns > self.budget_ns:
+            sample.slow = True
+            self.slow_ticks += 1
+            if self.on_slow_tick is not None:
+                self.on_slow_tick(sample)
+        return sample
+
+    def percentiles(
+        self,
+        stage: str = "total",
+        qs: Iterable[float] = (50, 90, 99),
+    ) -> Dict[float, float]:
+        """Rolling percentiles of `stage` in milliseconds."""
+        history = sorted(self.samples.get(stage, ()))
+        if not history:
+            return {q: 0.0 for q in qs}
+        last = len(history) - 1
+        return {q: history[round(last * q / 100)] / 1e6 for q in qs}
+
+    def report(self, qs: Iterable[float] = (50, 90, 99)):
+        return {stage: self.percentiles(stage, qs) for stage in self.samples}
+
+
+class NullProfiler:
+    """Stands in for a TickProfiler when ticks are not profiled."""
+
+    def start(self) -> int:
+        return 0
+
+    def lap(self, stage: str, since_ns: int) -> int:
+        return since_ns
+
+    def finish(self) -> None:
+        return None
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,289 @@
+"""
+Prometheus text exposition (format 0.0.4) for connection metrics.
+
+    exporter = PrometheusExporter(port=9464)
+    exporter.register(connection)
+    exporter.start()
+
+Only the first `max_series` registered connections get their own
+`connection` label; later ones are summed into `connection="other"` so a
+busy server cannot blow up the series count. Connections unregistered from
+"other" leave their counts and histograms behind, its counters never go
+backwards.
+
+The registry's named timings (e.g. the profiler's `tick.<stage>`) and
+gauges are exported as `timing_us` histograms and `gauge` gauges, told
+apart by a `name` label.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from ..core.metrics import HistogramSnapshot, Latency, Metric
+
+
+OTHER_LABEL = "other"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class _Sample:
+    counters: List[int]
+    latencies: List[HistogramSnapshot]
+    timings: Dict[str, HistogramSnapshot] = field(default_factory=dict)
+    gauges: Dict[Tuple[str, str], float] = field(default_factory=dict)
+    members: int = 1
+
+    def totals(self) -> "_Sample":
+        """Only what accumulates: counters and histograms, no members."""
+        return _Sample(
+            counters=list(self.counters),
+            latencies=list(self.latencies),
+            timings=dict(self.timings),
+            members=0,
+        )
+
+    def add_totals(self, other: "_Sample"):
+        self.counters = [a + b for a, b in zip(self.counters, other.counters)]
+        self.latencies = [
+            a.merge(b) for a, b in zip(self.latencies, other.latencies)
+        ]
+        for name, timing in other.timings.items():
+            mine = self.timings.get(name)
+            self.timings[name] = timing if mine is None else mine.merge(timing)
+
+    def merge(self, other: "_Sample"):
+        self.add_totals(other)
+        # gauges of merged connections are averaged
+        for key, value in other.gauges.items():
+            mean = self.gauges.get(key, 0.0)
+            self.gauges[key] = mean + (value - mean) / (self.members + 1)
+        self.members += 1
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def _labels(**labels: str) -> str:
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+def _render_histogram(
+    lines: List[str], family: str, snapshot: HistogramSnapshot, **labels: str
+):
+    for upper, cumulative in _histogram_bounds(snapshot):
+        bucket = _labels(**labels, le=str(upper))
+        lines.append(f"{family}_bucket{bucket} {cumulative}")
+    bucket = _labels(**labels, le="+Inf")
+    lines.append(f"{family}_bucket{bucket} {snapshot.count}")
+    lines.append(f"{family}_sum{_labels(**labels)} {snapshot.total}")
+    lines.append(f"{family}_count{_labels(**labels)} {snapshot.count}")
+
+
+def _histogram_bounds(snapshot: HistogramSnapshot):
+    """Cumulative counts at each power of two, up to the last sample."""
+    sub_count = 1 << snapshot.sub_bits
+    last = max(
+        (i for i, count in enumerate(snapshot.counts) if count), default=-1
+    )
+    cumulative = 0
+    for index, count in enumerate(snapshot.counts[: last + 1]):
+        cumulative += count
+        octave_end = index >= sub_count and (index + 1) % sub_count == 0
+        if octave_end or index == last:
+            yield snapshot.bucket_upper(index), cumulative
+
+
+def _sample_connection(connection) -> _Sample:
+    snapshot = connection.metrics.snapshot()
+    gauges: Dict[Tuple[str, str], float] = {}
+
+    tx = connection.reliability.tx
+    gauges[("srtt_seconds", "")] = tx.rto.srtt
+    gauges[("rttvar_seconds", "")] = tx.rto.rttvar
+    gauges[("rto_seconds", "")] = tx.rto.rto
+    gauges[("in_flight", "")] = float(len(tx.pending))
+
+    endpoint = connection.endpoint
+    gauges[("ring_fill_ratio", "rx")] = endpoint.rx_queue.fill_ratio()
+    gauges[("ring_fill_ratio", "tx")] = endpoint.tx_queue.fill_ratio()
+
+    for extension in connection.extenstions:
+        if (ping_manager := getattr(extension, "ping_manager", None)):
+            gauges[("ping_srtt_ms", "")] = ping_manager.rtt.srtt
+            gauges[("ping_jitter_ms", "")] = ping_manager.jitter_rtp.j_ms
+            break
+
+    for name, value in snapshot.gauges.items():
+        gauges[("gauge", name)] = value
+
+    return _Sample(
+        counters=list(snapshot.counters),
+        latencies=list(snapshot.latencies),
+        timings=dict(snapshot.timings),
+        gauges=gauges,
+    )
+
+
+class PrometheusExporter:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+        namespace: str = "ripple",
+        max_series: int = 32,
+    ):
+        self.host = host
+        self.port = port
+        self.namespace = namespace
+        self.max_series = max_series
+
+        self._lock = threading.Lock()
+        self._connections: Dict[int, Tuple[str, object]] = {}
+        # totals of connections that left "other"
+        self._departed: Optional[_Sample] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, connection, name: Optional[str] = None) -> str:
+        """Returns the label the connection is exported under."""
+        if name is None:
+            cfg = connection.endpoint.cfg
+            addr = cfg.remote_addr or cfg.local_addr
+            name = f"{addr.host}:{addr.port}"
+        with self._lock:
+            labelled = sum(
+                1 for label, _ in self._connections.values()
+                if label != OTHER_LABEL
+            )
+            if labelled >= self.max_series:
+                name = OTHER_LABEL
+            self._connections[id(connection)] = (name, connection)
+        return name
+
+    def unregister(self, connection) -> None:
+        with self._lock:
+            entry = self._connections.pop(id(connection), None)
+        if entry is None or entry[0] != OTHER_LABEL:
+            return
+        totals = _sample_connection(connection).totals()
+        with self._lock:
+            if self._departed is None:
+                self._departed = totals
+            else:
+                self._departed.add_totals(totals)
+
+    def collect(self) -> Dict[str, _Sample]:
+        with self._lock:
+            connections = list(self._connections.values())
+            departed = self._departed
+
+        samples: Dict[str, _Sample] = {}
+        if departed is not None:
+            samples[OTHER_LABEL] = departed.totals()
+        for label, connection in connections:
+            sample = _sample_connection(connection)
+            if label in samples:
+                samples[label].merge(sample)
+            else:
+                samples[label] = sample
+        return samples
+
+    def render(self) -> str:
+        samples = self.collect()
+        ns = self.namespace
+        lines = [
+            f"# TYPE {ns}_connections gauge",
+            f"{ns}_connections {sum(s.members for s in samples.values())}",
+        ]
+
+        for metric in Metric:
+            name = f"{ns}_{metric.name.lower()}_total"
+            lines.append(f"# TYPE {name} counter")
+            for label, sample in samples.items():
+                value = sample.counters[metric]
+                lines.append(f"{name}{_labels(connection=label)} {value}")
+
+        gauges: Dict[str, List[Tuple[str, str, float]]] = {}
+        for label, sample in samples.items():
+            for (gauge, queue), value in sample.gauges.items():
+                gauges.setdefault(gauge, []).append((label, queue, value))
+        for gauge, values in gauges.items():
+            name = f"{ns}_{gauge}"
+            lines.append(f"# TYPE {name} gauge")
+            # registry gauges are named, the built-in ones are per queue
+            key = "name" if gauge == "gauge" else "queue"
+            for label, extra, value in values:
+                labels = {"connection": label}
+                if extra:
+                    labels[key] = extra
+                lines.append(f"{name}{_labels(**labels)} {value!r}")
+
+        for latency in Latency:
+            name = f"{ns}_{latency.name.lower()}"
+            lines.append(f"# TYPE {name} histogram")
+            for label, sample in samples.items():
+                snapshot = sample.latencies[latency]
+                _render_histogram(lines, name, snapshot, connection=label)
+
+        name = f"{ns}_timing_us"
+        lines.append(f"# TYPE {name} histogram")
+        for label, sample in samples.items():
+            for timing, snapshot in sorted(sample.timings.items()):
+                _render_histogram(
+                    lines, name, snapshot, connection=label, name=timing
+                )
+
+        return "\n".join(lines) + "\n"
+
+    # ==== HTTP listener ====
+    @property
+    def address(self) -> Tuple[str, int]:
+        if self._server is None:
+            return self.host, self.port
+        return self._server.server_address[:2]
+
+    def start(self) -> None:
+        if self._server is not None:
+            return
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="ripple-prometheus",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        self._server = None
+        self._thread = None
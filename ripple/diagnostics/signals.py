@@ -1,4 +1,8 @@
-from blinker import signal
+import sys
+from enum import IntEnum
+from types import SimpleNamespace
+
+from blinker import NamedSignal, signal
 
 # from typing import Any, Callable
 # from blinker import NamedSignal, Namespace, ANY, F
@@ -48,6 +52,8 @@ RETRANSMITTING = signal("RETRANSMITTING")
 SEND_ACK = signal("SEND_ACK")
 RECV_ACK = signal("RECV_ACK")
 
+SLOW_TICK = signal("SLOW_TICK")
+
 # ringbuffer
 RING_EVENT = signal("RING_EVENT")
 
@@ -60,3 +66,59 @@ PING_SENT = signal("PING_SENT")
 PONG_SENT = signal("PONG_RECEIVED")
 PONG_RECEIVED = signal("PONG_RECEIVED")
 PING_LOST = signal("PING_LOST")
+
+# MtuDiscovery
+MTU_PROBE_SENT = signal("MTU_PROBE_SENT")
+MTU_PROBE_LOST = signal("MTU_PROBE_LOST")
+MTU_UPDATED = signal("MTU_UPDATED")
+
+
+class DiagnosticsLevel(IntEnum):
+    OFF = 0
+    ON = 1
+
+
+class NullSignal:
+    """Stand-in for a blinker signal that never has receivers."""
+
+    receivers: dict = {}
+
+    def send(self, *sender, **kwargs):
+        return []
+
+    def connect(self, receiver, sender=None, weak=True):
+        raise RuntimeError("Diagnostics are off, signals cannot be connected")
+
+
+NULL_SIGNAL = NullSignal()
+null_signals = SimpleNamespace(
+    **{
+        name: NULL_SIGNAL
+        for name, member in list(globals().items())
+        if isinstance(member, NamedSignal)
+    }
+)
+
+_level = DiagnosticsLevel.ON
+
+
+def set_diagnostics_level(level: DiagnosticsLevel) -> None:
+    """
+    Switch signal emission on or off. Components read the level once when
+    they are created, so set it before building endpoints and connections.
+    """
+    global _level
+    _level = DiagnosticsLevel(level)
+
+
+def get_diagnostics_level() -> DiagnosticsLevel:
+    return _level
+
+
+def enabled() -> bool:
+    return _level is not DiagnosticsLevel.OFF
+
+
+def active():
+    """This module when diagnostics are on, a no-op namespace otherwise."""
+    return sys.modules[__name__] if enabled() else null_signals
@@ -0,0 +1,364 @@
+"""
+Columnar (structure of arrays) component storage backed by NumPy.
+
+Entities are grouped by their exact set of component types, like `Store`,
+but every field of every component type is its own contiguous array with
+the dtype of its `UInt*` annotation. Queries hand out views over those
+arrays so systems run over all matching entities at once:
+
+    for pos, vel in columns.query(Position, Velocity):
+        pos.x += vel.dx
+        pos.y += vel.dy
+
+Assigning a field through a view marks that field dirty for every row of
+the view in a per-row bitmask column (bit `i` is the component's `i`th
+field). Rows pack to the same bytes as the component's `Packer`, so dirty
+rows can go straight into snapshots.
+
+Views are only valid until the next add/remove; arrays are reallocated
+and rows move as entities change archetype.
+
+The store stands on its own: `World`, `Store` and `Snapshot.from_world`
+do not use it. Systems that run on it feed snapshots themselves, from
+`pack_dirty`. Needs the `columnar` extra (`pip install ripple[columnar]`).
+"""
+
+from __future__ import annotations
+from inspect import get_annotations
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TYPE_CHECKING,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from ..utils import UInt8, UInt16, UInt32
+
+if TYPE_CHECKING:
+    from .observability import Observable
+
+
+DTYPES = {UInt8: "u1", UInt16: "u2", UInt32: "u4"}
+MAX_FIELDS = 32
+
+
+class ComponentLayout:
+    """Fields of a component type and their NumPy dtypes."""
+
+    def __init__(self, component_type: Type[Observable]):
+        annotations = get_annotations(component_type, eval_str=True)
+        self.type = component_type
+        self.fields: List[str] = [
+            name for name, kind in annotations.items() if kind in DTYPES
+        ]
+        if len(self.fields) > MAX_FIELDS:
+            raise ValueError(f"At most {MAX_FIELDS} fields are supported")
+        self.dtypes = {
+            name: np.dtype(DTYPES[annotations[name]]) for name in self.fields
+        }
+        self.bits = {name: 1 << i for i, name in enumerate(self.fields)}
+        self.all_bits = (1 << len(self.fields)) - 1
+        # big endian and unpadded, the same layout as the struct packer
+        self.wire_dtype = np.dtype(
+            [(name, ">" + DTYPES[annotations[name]]) for name in self.fields]
+        )
+
+    def values_of(self, instance: Observable) -> Dict[str, int]:
+        return {name: int(getattr(instance, name)) for name in self.fields}
+
+
+class Table:
+    """All entities with exactly `types`, one array per (type, field)."""
+
+    def __init__(
+        self,
+        types: FrozenSet[Type],
+        layouts: Dict[Type, ComponentLayout],
+        capacity: int = 64,
+    ):
+        self.types = types
+        self.layouts = {t: layouts[t] for t in types}
+        self.count = 0
+        self.capacity = capacity
+        self.entities = np.zeros(capacity, dtype=np.uint32)
+        self.columns: Dict[Type, Dict[str, np.ndarray]] = {
+            t: {
+                name: np.zeros(capacity, dtype=dtype)
+                for name, dtype in layout.dtypes.items()
+            }
+            for t, layout in self.layouts.items()
+        }
+        self.dirty: Dict[Type, np.ndarray] = {
+            t: np.zeros(capacity, dtype=np.uint32) for t in types
+        }
+
+    def _grow(self):
+        capacity = self.capacity * 2
+
+        def grown(array):
+            bigger = np.zeros(capacity, dtype=array.dtype)
+            bigger[: self.count] = array[: self.count]
+            return bigger
+
+        self.entities = grown(self.entities)
+        for columns in self.columns.values():
+            for name in columns:
+                columns[name] = grown(columns[name])
+        for t in self.dirty:
+            self.dirty[t] = grown(self.dirty[t])
+        self.capacity = capacity
+
+    def append(
+        self,
+        eid: int,
+        values: Dict[Type, Dict[str, int]],
+        dirty: Dict[Type, int],
+    ) -> int:
+        if self.count == self.capacity:
+            self._grow()
+        row = self.count
+        self.entities[row] = eid
+        for t, columns in self.columns.items():
+            for name, value in values[t].items():
+                columns[name][row] = value
+            self.dirty[t][row] = dirty[t]
+        self.count += 1
+        return row
+
+    def read(self, row: int) -> Tuple[Dict[Type, Dict[str, int]], Dict]:
+        values = {
+            t: {name: int(column[row]) for name, column in columns.items()}
+            for t, columns in self.columns.items()
+        }
+        dirty = {t: int(bits[row]) for t, bits in self.dirty.items()}
+        return values, dirty
+
+    def swap_remove(self, row: int) -> int:
+        """Fill `row` with the last row, returns the moved eid or -1."""
+        last = self.count - 1
+        moved = -1
+        if row != last:
+            self.entities[row] = self.entities[last]
+            for columns in self.columns.values():
+                for column in columns.values():
+                    column[row] = column[last]
+            for bits in self.dirty.values():
+                bits[row] = bits[last]
+            moved = int(self.entities[row])
+        self.count = last
+        return moved
+
+    def view(self, component_type: Type) -> ComponentView:
+        return ComponentView(self, component_type)
+
+
+class ComponentView:
+    """
+    One component type's fields over all rows of a table, as array views.
+    Reading `view.x` returns the column, assigning it stores the values and
+    marks `x` dirty on every row.
+    """
+
+    __slots__ = ("_table", "_type", "_layout")
+
+    def __init__(self, table: Table, component_type: Type):
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_type", component_type)
+        object.__setattr__(self, "_layout", table.layouts[component_type])
+
+    def __len__(self) -> int:
+        return self._table.count
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        table = self._table
+        try:
+            column = table.columns[self._type][name]
+        except KeyError:
+            raise AttributeError(name) from None
+        return column[: table.count]
+
+    def __setattr__(self, name: str, value) -> None:
+        table = self._table
+        try:
+            column = table.columns[self._type][name]
+        except KeyError:
+            raise AttributeError(name) from None
+        count = table.count
+        # `view.x += 1` has already written in place, the copy is a no-op
+        column[:count] = value
+        table.dirty[self._type][:count] |= self._layout.bits[name]
+
+    @property
+    def entities(self) -> np.ndarray:
+        return self._table.entities[: self._table.count]
+
+    @property
+    def dirty(self) -> np.ndarray:
+        return self._table.dirty[self._type][: self._table.count]
+
+    def mark_dirty(self, name: str, where: Optional[np.ndarray] = None):
+        """Flag `name` dirty, on the rows selected by `where` if given."""
+        bits = self.dirty
+        if where is None:
+            bits |= self._layout.bits[name]
+        else:
+            bits[where] |= self._layout.bits[name]
+
+
+class ColumnarStore:
+    """
+    Archetype storage with NumPy columns, an alternative to `Store` for
+    worlds large enough that per-entity Python objects dominate. Not a
+    `World` backend, see the module docstring.
+    """
+
+    def __init__(self, capacity: int = 64):
+        if np is None:
+            raise RuntimeError(
+                "ColumnarStore requires `numpy`, install ripple[columnar]"
+            )
+        self.capacity = capacity
+        self.layouts: Dict[Type, ComponentLayout] = {}
+        self.tables: Dict[FrozenSet[Type], Table] = {}
+        # eid -> (table, row)
+        self.locations: Dict[int, Tuple[Table, int]] = {}
+        self._queries: Dict[Tuple[Type, ...], List[Table]] = {}
+
+    def layout(self, component_type: Type) -> ComponentLayout:
+        if (layout := self.layouts.get(component_type)) is None:
+            layout = ComponentLayout(component_type)
+            self.layouts[component_type] = layout
+        return layout
+
+    def _table(self, types: FrozenSet[Type]) -> Table:
+        if (table := self.tables.get(types)) is None:
+            table = Table(types, self.layouts, self.capacity)
+            self.tables[types] = table
+            self._queries.clear()
+        return table
+
+    def _take(self, eid: int):
+        if (location := self.locations.pop(eid, None)) is None:
+            return {}, {}
+        table, row = location
+        values, dirty = table.read(row)
+        moved = table.swap_remove(row)
+        if moved >= 0:
+            self.locations[moved] = (table, row)
+        return values, dirty
+
+    def _place(self, eid: int, values: Dict, dirty: Dict) -> None:
+        if not values:
+            return
+        table = self._table(frozenset(values))
+        self.locations[eid] = (table, table.append(eid, values, dirty))
+
+    def add(self, eid: int, instance: Observable) -> None:
+        """Add (or replace) a component from an Observable instance."""
+        layout = self.layout(type(instance))
+        self.add_values(eid, layout.type, **layout.values_of(instance))
+
+    def add_values(self, eid: int, component_type: Type, **values: int):
+        layout = self.layout(component_type)
+        missing = [name for name in layout.fields if name not in values]
+        for name in missing:
+            default = getattr(component_type, name, None)
+            if default is None:
+                raise ValueError(f"No value or default for {name}")
+            values[name] = int(default)
+
+        eid = int(eid)
+        location = self.locations.get(eid)
+        if location is not None and component_type in location[0].types:
+            table, row = location
+            for name, value in values.items():
+                table.columns[component_type][name][row] = value
+            table.dirty[component_type][row] = layout.all_bits
+            return
+        current, dirty = self._take(eid)
+        current[component_type] = values
+        dirty[component_type] = layout.all_bits
+        self._place(eid, current, dirty)
+
+    def remove(self, eid: int, component_type: Type) -> None:
+        eid = int(eid)
+        location = self.locations.get(eid)
+        if location is None or component_type not in location[0].types:
+            return
+        values, dirty = self._take(eid)
+        del values[component_type]
+        del dirty[component_type]
+        self._place(eid, values, dirty)
+
+    def purge_entity(self, eid: int) -> None:
+        self._take(int(eid))
+
+    def get(self, eid: int, component_type: Type) -> Dict[str, int]:
+        table, row = self.locations[int(eid)]
+        return {
+            name: int(column[row])
+            for name, column in table.columns[component_type].items()
+        }
+
+    def set(self, eid: int, component_type: Type, **values: int) -> None:
+        """Scalar write, only fields whose value changes are marked dirty."""
+        table, row = self.locations[int(eid)]
+        columns = table.columns[component_type]
+        bits = self.layouts[component_type].bits
+        for name, value in values.items():
+            column = columns[name]
+            if column[row] != value:
+                column[row] = value
+                table.dirty[component_type][row] |= bits[name]
+
+    def _matching(self, component_types: Tuple[Type, ...]) -> List[Table]:
+        if (matching := self._queries.get(component_types)) is None:
+            wanted = frozenset(component_types)
+            matching = [
+                table
+                for types, table in self.tables.items()
+                if wanted <= types
+            ]
+            self._queries[component_types] = matching
+        return matching
+
+    def query(self, *component_types: Type) -> Iterator[Tuple]:
+        """One tuple of ComponentViews per non-empty matching table."""
+        for table in self._matching(component_types):
+            if table.count:
+                yield tuple(table.view(t) for t in component_types)
+
+    def pack_dirty(self, component_type: Type) -> Iterator[Tuple[int, bytes]]:
+        """
+        `(eid, payload)` for every row with a dirty field, packed like the
+        component's `Packer` would pack the Observable.
+        """
+        layout = self.layout(component_type)
+        size = layout.wire_dtype.itemsize
+        for table in self._matching((component_type,)):
+            count = table.count
+            rows = np.flatnonzero(table.dirty[component_type][:count])
+            if not len(rows):
+                continue
+            packed = np.empty(len(rows), dtype=layout.wire_dtype)
+            for name, column in table.columns[component_type].items():
+                packed[name] = column[rows]
+            payload = packed.tobytes()
+            for i, eid in enumerate(table.entities[rows].tolist()):
+                yield eid, payload[i * size : (i + 1) * size]
+
+    def clear_dirty(self, component_type: Type) -> None:
+        for table in self._matching((component_type,)):
+            table.dirty[component_type][: table.count] = 0
+
+    def __len__(self) -> int:
+        return len(self.locations)
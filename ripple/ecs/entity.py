@@ -1,18 +1,18 @@
 from __future__ import annotations
 from typing import Type, Iterable, Dict, cast, TYPE_CHECKING
 from dataclasses import dataclass, field
+from functools import partial
 from io import BytesIO
 
-from .utils import IdGenerator
 from .observability import Observable
 from .snapshot import EntitySnapshot
-from ..utils import UInt16
+from ..utils import UInt16, VarUInt
 from ..utils.packable import Packer, Packable, make_packer
 
 
 if TYPE_CHECKING:
     from .world import World
-    from .snapshot import ComponentSnapshot
+    from .snapshot import ComponentDelta, ComponentSnapshot, DeltaEntitySnapshot
 
 PACKERS = {}
 
@@ -29,7 +29,7 @@ class Component:
     instance: Observable
     type: Type
     packer: Packer
-    component_id: UInt16 = field(init=False, default_factory=IdGenerator())
+    component_id: VarUInt
     version_id: UInt16 = UInt16(0)
 
     def pack(self):
@@ -39,13 +39,13 @@ class Component:
     def from_snapshot(cls, world: World, snapshot: ComponentSnapshot):
         comp_type = world.component_type_ids[snapshot.type_id].type
         packer = get_packer(comp_type)
-        unpacked = packer.unpack(BytesIO(delta.data.payload))
+        unpacked = packer.unpack(BytesIO(snapshot.data.payload))
         return cls(
             instance=comp_type(**unpacked),
             type=comp_type,
             packer=packer,
             component_id=snapshot.id,
-            version_id=snapshot.version_id,
+            version_id=snapshot.version,
         )
 
     def apply(self, delta: ComponentSnapshot):
@@ -55,53 +55,64 @@ class Component:
             raise ValueError("Version too far in the future")
 
         unpacked = self.packer.unpack(BytesIO(delta.data.payload))
-        self.instance._values.update(unpacked)
+        self.instance._assign(unpacked)
+        self.instance._dirty = 0
+        self.version_id = delta.version
+
+    def apply_delta(self, delta: ComponentDelta):
+        """Update the changed fields in place."""
+        if delta.id != self.component_id:
+            raise ValueError("Cannot apply delta from other component")
+        self.instance._assign(delta.unpack_fields(self.type))
+        self.instance._dirty = 0
         self.version_id = delta.version
-        self.instance._dirty.clear()
 
 
 @dataclass
 class Entity:
     world: World
-    entity_id: UInt16 = field(init=False, default_factory=IdGenerator())
+    entity_id: VarUInt
     version_id: UInt16 = UInt16(0)
-    components: Dict[UInt16, Component] = field(default_factory=dict)
+    components: Dict[VarUInt, Component] = field(default_factory=dict)
 
     @classmethod
     def from_snapshot(cls, world: World, snapshot: EntitySnapshot):
-        components = {}
-        for component in snapshot.components:
-            component = Component.from_snapshot(world, snapshot)
-            components[component.component_id] = component
-        self.world.store.add_component(entity.id, component)
-
-        return cls(
-            world=self,
-            entity_id=entity.id,
-            version_id=entity.version,
-            components=components,
+        entity = cls(
+            world=world,
+            entity_id=snapshot.id,
+            version_id=snapshot.version,
         )
+        for component_snapshot in snapshot.components.values():
+            component = Component.from_snapshot(world, component_snapshot)
+            entity.components[component.component_id] = component
+            world.store.add_component(entity.entity_id, component)
+        return entity
 
-    def apply_delta(self, world: world, delta: DeltaEntitySnapshot):
+    def apply_delta(self, delta: DeltaEntitySnapshot):
         for cid, component_delta in delta.updates.items():
             self.components[cid].apply_delta(component_delta)
         for cid in delta.despawns:
             component = self.components.pop(cid)
             self.world.store.remove_component(self.entity_id, component)
         for component_snap in delta.spawns:
-            component = Component.from_snapshot(component_snap)
+            component = Component.from_snapshot(self.world, component_snap)
             self.components[component.component_id] = component
             self.world.store.add_component(self.entity_id, component)
+        self.version_id = delta.target_snapshot
 
     def add_component(self, value_component: Observable):
         component = Component(
             instance=value_component,
             type=type(value_component),
             packer=get_packer(value_component.__class__),
+            component_id=self.world.component_ids(),
         )
         # Keep a local cache for snapshotting
         self.components[component.component_id] = component
         self.world.store.add_component(self.entity_id, component)
+        dirty_entities = self.world.dirty_entities
+        dirty_entities.add(self.entity_id)
+        value_component._on_dirty = partial(dirty_entities.add, self.entity_id)
 
     def add_components(self, components: Iterable[Observable]):
         for component in components:
@@ -0,0 +1,38 @@
+from __future__ import annotations
+from typing import List, Optional
+
+from .snapshot import Snapshot
+from ..utils.seq import MASK16, seq_newer
+
+
+class SnapshotHistory:
+    """
+    The last `size` snapshots, one slot per `id % size`. `size` must be a
+    power of two so slots stay in order across the UInt16 id wrap.
+    """
+
+    def __init__(self, size: int = 32):
+        if size <= 0 or size & (size - 1) or size > MASK16 + 1:
+            raise ValueError("History size must be a power of two")
+        self.size = size
+        self._slots: List[Optional[Snapshot]] = [None] * size
+        self.latest: Optional[Snapshot] = None
+
+    def add(self, snapshot: Snapshot) -> None:
+        self._slots[snapshot.id & (self.size - 1)] = snapshot
+        latest = self.latest
+        if latest is None or seq_newer(snapshot.id, latest.id):
+            self.latest = snapshot
+
+    def get(self, snapshot_id: int) -> Optional[Snapshot]:
+        snapshot = self._slots[snapshot_id & (self.size - 1)]
+        if snapshot is not None and snapshot.id == snapshot_id:
+            return snapshot
+        return None
+
+    def __contains__(self, snapshot_id: int) -> bool:
+        return self.get(snapshot_id) is not None
+
+    def clear(self) -> None:
+        self._slots = [None] * self.size
+        self.latest = None
@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import Dict, Optional, Set, Tuple, Type, TYPE_CHECKING
+
+from .snapshot import Snapshot
+from ..utils import VarUInt
+
+if TYPE_CHECKING:
+    from .observability import Observable
+    from .world import World
+
+
+Cell = Tuple[int, int]
+
+
+class GridInterest:
+    """
+    Uniform grid over the `x`/`y` fields of `position_type`, for snapshots
+    that only hold what is near a client. An entity is visible from the
+    cells up to `radius` cells away from its own; entities without a
+    position are visible from everywhere.
+
+    `update` refreshes the grid from `world.dirty_entities`, so call it
+    every tick before `Snapshot.from_world` clears them.
+    """
+
+    def __init__(
+        self,
+        world: World,
+        position_type: Type[Observable],
+        cell_size: int = 64,
+        radius: int = 1,
+        x: str = "x",
+        y: str = "y",
+    ):
+        if cell_size <= 0 or radius < 0:
+            raise ValueError("Cell size must be positive, radius not negative")
+        self.world = world
+        self.position_type = position_type
+        self.cell_size = cell_size
+        self.radius = radius
+        self.x = x
+        self.y = y
+        self.cells: Dict[Cell, Set[VarUInt]] = {}
+        self.entity_cells: Dict[VarUInt, Cell] = {}
+        self.everywhere: Set[VarUInt] = set()
+        # filtered snapshots of `_source` by cell, shared between clients
+        self._source: Optional[Snapshot] = None
+        self._filtered: Dict[Cell, Snapshot] = {}
+        for eid in world.entities:
+            self._place(eid)
+
+    def cell(self, x: int, y: int) -> Cell:
+        return x // self.cell_size, y // self.cell_size
+
+    def update(self) -> None:
+        for eid in self.world.dirty_entities:
+            self._place(eid)
+
+    def _place(self, eid: VarUInt) -> None:
+        try:
+            position = self.world.store.get_component(eid, self.position_type)
+        except KeyError:
+            # despawned, or has no position
+            position = None
+        old = self.entity_cells.get(eid)
+        if position is None:
+            self._remove(eid, old)
+            if eid in self.world.entities:
+                self.everywhere.add(eid)
+            else:
+                self.everywhere.discard(eid)
+            return
+        self.everywhere.discard(eid)
+        cell = self.cell(getattr(position, self.x), getattr(position, self.y))
+        if cell == old:
+            return
+        self._remove(eid, old)
+        self.entity_cells[eid] = cell
+        self.cells.setdefault(cell, set()).add(eid)
+
+    def _remove(self, eid: VarUInt, cell: Optional[Cell]) -> None:
+        if cell is None:
+            return
+        del self.entity_cells[eid]
+        members = self.cells[cell]
+        members.discard(eid)
+        if not members:
+            del self.cells[cell]
+
+    def visible(self, cell: Cell) -> Set[VarUInt]:
+        """Entities visible from `cell`."""
+        cx, cy = cell
+        radius = self.radius
+        visible = set(self.everywhere)
+        for x in range(cx - radius, cx + radius + 1):
+            for y in range(cy - radius, cy + radius + 1):
+                if (members := self.cells.get((x, y))) is not None:
+                    visible |= members
+        return visible
+
+    def filter(self, snapshot: Snapshot, x: int, y: int) -> Snapshot:
+        """
+        `snapshot` cut down to what is visible from `x`, `y`. It keeps the
+        snapshot's id, so deltas between two of them spawn the entities
+        that came into view and despawn those that left. Clients in the
+        same cell get the same object, which lets them share deltas.
+        """
+        if snapshot is not self._source:
+            self._source = snapshot
+            self._filtered = {}
+        cell = self.cell(x, y)
+        if (filtered := self._filtered.get(cell)) is None:
+            entities = snapshot.entities
+            filtered = self._filtered[cell] = Snapshot(
+                id=snapshot.id,
+                entities={
+                    eid: entities[eid]
+                    for eid in self.visible(cell)
+                    if eid in entities
+                },
+                interest=cell,
+            )
+        return filtered
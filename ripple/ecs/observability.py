@@ -1,6 +1,5 @@
-from inspect import get_annotations, isclass
-from dataclasses import dataclass, field
-from typing import Dict, Set, Any
+from inspect import get_annotations
+from typing import Any, Dict, Iterator
 
 from ..utils import UInt8, UInt16, UInt32
 
@@ -13,30 +12,72 @@ ALLOWED_TYPES = {
 }
 
 
+class ChangeClock:
+    """Counter stamped on an observable every time one of its fields changes."""
+
+    __slots__ = ("now",)
+
+    def __init__(self):
+        self.now = 0
+
+    def tick(self) -> int:
+        self.now += 1
+        return self.now
+
+
+CLOCK = ChangeClock()
+
+
 class ObservableField:
-    def __init__(self, wanted_type, default_value=VOID):
+    """
+    Typed field stored in a slot of the instance. Writes that change the
+    value set the field's bit in the instance's `_dirty` mask.
+    """
+
+    __slots__ = ("field_type", "default_value", "name", "bit", "slot")
+
+    def __init__(self, wanted_type, default_value=VOID, bit=0):
         self.field_type = wanted_type
         self.default_value = default_value
+        self.bit = bit
 
     def __set_name__(self, owner, name):
         self.name = name
+        self.slot = owner.__dict__[slot_name(name)]
 
     def __get__(self, obj, objtype=None):
-        if obj is None and self.default_value is not VOID:
+        if obj is None:
+            # dataclass looks the default up on the class
+            if self.default_value is VOID:
+                raise AttributeError(self.name)
+            return self.default_value
+        try:
+            return self.slot.__get__(obj)
+        except AttributeError:
+            if self.default_value is VOID:
+                raise AttributeError(
+                    f"{type(obj)} has not attribute {self.name}"
+                ) from None
             return self.default_value
-        if self.name not in obj._values and self.default_value is VOID:
-            raise AttributeError(f"{type(obj)} has not attribute {self.name}")
-        return obj._values.get(self.name, self.default_value)
 
     def __set__(self, obj, value):
-        if isclass(obj):
-            obj = value
-            return
         if not isinstance(value, self.field_type):
             raise ValueError(f"{type(value)} is not {self.field_type}")
-        if obj._values.get(self.name, VOID) != value:
-            obj._values[self.name] = value
-            obj._dirty.add(self.name)
+        slot = self.slot
+        try:
+            if slot.__get__(obj) == value:
+                return
+        except AttributeError:
+            pass
+        slot.__set__(obj, value)
+        if not obj._dirty and obj._on_dirty is not None:
+            obj._on_dirty()
+        obj._dirty |= self.bit
+        obj._changed = CLOCK.tick()
+
+
+def slot_name(name: str) -> str:
+    return f"_v_{name}"
 
 
 class ObservableMeta(type):
@@ -44,24 +85,60 @@ class ObservableMeta(type):
         stub_cls = super().__new__(cls, name, bases, dct)
         annotations = get_annotations(stub_cls, eval_str=True)
 
+        observed: Dict[str, ObservableField] = {}
+        for base in reversed(bases):
+            observed.update(getattr(base, "_observed", {}))
+        slots = list(dct.get("__slots__", ()))
+
         for name, field_type in annotations.items():
-            if name in ("_values", "_dirty"):
-                continue
             if field_type not in ALLOWED_TYPES.values():
                 msg = f"Only {', '.join(ALLOWED_TYPES)} are allowed for now"
                 raise ValueError(msg)
             default_value = VOID
             if name in dct:
                 default_value = dct[name]
-            dct[name] = ObservableField(field_type, default_value)
+            bit = 1 << len(observed)
+            dct[name] = observed[name] = ObservableField(
+                field_type, default_value, bit
+            )
+            slots.append(slot_name(name))
 
+        dct["__slots__"] = tuple(slots)
+        dct["_observed"] = observed
+        dct["_fields"] = tuple(observed)
         return super().__new__(cls, name, bases, dct)
 
 
-@dataclass
 class Observable(metaclass=ObservableMeta):
-    _values: Dict[str, Any] = field(default_factory=dict, init=False)
-    _dirty: Set[str] = field(default_factory=set, init=False)
+    """
+    Base for components, used with `@dataclass`. Fields live in slots and
+    changes are tracked in `_dirty`, an int with the bit of every changed
+    field (in `_fields` order), so instances carry no dict or set.
+    """
+
+    __slots__ = ("_dirty", "_changed", "_on_dirty")
+
+    def __new__(cls, *args, **kwargs):
+        self = super().__new__(cls)
+        self._dirty = 0
+        # CLOCK.now as of the last field change
+        self._changed = 0
+        # called when a field changes while `_dirty` is clear
+        self._on_dirty = None
+        return self
 
     def __post_init__(self):
-        self._dirty = set()
+        self._dirty = 0
+
+    def _assign(self, values: Dict[str, Any]) -> None:
+        """Set fields without marking them dirty, for state from the wire."""
+        observed = self._observed
+        for name, value in values.items():
+            observed[name].slot.__set__(self, value)
+        self._changed = CLOCK.tick()
+
+    def _dirty_fields(self) -> Iterator[str]:
+        dirty = self._dirty
+        for name, field in self._observed.items():
+            if dirty & field.bit:
+                yield name
@@ -1,9 +1,19 @@
 from __future__ import annotations
-from typing import List, Dict, TYPE_CHECKING
-from dataclasses import dataclass, field, asdict
+from typing import (
+    List,
+    Dict,
+    Hashable,
+    Optional,
+    Tuple,
+    Type,
+    TYPE_CHECKING,
+)
+from dataclasses import dataclass, field
+import struct
 
+from .observability import Observable
 from .utils import IdGenerator
-from ..utils import UInt16, BytesField
+from ..utils import UInt16, VarUInt, BytesField
 from ..utils.packable import Packable
 
 if TYPE_CHECKING:
@@ -11,37 +21,163 @@ if TYPE_CHECKING:
     from .entity import Entity, Component
 
 
+# name, type, bit, start, end, struct of one field in a packed component
+FieldSlice = Tuple[str, type, int, int, int, struct.Struct]
+LAYOUTS: Dict[type, Tuple[FieldSlice, ...]] = {}
+
+
+def field_layout(component_type: Type[Observable]) -> Tuple[FieldSlice, ...]:
+    """Where each field of `component_type` sits in its packed form."""
+    if (layout := LAYOUTS.get(component_type)) is None:
+        slices = []
+        start = 0
+        for name, observed in component_type._observed.items():
+            fmt = struct.Struct(f"!{observed.field_type._struct_format}")
+            end = start + fmt.size
+            slices.append(
+                (name, observed.field_type, observed.bit, start, end, fmt)
+            )
+            start = end
+        layout = LAYOUTS[component_type] = tuple(slices)
+    return layout
+
+
 @dataclass(frozen=True)
 class ComponentSnapshot(Packable):
-    id: UInt16
+    id: VarUInt
     version: UInt16
     type_id: UInt16
     data: BytesField
+    # not sent: the component class, needed to slice `data` into fields,
+    # and the fields changed since the previous version
+    type: Optional[Type[Observable]] = field(
+        default=None, compare=False, repr=False
+    )
+    changed: int = field(default=0, compare=False, repr=False)
 
     @classmethod
     def from_component(cls, world: World, component: Component):
-        if component.instance._dirty:
+        changed = component.instance._dirty
+        if changed:
             component.version_id += 1
-            component.instance._dirty.clear()
+            component.instance._dirty = 0
         return cls(
             id=component.component_id,
             version=component.version_id,
-            type_id=world.component_types[component.type],
+            type_id=world.component_type_id(component.type),
             data=BytesField(component.pack()),
+            type=component.type,
+            changed=changed,
+        )
+
+    def _resolve_type(self, world: World | None) -> Type[Observable]:
+        if self.type is not None:
+            return self.type
+        if world is None:
+            raise ValueError(f"Type of component {self.id} is unknown")
+        return world.component_type_ids[self.type_id].type
+
+    def get_delta_from(
+        self,
+        snapshot: ComponentSnapshot,
+        world: World | None = None,
+    ) -> ComponentDelta:
+        """Only the fields that differ from `snapshot`, behind a mask."""
+        new, old = self.data.payload, snapshot.data.payload
+        layout = field_layout(self._resolve_type(world))
+        if self.changed and self.version == snapshot.version + 1:
+            # consecutive versions, the dirty mask says what changed
+            mask = self.changed
+        else:
+            mask = 0
+            for _, _, bit, start, end, _ in layout:
+                if new[start:end] != old[start:end]:
+                    mask |= bit
+        return ComponentDelta(
+            id=self.id,
+            version=self.version,
+            mask=VarUInt(mask),
+            data=BytesField(
+                b"".join(
+                    new[start:end]
+                    for _, _, bit, start, end, _ in layout
+                    if mask & bit
+                )
+            ),
+        )
+
+    def apply_delta(
+        self,
+        delta: ComponentDelta,
+        world: World | None = None,
+    ) -> ComponentSnapshot:
+        component_type = self._resolve_type(world)
+        old, changed = self.data.payload, delta.data.payload
+        chunks = []
+        offset = 0
+        for _, _, bit, start, end, _ in field_layout(component_type):
+            if delta.mask & bit:
+                size = end - start
+                chunks.append(changed[offset : offset + size])
+                offset += size
+            else:
+                chunks.append(old[start:end])
+        return ComponentSnapshot(
+            id=self.id,
+            version=delta.version,
+            type_id=self.type_id,
+            data=BytesField(b"".join(chunks)),
+            type=component_type,
         )
 
 
+@dataclass(frozen=True)
+class ComponentDelta(Packable):
+    """
+    Field level update of a component: bit `i` of `mask` is set when the
+    `i`th field changed, `data` holds the changed fields packed in order.
+    """
+
+    id: VarUInt
+    version: UInt16
+    mask: VarUInt
+    data: BytesField
+
+    def unpack_fields(self, component_type: Type[Observable]):
+        values = {}
+        data = self.data.payload
+        offset = 0
+        mask = self.mask
+        for name, field_type, bit, _, _, fmt in field_layout(component_type):
+            if mask & bit:
+                (value,) = fmt.unpack_from(data, offset)
+                values[name] = field_type(value)
+                offset += fmt.size
+        return values
+
+
 @dataclass(frozen=True)
 class EntitySnapshot(Packable):
-    id: UInt16
+    id: VarUInt
     version: UInt16
-    components: Dict[UInt16, ComponentSnapshot] = field(default_factory=dict)
+    components: Dict[VarUInt, ComponentSnapshot] = field(default_factory=dict)
 
     @classmethod
-    def from_entity(cls, world: World, entity: Entity):
+    def from_entity(
+        cls,
+        world: World,
+        entity: Entity,
+        previous: EntitySnapshot | None = None,
+    ):
+        """Components that are clean in `previous` are not packed again."""
         component_snapshots = {}
         dirty = []
+        reusable = previous.components if previous is not None else {}
         for comp_id, component in entity.components.items():
+            if not component.instance._dirty:
+                if (reused := reusable.get(comp_id)) is not None:
+                    component_snapshots[comp_id] = reused
+                    continue
             cversion = component.version_id
             delta = ComponentSnapshot.from_component(world, component)
             dirty.append(cversion != component.version_id)
@@ -59,6 +195,7 @@ class EntitySnapshot(Packable):
     def get_delta_from(
         self,
         snapshot: EntitySnapshot,
+        world: World | None = None,
     ) -> DeltaEntitySnapshot | None:
         """Get delta from snapshot to self"""
         if self.version == snapshot.version:
@@ -73,8 +210,9 @@ class EntitySnapshot(Packable):
 
         for cid in candidates:
             component = self.components[cid]
-            if snapshot.components[cid].version != component.version:
-                updates[cid] = component
+            base = snapshot.components[cid]
+            if base.version != component.version:
+                updates[cid] = component.get_delta_from(base, world)
 
         return DeltaEntitySnapshot(
             base_snapshot=snapshot.version,
@@ -84,17 +222,22 @@ class EntitySnapshot(Packable):
             updates=updates,
         )
 
-    def apply_delta(self, delta: DeltaEntitySnapshot) -> EntitySnapshot:
+    def apply_delta(
+        self,
+        delta: DeltaEntitySnapshot,
+        world: World | None = None,
+    ) -> EntitySnapshot:
         components = {}
         for component in delta.spawns:
             components[component.id] = component
-        for eid, component in self.components.items():
-            if eid in delta.despawns:
+        for cid, component in self.components.items():
+            if cid in delta.despawns:
                 continue
-            elif eid in delta.updates:
-                components[eid] = delta.updates[eid]
+            elif cid in delta.updates:
+                update = delta.updates[cid]
+                components[cid] = component.apply_delta(update, world)
             else:
-                components[eid] = component
+                components[cid] = component
         return EntitySnapshot(
             id=self.id,
             version=delta.target_snapshot,
@@ -105,17 +248,47 @@ class EntitySnapshot(Packable):
 @dataclass(frozen=True)
 class Snapshot(Packable):
     id: UInt16 = field(default_factory=IdGenerator())
-    entities: Dict[UInt16, EntitySnapshot] = field(default_factory=dict)
+    entities: Dict[VarUInt, EntitySnapshot] = field(default_factory=dict)
+    # not sent: what the entities were filtered to, see GridInterest
+    interest: Optional[Hashable] = field(
+        default=None, compare=False, repr=False
+    )
 
     @classmethod
-    def from_world(self, world: World):
-        entities = {}
-        for eid, entity in world.entities.items():
-            entities[eid] = EntitySnapshot.from_entity(self, entity)
-        return Snapshot(entities=entities)
+    def from_world(cls, world: World):
+        """
+        Only entities in `world.dirty_entities` are snapshotted again, the
+        others are carried over from the previous call's snapshot.
+        """
+        previous = world.snapshot_entities
+        if previous is None:
+            entities = {
+                eid: EntitySnapshot.from_entity(world, entity)
+                for eid, entity in world.entities.items()
+            }
+        else:
+            # snapshots are immutable, never update the previous dict
+            entities = dict(previous)
+            for eid in world.dirty_entities:
+                if (entity := world.entities.get(eid)) is None:
+                    entities.pop(eid, None)
+                    continue
+                entities[eid] = EntitySnapshot.from_entity(
+                    world, entity, previous.get(eid)
+                )
+        world.dirty_entities.clear()
+        world.snapshot_entities = entities
+        return cls(id=world.snapshot_ids(), entities=entities)
 
-    def get_delta_from(self, snapshot: Snapshot) -> DeltaSnapshot | None:
-        """Get delta from snapshot to self"""
+    def get_delta_from(
+        self,
+        snapshot: Snapshot,
+        world: World | None = None,
+    ) -> DeltaSnapshot | None:
+        """
+        Get delta from snapshot to self. `world` resolves component types
+        of snapshots that came off the wire.
+        """
         if self.id == snapshot.id:
             return
         from_eids = set(snapshot.entities)
@@ -128,7 +301,7 @@ class Snapshot(Packable):
 
         for eid in candidates:
             entity = snapshot.entities[eid]
-            if delta := self.entities[eid].get_delta_from(entity):
+            if delta := self.entities[eid].get_delta_from(entity, world):
                 updates[eid] = delta
 
         return DeltaSnapshot(
@@ -139,7 +312,11 @@ class Snapshot(Packable):
             updates=updates,
         )
 
-    def apply_delta(self, delta: DeltaSnapshot) -> Snapshot:
+    def apply_delta(
+        self,
+        delta: DeltaSnapshot,
+        world: World | None = None,
+    ) -> Snapshot:
         if delta.base_snapshot < self.id:
             return None
         if delta.base_snapshot != self.id:
@@ -154,7 +331,8 @@ class Snapshot(Packable):
             if eid in delta.despawns:
                 continue
             elif eid in delta.updates:
-                entities[eid] = entity.apply_delta(delta.updates[eid])
+                update = delta.updates[eid]
+                entities[eid] = entity.apply_delta(update, world)
             else:
                 entities[eid] = entity
         return Snapshot(
@@ -168,8 +346,8 @@ class DeltaEntitySnapshot(Packable):
     base_snapshot: UInt16
     target_snapshot: UInt16
     spawns: List[ComponentSnapshot]
-    despawns: List[UInt16]
-    updates: Dict[UInt16, ComponentSnapshot]
+    despawns: List[VarUInt]
+    updates: Dict[VarUInt, ComponentDelta]
 
     def __bool__(self):
         return bool(self.spawns or self.despawns or self.updates)
@@ -180,8 +358,8 @@ class DeltaSnapshot(Packable):
     base_snapshot: UInt16
     target_snapshot: UInt16
     spawns: List[EntitySnapshot]
-    despawns: List[UInt16]
-    updates: Dict[UInt16, DeltaEntitySnapshot]
+    despawns: List[VarUInt]
+    updates: Dict[VarUInt, DeltaEntitySnapshot]
 
     def __bool__(self):
         return bool(self.spawns or self.despawns or self.updates)
@@ -1,9 +1,19 @@
 from __future__ import annotations
-from typing import Dict, Iterable, Type, TYPE_CHECKING
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    Type,
+    TYPE_CHECKING,
+)
 from dataclasses import dataclass, field
-from collections import defaultdict
+from weakref import WeakSet
 
-from ..utils import UInt16
+from .observability import CLOCK
+from ..utils import VarUInt
 
 if TYPE_CHECKING:
     from .entity import Component
@@ -11,67 +21,212 @@ if TYPE_CHECKING:
 
 
 @dataclass(slots=True)
-class ComponentStore:
-    data: Dict[UInt16, Component] = field(default_factory=dict)
-
-    def add(self, eid: UInt16, component: Component) -> None:
-        self.data[eid] = component
-
-    def remove(self, eid: UInt16) -> None:
-        self.data.pop(eid, None)
-
-    def has(self, eid: UInt16) -> bool:
-        return eid in self.data
-
-    def get(self, eid: UInt16) -> Component:
-        return self.data[eid]
-
-    def entities(self) -> Iterable[UInt16]:
-        return self.data.keys()
+class Archetype:
+    """
+    Table of all entities with exactly `types`: one dense column per type,
+    row `i` of every column belongs to `entities[i]`.
+    """
+
+    types: FrozenSet[Type[Observable]]
+    entities: List[VarUInt] = field(default_factory=list)
+    components: Dict[Type[Observable], List[Component]] = field(
+        default_factory=dict
+    )
+    # component.instance, kept alongside so queries skip the attribute
+    instances: Dict[Type[Observable], List[Observable]] = field(
+        default_factory=dict
+    )
 
-    def empty(self):
-        return not bool(self.data)
+    def __post_init__(self):
+        for component_type in self.types:
+            self.components[component_type] = []
+            self.instances[component_type] = []
+
+    def append(self, eid: VarUInt, row: Dict[Type, Component]) -> int:
+        self.entities.append(eid)
+        for component_type, column in self.components.items():
+            component = row[component_type]
+            column.append(component)
+            self.instances[component_type].append(component.instance)
+        return len(self.entities) - 1
+
+    def swap_remove(self, index: int) -> Tuple[Dict[Type, Component], int]:
+        """
+        Remove row `index` by moving the last row into it. Returns the
+        removed row and the index of the moved entity's new row (or -1).
+        """
+        row = {}
+        last = len(self.entities) - 1
+        for component_type, column in self.components.items():
+            instances = self.instances[component_type]
+            row[component_type] = column[index]
+            column[index] = column[last]
+            instances[index] = instances[last]
+            column.pop()
+            instances.pop()
+        self.entities[index] = self.entities[last]
+        self.entities.pop()
+        return row, (index if index != last else -1)
+
+    def __len__(self):
+        return len(self.entities)
+
+
+@dataclass(eq=False)
+class Query:
+    """
+    Entities having all of `types` and `with_` and none of `without`,
+    yielded as `(eid, (instance, ...))` for `types`. The store keeps
+    `archetypes` up to date as tables are created, so running a query only
+    walks its tables.
+
+    With `changed`, only entities where one of those components changed
+    since the previous complete run of this query are yielded (a new
+    component counts as changed). Each query tracks its own last run.
+    """
+
+    types: Tuple[Type[Observable], ...]
+    with_: FrozenSet[Type[Observable]] = frozenset()
+    without: FrozenSet[Type[Observable]] = frozenset()
+    changed: Tuple[Type[Observable], ...] = ()
+    archetypes: List[Archetype] = field(default_factory=list)
+    last_run: int = 0
+
+    def __post_init__(self):
+        self.required = frozenset(self.types) | self.with_ | set(self.changed)
+
+    def matches(self, types: FrozenSet[Type]) -> bool:
+        return self.required <= types and not self.without & types
+
+    def __iter__(self) -> Iterator[Tuple[VarUInt, Tuple[Observable, ...]]]:
+        since = self.last_run
+        for archetype in self.archetypes:
+            if not archetype.entities:
+                continue
+            columns = [archetype.instances[t] for t in self.types]
+            rows = zip(archetype.entities, zip(*columns))
+            if not self.changed:
+                yield from rows
+                continue
+            watched = [archetype.instances[t] for t in self.changed]
+            for row, changes in zip(rows, zip(*watched)):
+                for instance in changes:
+                    if instance._changed > since:
+                        yield row
+                        break
+        # writes made while iterating don't count as changes next time
+        self.last_run = CLOCK.now
 
 
 @dataclass
 class Store:
-    stores: Dict[Type[Observable], ComponentStore] = field(
-        default_factory=lambda: defaultdict(ComponentStore)
+    """
+    Archetype storage: entities live in the table matching their exact set
+    of component types, adding or removing a component moves the entity's
+    row to another table. Queries walk the matching tables' columns in
+    lockstep instead of probing per entity.
+
+    Adding or removing components while iterating `get_components` is not
+    supported.
+    """
+
+    archetypes: Dict[FrozenSet[Type], Archetype] = field(default_factory=dict)
+    # eid -> (archetype, row)
+    locations: Dict[VarUInt, Tuple[Archetype, int]] = field(
+        default_factory=dict
+    )
+    queries: WeakSet[Query] = field(default_factory=WeakSet, repr=False)
+    # plain queries behind get_components, by types
+    _queries: Dict[Tuple[Type, ...], Query] = field(
+        default_factory=dict, repr=False
     )
 
-    def add_component(self, eid: UInt16, component: Component):
-        self.stores[component.type].add(eid, component)
+    def _archetype(self, types: FrozenSet[Type]) -> Archetype:
+        if (archetype := self.archetypes.get(types)) is None:
+            archetype = self.archetypes[types] = Archetype(types)
+            for query in self.queries:
+                if query.matches(types):
+                    query.archetypes.append(archetype)
+        return archetype
+
+    def _take(self, eid: VarUInt) -> Dict[Type, Component]:
+        """Remove `eid`'s row from its table and return it."""
+        if (location := self.locations.pop(eid, None)) is None:
+            return {}
+        archetype, index = location
+        row, moved = archetype.swap_remove(index)
+        if moved >= 0:
+            self.locations[archetype.entities[moved]] = (archetype, moved)
+        return row
+
+    def _place(self, eid: VarUInt, row: Dict[Type, Component]) -> None:
+        if not row:
+            return
+        archetype = self._archetype(frozenset(row))
+        self.locations[eid] = (archetype, archetype.append(eid, row))
+
+    def add_component(self, eid: VarUInt, component: Component):
+        # counts as changed for `changed` queries however old the instance
+        component.instance._changed = CLOCK.tick()
+        location = self.locations.get(eid)
+        if location is not None and component.type in location[0].types:
+            archetype, index = location
+            archetype.components[component.type][index] = component
+            archetype.instances[component.type][index] = component.instance
+            return
+        row = self._take(eid)
+        row[component.type] = component
+        self._place(eid, row)
 
-    def remove_component(self, eid: UInt16, component: Component) -> None:
-        self.stores[component.type].remove(eid)
+    def remove_component(self, eid: VarUInt, component: Component) -> None:
+        location = self.locations.get(eid)
+        if location is None or component.type not in location[0].types:
+            return
+        row = self._take(eid)
+        del row[component.type]
+        self._place(eid, row)
 
-    def purge_enitity(self, eid: UInt16):
-        for store in self.stores:
-            store.data.pop(eid)
+    def purge_entity(self, eid: VarUInt):
+        self._take(eid)
 
     def get_component(
         self,
-        eid: UInt16,
+        eid: VarUInt,
         component_type: Type[Observable],
     ) -> Observable:
-        component = self.stores[component_type].get(eid)
-        return component.instance
+        archetype, index = self.locations[eid]
+        return archetype.instances[component_type][index]
+
+    def query(
+        self,
+        *component_types: Type[Observable],
+        with_: Iterable[Type[Observable]] = (),
+        without: Iterable[Type[Observable]] = (),
+        changed: Iterable[Type[Observable]] = (),
+    ) -> Query:
+        """
+        Register a query, meant to be built once per system and run every
+        tick. The store only holds it weakly.
+        """
+        query = Query(
+            component_types,
+            frozenset(with_),
+            frozenset(without),
+            tuple(changed),
+        )
+        query.archetypes = [
+            archetype
+            for types, archetype in self.archetypes.items()
+            if query.matches(types)
+        ]
+        self.queries.add(query)
+        return query
 
     def get_components(self, *component_types: Type[Observable]):
         if not component_types:
             return
-
-        # map types -> stores; bail if any type unseen
-        stores = [self.stores[t] for t in component_types]
-        if any(s.empty() for s in stores):
-            return
-
-        # choose smallest driving set to minimize probes
-        driving_idx = min(range(len(stores)), key=lambda i: len(stores[i].data))
-        driving = stores[driving_idx]
-        others = [s for i, s in enumerate(stores) if i != driving_idx]
-
-        store_datas = [s.data for s in stores]
-        for eid in driving.entities():
-            if all(eid in s.data for s in others):
-                yield eid, tuple(d[eid].instance for d in store_datas)
+        if (query := self._queries.get(component_types)) is None:
+            query = self._queries[component_types] = self.query(
+                *component_types
+            )
+        yield from query
@@ -1,13 +1,95 @@
-from ..utils import UInt16
+from collections import deque
+from typing import Deque, List
+
+from ..utils import UInt16, VarUInt
+from ..utils.seq import MASK16
+
+INDEX_BITS = 20
+GENERATION_BITS = 12
+INDEX_MASK = (1 << INDEX_BITS) - 1
+GENERATION_MASK = (1 << GENERATION_BITS) - 1
+# the generation takes 0, 4, 8 or 12 bits, the two tag bits say which
+TAG_BITS = 2
+TAG_MASK = (1 << TAG_BITS) - 1
 
 
 class IdGenerator:
     def __init__(self):
-        self.id = UInt16(-1)
+        # last id handed out, a plain int (see utils.seq)
+        self.id = MASK16
 
-    def __call__(self):
-        self.id += 1
-        return self.id
+    def __call__(self) -> UInt16:
+        self.id = (self.id + 1) & MASK16
+        return UInt16(self.id)
 
     def reset(self):
-        self.id = UInt16(-1)
+        self.id = MASK16
+
+
+def make_handle(index: int, generation: int) -> int:
+    tag = (generation.bit_length() + 3) >> 2
+    return ((index << (tag << 2) | generation) << TAG_BITS) | tag
+
+
+def handle_index(handle: int) -> int:
+    return handle >> (TAG_BITS + ((handle & TAG_MASK) << 2))
+
+
+def handle_generation(handle: int) -> int:
+    width = (handle & TAG_MASK) << 2
+    return (handle >> TAG_BITS) & ((1 << width) - 1)
+
+
+class HandleAllocator:
+    """
+    Generational handles, see `make_handle`. Released slots are reused
+    oldest first with their generation bumped, so a stale handle never
+    matches the slot's new owner. A slot whose generation would wrap is
+    retired instead of reused.
+
+    Handles are VarUInts with the generation in the low bits, only as wide
+    as it needs to be: fresh handles below index 4096 and recycled ones
+    below index 256 with a generation under 16 fit in two bytes, as the
+    UInt16 ids they replace did.
+    """
+
+    def __init__(self):
+        # live slots hold their generation, free and retired ones the
+        # complement of the next one so they never match a handle
+        self.generations: List[int] = []
+        self.free: Deque[int] = deque()
+        self.alive = 0
+
+    def __call__(self) -> VarUInt:
+        if self.free:
+            index = self.free.popleft()
+            generation = ~self.generations[index]
+        else:
+            index = len(self.generations)
+            if index > INDEX_MASK:
+                raise RuntimeError("Out of handles")
+            self.generations.append(0)
+            generation = 0
+        self.generations[index] = generation
+        self.alive += 1
+        return VarUInt(make_handle(index, generation))
+
+    def release(self, handle: int) -> None:
+        if not self.is_alive(handle):
+            raise ValueError(f"Handle {handle} is not alive")
+        index = handle_index(handle)
+        generation = handle_generation(handle) + 1
+        self.generations[index] = ~generation
+        self.alive -= 1
+        if generation <= GENERATION_MASK:
+            self.free.append(index)
+
+    def is_alive(self, handle: int) -> bool:
+        index = handle_index(handle)
+        if index >= len(self.generations):
+            return False
+        generation = self.generations[index]
+        return generation >= 0 and make_handle(index, generation) == handle
+
+    def __len__(self) -> int:
+        return self.alive
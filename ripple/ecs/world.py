@@ -1,56 +1,87 @@
 from __future__ import annotations
-from typing import Dict, TYPE_CHECKING
+from typing import Dict, Optional, Set, TYPE_CHECKING
 from dataclasses import dataclass, field
 
 from .entity import Entity
-from .store import Store
-from .utils import IdGenerator
-from ..utils import UInt16
+from .store import Query, Store
+from .utils import HandleAllocator, IdGenerator
+from ..utils import UInt16, VarUInt
 
 if TYPE_CHECKING:
     from .observability import Observable
+    from .snapshot import DeltaSnapshot, EntitySnapshot
 
 
 @dataclass
 class ComponentEntry:
-    id: UInt16 = field(init=False, default_factory=IdGenerator())
+    id: UInt16
     type: Type
 
 
 @dataclass
 class World:
-    entities: Dict[UInt16, Entity] = field(default_factory=dict)
-    store: Store = Store()
+    entities: Dict[VarUInt, Entity] = field(default_factory=dict)
+    store: Store = field(default_factory=Store)
     component_types: Dict[Type, ComponentEntry] = field(default_factory=dict)
     component_type_ids: Dict[UInt16, ComponentEntry] = field(
         default_factory=dict
     )
+    entity_ids: HandleAllocator = field(default_factory=HandleAllocator)
+    component_ids: HandleAllocator = field(default_factory=HandleAllocator)
+    snapshot_ids: IdGenerator = field(default_factory=IdGenerator)
+    # spawned, despawned or changed since the last Snapshot.from_world
+    dirty_entities: Set[VarUInt] = field(default_factory=set)
+    snapshot_entities: Optional[Dict[VarUInt, EntitySnapshot]] = field(
+        default=None, repr=False
+    )
 
     def create_entity(self, *components: Observable) -> Entity:
-        entity = Entity(world=self)
+        entity = Entity(world=self, entity_id=self.entity_ids())
         self.entities[entity.entity_id] = entity
+        self.dirty_entities.add(entity.entity_id)
         entity.add_components(components)
         return entity
 
-    def destroy_entity(self, entity_or_id: Entity | UInt16):
+    def destroy_entity(self, entity_or_id: Entity | VarUInt):
         if isinstance(entity_or_id, Entity):
             entity_or_id = entity_or_id.entity_id
         entity = self.entities.pop(entity_or_id)
-        self.store.purge_entity(entity)
+        self.store.purge_entity(entity.entity_id)
+        self.dirty_entities.add(entity.entity_id)
+        for component_id, component in entity.components.items():
+            component.instance._on_dirty = None
+            # mirrored from a snapshot rather than allocated here
+            if self.component_ids.is_alive(component_id):
+                self.component_ids.release(component_id)
+        if self.entity_ids.is_alive(entity.entity_id):
+            self.entity_ids.release(entity.entity_id)
 
     def get_components(self, *component_types: Type[Observable]):
         yield from self.store.get_components(*component_types)
 
+    def query(self, *component_types: Type[Observable], **filters) -> Query:
+        """See `Store.query`, keep the result around between ticks."""
+        return self.store.query(*component_types, **filters)
+
     def register_component_type(self, component_type):
-        entry = ComponentEntry(component_type)
+        type_id = UInt16(len(self.component_types))
+        entry = ComponentEntry(type_id, component_type)
         self.component_types[component_type] = entry
         self.component_type_ids[entry.id] = entry
+        return entry
+
+    def component_type_id(self, component_type) -> UInt16:
+        """Wire id of `component_type`, registering it on first use."""
+        if (entry := self.component_types.get(component_type)) is None:
+            entry = self.register_component_type(component_type)
+        return entry.id
 
-    def apply_delta(self, delta):
+    def apply_delta(self, delta: DeltaSnapshot):
+        """Mirror a server's world, ids are the server's."""
         for eid, entity_delta in delta.updates.items():
-            self.entities[eid].apply_delta(world, entity_delta)
+            self.entities[eid].apply_delta(entity_delta)
         for eid in delta.despawns:
             self.destroy_entity(eid)
         for entity_snap in delta.spawns:
-            entity = Entity.from_snapshot(world, entity_snap)
+            entity = Entity.from_snapshot(self, entity_snap)
             self.entities[entity.entity_id] = entity
@@ -1,7 +1,15 @@
 from .enums import RecordFlags, RecType, PacketFlags, DisconnectReason
 from .record import HeaderType, RecordHeaderType, RecordType
-from .connection import ConnectionExtension, ConnectionType
+from .connection import (
+    ConnectionExtension,
+    ConnectionType,
+    DispatchingExtension,
+    RecordHandler,
+)
 from .packer import PackerType
+from .compression import CompressorType
+from .clock import ClockType
+from .transport import TransportType
 
 __all__ = [
     "RecordFlags",
@@ -13,5 +21,10 @@ __all__ = [
     "RecordType",
     "ConnectionExtension",
     "ConnectionType",
+    "DispatchingExtension",
+    "RecordHandler",
     "PackerType",
+    "CompressorType",
+    "ClockType",
+    "TransportType",
 ]
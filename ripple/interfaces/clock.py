@@ -0,0 +1,7 @@
+from typing import Protocol
+
+
+class ClockType(Protocol):
+    def now(self) -> float:
+        """Seconds on a monotonic timeline with an arbitrary origin."""
+        ...
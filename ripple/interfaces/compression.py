@@ -0,0 +1,7 @@
+from __future__ import annotations
+from typing import Protocol, Optional
+
+
+class CompressorType(Protocol):
+    def compress(self, payload: bytes) -> Optional[bytes]: ...
+    def decompress(self, payload: bytes) -> bytes: ...
@@ -1,7 +1,12 @@
 from __future__ import annotations
-from typing import Protocol, Optional, List
+from typing import Protocol, Optional, List, Dict, Callable
 
+from .enums import RecType
 from .record import RecordType
+from .clock import ClockType
+
+# Returns True when the record was consumed
+RecordHandler = Callable[[RecordType], bool]
 
 
 class ConnectionExtension(Protocol):
@@ -10,10 +15,26 @@ class ConnectionExtension(Protocol):
     def on_record(self, record: RecordType) -> bool: ...
 
 
+class DispatchingExtension(ConnectionExtension, Protocol):
+    """
+    Extension that declares which record types it handles. The connection
+    only offers it those types, each straight to the declared handler,
+    instead of offering every record to `on_record`.
+    """
+
+    def record_handlers(self) -> Dict[RecType, RecordHandler]: ...
+
+
 class ConnectionType(Protocol):
     mtu: int
+    clock: ClockType
+    # time of the current tick, extensions use it instead of reading a clock
+    now: float
 
-    def send_record(self, record: RecordType) -> None: ...
+    def send_record(self, record: RecordType, urgent: bool = False) -> None: ...
+    def flush(self) -> None: ...
+    def send_probe(self, record: RecordType) -> int: ...
+    def set_mtu(self, mtu: int) -> None: ...
     def recv_record(self) -> Optional[RecordType]: ...
     def recv_all(self) -> List[RecordType]: ...
     def tick(*args, **kwargs) -> None: ...
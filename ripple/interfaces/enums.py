@@ -18,11 +18,17 @@ class RecType(IntEnum):
 
     RESERVED = auto()
 
+    # appended so existing record type numbers stay put on the wire
+    MTU_PROBE = auto()
+    MTU_PROBE_ACK = auto()
+    SNAPSHOT_ACK = auto()
+
 
 class RecordFlags(IntFlag):
     NONE = auto()
     RELIABLE = auto()
     URGENT = auto()
+    COMPRESSED = auto()
 
 
 class PacketFlags(IntFlag):
@@ -30,6 +36,7 @@ class PacketFlags(IntFlag):
     RELIABLE = auto()
     FRAGMENT = auto()
     CONTROL = auto()
+    COMPRESSED = auto()
 
 
 class DisconnectReason(IntEnum):
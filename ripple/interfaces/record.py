@@ -1,9 +1,10 @@
 from __future__ import annotations
-from typing import Protocol, ClassVar, Tuple
+from typing import Protocol, ClassVar, Tuple, Optional
 from typing_extensions import Self
 from io import BytesIO
 
 from .enums import RecType, RecordFlags
+from .compression import CompressorType
 
 
 class PackableType(Protocol):
@@ -26,11 +27,19 @@ class RecordHeaderType(PackableType):
 class RecordType(Protocol):
     TYPE: ClassVar[RecType]
     RELIABLE_BY_DEFAULT: ClassVar[bool]
+    URGENT_BY_DEFAULT: ClassVar[bool]
 
     def flags(self) -> RecordFlags: ...
-    def pack(self) -> bytes: ...
+    def pack(
+        self,
+        compressor: Optional[CompressorType] = None,
+        urgent: bool = False,
+    ) -> bytes: ...
 
     @classmethod
     def unpack(
-        cls, buffer: BytesIO
+        cls,
+        buffer: BytesIO,
+        header: Optional[RecordHeaderType] = None,
+        compressor: Optional[CompressorType] = None,
     ) -> Tuple[Self | RecordType, RecordHeaderType]: ...
@@ -0,0 +1,22 @@
+from __future__ import annotations
+from typing import Protocol, Optional, Tuple, Any
+
+
+class TransportType(Protocol):
+    """What ReliableConnection needs from its endpoint."""
+
+    cfg: Any
+    max_datagram_size: int
+
+    @property
+    def address(self) -> Tuple[str, int]: ...
+    def set_max_datagram_size(self, size: int) -> None: ...
+    def send(
+        self, payload: bytes, addr: Optional[Tuple[str, int]] = None
+    ) -> bool: ...
+    def try_recv(self) -> Optional[Tuple[bytes, Tuple[str, int]]]: ...
+    def tick(
+        self, rx_budget_ms=0.5, tx_budget_ms=0.5, max_rx=64, max_tx=64
+    ) -> None: ...
+    def flush(self, tx_budget_ms=0.5, max_tx=64) -> None: ...
+    def close(self) -> None: ...
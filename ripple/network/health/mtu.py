@@ -0,0 +1,243 @@
+"""
+Datagram Packetization Layer PMTU Discovery (RFC 8899), simplified.
+
+Sizes handled here are full datagram sizes (packet header included); the
+connection budget is derived by subtracting the packet header.
+"""
+
+from enum import Enum, auto
+from typing import Dict, Optional
+
+from ..protocol.headers import PacketHeader, RecordHeader
+from ..protocol.records import MtuProbe, MtuProbeAck
+from ...utils import UInt16, BytesField
+from ...core.clock import DEFAULT_CLOCK
+from ...interfaces import (
+    ClockType,
+    ConnectionType,
+    RecordType,
+    RecordHandler,
+    RecType,
+)
+from ...diagnostics import signals as s
+
+
+# Fixed cost of a probe datagram before padding
+PROBE_OVERHEAD = (
+    PacketHeader.size()
+    + RecordHeader.size()
+    + UInt16._struct_size()
+    + BytesField._fmt_size
+)
+
+# Datagram carrying the connection's default 1200 byte budget
+BASE_MTU = 1200 + PacketHeader.size()
+
+
+class ProbeState(Enum):
+    SEARCHING = auto()
+    COMPLETE = auto()
+
+
+class PathMtuProber:
+    """
+    Binary search between the largest acknowledged probe (`low`) and the
+    smallest size known to fail (`high`), with one probe in flight.
+
+    Once converged the current size is re-validated every `confirm_interval`
+    seconds; if that fails `max_probes` times in a row the path shrank and we
+    drop back to `base_mtu` before searching again. A full search is also
+    restarted every `raise_interval` seconds to pick up larger paths.
+    """
+
+    def __init__(
+        self,
+        base_mtu: int = BASE_MTU,
+        max_mtu: int = 1472,
+        step: int = 16,
+        probe_timeout: float = 0.5,
+        max_probes: int = 3,
+        confirm_interval: float = 30.0,
+        raise_interval: float = 600.0,
+        clock: ClockType = DEFAULT_CLOCK,
+    ):
+        self.max_mtu = max_mtu
+        self.set_base(base_mtu)
+        self.step = step
+        self.probe_timeout = probe_timeout
+        self.max_probes = max_probes
+        self.confirm_interval = confirm_interval
+        self.raise_interval = raise_interval
+        self.clock = clock
+
+        self.state = ProbeState.SEARCHING
+        self._high = max_mtu + 1
+        self._candidate: Optional[int] = max_mtu
+        self._failures = 0
+        self._probe_id = UInt16(-1)
+        self._outstanding: Optional[MtuProbe] = None
+        self._outstanding_size = 0
+        self._sent_at = 0.0
+        self._next_due = 0.0
+        self._search_again_at = 0.0
+
+    def set_base(self, base_mtu: int) -> None:
+        """Start from, and fall back to, `base_mtu` instead."""
+        if base_mtu < PROBE_OVERHEAD or self.max_mtu < base_mtu:
+            raise ValueError("Need PROBE_OVERHEAD <= base_mtu <= max_mtu")
+        self.base_mtu = base_mtu
+        self.mtu = base_mtu
+
+    def _next_candidate(self) -> Optional[int]:
+        if self._high - self.mtu <= self.step:
+            return None
+        return (self.mtu + self._high) // 2
+
+    def _search(self, now: float, high: int):
+        self.state = ProbeState.SEARCHING
+        self._high = high
+        self._failures = 0
+        self._candidate = self._next_candidate()
+        self._next_due = now
+        if self._candidate is None:
+            self._complete(now)
+
+    def _complete(self, now: float):
+        self.state = ProbeState.COMPLETE
+        self._candidate = self.mtu
+        self._next_due = now + self.confirm_interval
+        self._search_again_at = now + self.raise_interval
+
+    def is_due(self, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = self.clock.now()
+        return self._outstanding is None and now >= self._next_due
+
+    def make_probe(self, now: Optional[float] = None) -> MtuProbe:
+        if now is None:
+            now = self.clock.now()
+        if self.state is ProbeState.COMPLETE and now >= self._search_again_at:
+            self._search(now, self.max_mtu + 1)
+        size = self._candidate or self.mtu
+        self._probe_id += 1
+        probe = MtuProbe(
+            id=self._probe_id,
+            padding=BytesField(bytes(size - PROBE_OVERHEAD)),
+        )
+        self._outstanding = probe
+        self._outstanding_size = size
+        self._sent_at = now
+        return probe
+
+    def on_probe_ack(
+        self, ack: MtuProbeAck, now: Optional[float] = None
+    ) -> Optional[int]:
+        """Returns the new mtu if it changed."""
+        if now is None:
+            now = self.clock.now()
+        if self._outstanding is None or ack.id != self._outstanding.id:
+            return None
+        size = self._outstanding_size
+        self._outstanding = None
+        self._failures = 0
+
+        if self.state is ProbeState.COMPLETE:
+            self._next_due = now + self.confirm_interval
+            return None
+
+        previous = self.mtu
+        self.mtu = max(self.mtu, size)
+        self._search(now, self._high)
+        return self.mtu if self.mtu != previous else None
+
+    def on_timeout(self, now: Optional[float] = None) -> Optional[int]:
+        """
+        Expire the outstanding probe if it timed out. Returns the new mtu
+        if the path turned out to be smaller than the current one.
+        """
+        if now is None:
+            now = self.clock.now()
+        if self._outstanding is None:
+            return None
+        if now - self._sent_at < self.probe_timeout:
+            return None
+        size = self._outstanding_size
+        self._outstanding = None
+        self._failures += 1
+        self._next_due = now
+        s.MTU_PROBE_LOST.send(self, size=size, failures=self._failures)
+        if self._failures < self.max_probes:
+            return None
+
+        if self.state is ProbeState.COMPLETE:
+            # black hole: the confirmed size stopped getting through
+            self.mtu = self.base_mtu
+            self._search(now, size)
+            return self.mtu
+
+        self._search(now, size)
+        return None
+
+
+class MtuDiscoveryExtension:
+    """
+    Probes the path and keeps the connection budget in line with it.
+
+    Both peers must run the extension: it answers the other side's probes
+    and raises the local receive buffer so probes up to `max_mtu` fit.
+    Unless `base_mtu` is given, probing starts from the connection's own
+    budget.
+    """
+
+    def __init__(self, **options):
+        self.connection: ConnectionType | None = None
+        self.prober = PathMtuProber(**options)
+        self._seed_base = "base_mtu" not in options
+
+    def init(self, connection: ConnectionType):
+        self.connection = connection
+        self.prober.clock = connection.clock
+        if self._seed_base:
+            self.prober.set_base(connection.mtu + PacketHeader.size())
+        endpoint = getattr(connection, "endpoint", None)
+        if endpoint is not None:
+            size = max(endpoint.max_datagram_size, self.prober.max_mtu)
+            endpoint.set_max_datagram_size(size)
+
+    def _apply(self, mtu: Optional[int]):
+        if mtu is not None and self.connection is not None:
+            self.connection.set_mtu(mtu - PacketHeader.size())
+
+    def on_tick(self):
+        if self.connection is None:
+            raise RuntimeError("Extension not initialised yet")
+
+        now = self.connection.now
+        self._apply(self.prober.on_timeout(now=now))
+        if self.prober.is_due(now=now):
+            probe = self.prober.make_probe(now=now)
+            size = self.connection.send_probe(probe)
+            s.MTU_PROBE_SENT.send(self, probe_id=probe.id, size=size)
+
+    def record_handlers(self) -> Dict[RecType, RecordHandler]:
+        return {
+            RecType.MTU_PROBE: self.on_probe,
+            RecType.MTU_PROBE_ACK: self.on_probe_ack,
+        }
+
+    def on_record(self, record: RecordType) -> bool:
+        handler = self.record_handlers().get(record.TYPE)
+        return handler is not None and handler(record)
+
+    def on_probe(self, probe: MtuProbe) -> bool:
+        if self.connection is None:
+            raise RuntimeError("Extension not initialised yet")
+        size = PROBE_OVERHEAD + len(probe.padding.payload)
+        self.connection.send_record(probe.to_ack(size))
+        return True
+
+    def on_probe_ack(self, ack: MtuProbeAck) -> bool:
+        if self.connection is None:
+            raise RuntimeError("Extension not initialised yet")
+        self._apply(self.prober.on_probe_ack(ack, now=self.connection.now))
+        return True
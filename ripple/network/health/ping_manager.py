@@ -1,72 +1,107 @@
-from typing import Dict
+from typing import Dict, Optional
 
 from ..protocol.records import Ping, Pong
 from ...diagnostics.rto import RtoEstimator, RtpJitter, OnlineStdDev
-from ...utils import monotonic, UInt16, UInt32
-from ...interfaces import ConnectionType
+from ...utils import UInt16, UInt32
+from ...utils.seq import MASK16, MASK32
+from ...core.clock import DEFAULT_CLOCK, to_ms
+from ...core.metrics import Metric, Latency, MetricsRegistry, NULL_METRICS
+from ...interfaces import ClockType, ConnectionType, RecordHandler, RecType
 from ...diagnostics import signals as s
 from ...interfaces import RecordType
 
-HALF_UINT32 = UInt32(-1) / 2
+HALF_UINT32 = MASK32 // 2
 
 
 class PingManager:
+    """
+    Schedules pings and turns pongs into RTT/jitter samples.
+
+    All `now` arguments are wrapping u32 milliseconds, the unit carried by
+    Ping/Pong; when omitted they are read from `clock` via `to_ms`. Ids and
+    timestamps are kept as plain ints, see `utils.seq`.
+    """
+
     def __init__(
         self,
         interval_ms: int = 1000,
         max_outstanding: int = 16,
+        metrics: Optional[MetricsRegistry] = None,
+        clock: ClockType = DEFAULT_CLOCK,
     ):
         self.interval_ms = interval_ms
-        self.ping_id = UInt16(-1)
-        self.next_due_ms = UInt32()
+        self.clock = clock
+        self.ping_id = MASK16
+        self.next_due_ms = 0
+        self._scheduled = False
 
-        self.outstanding: Dict[UInt16, Ping] = {}
+        self.outstanding: Dict[int, Ping] = {}
         self.max_outstanding = max_outstanding
 
         self.rtt = RtoEstimator()
         self.jitter_rtp = RtpJitter()
         self.jitter_std = OnlineStdDev()
+        self.set_metrics(metrics if metrics is not None else NULL_METRICS)
+
+    def set_metrics(self, metrics: MetricsRegistry):
+        self.metrics = metrics
+        self._counts = metrics.counts
+        self._rtt = metrics.latencies[Latency.PING_RTT_MS]
 
-    def _get_next_id(self):
-        self.ping_id += 1
+    def _get_next_id(self) -> int:
+        self.ping_id = (self.ping_id + 1) & MASK16
         return self.ping_id
 
-    @monotonic
-    def is_due(self, now: int) -> bool:
-        now = UInt32(now)
+    def _now_ms(self, now: Optional[int]) -> int:
+        if now is None:
+            now = to_ms(self.clock.now())
+        return int(now) & MASK32
+
+    def is_due(self, now: Optional[int] = None) -> bool:
+        now = self._now_ms(now)
         # wrap-safe
-        is_due = UInt32(now) - self.next_due_ms < HALF_UINT32
+        is_due = (
+            not self._scheduled
+            or (now - self.next_due_ms) & MASK32 < HALF_UINT32
+        )
         is_flooded = len(self.outstanding) >= self.max_outstanding
         return is_due and not is_flooded
 
-    @monotonic
-    def make_ping(self, now: int) -> Ping:
+    def make_ping(self, now: Optional[int] = None) -> Ping:
+        now = self._now_ms(now)
         ping_id = self._get_next_id()
-        ping = Ping(ping_id, UInt32(now))
+        ping = Ping(UInt16(ping_id), UInt32(now))
         self.outstanding[ping_id] = ping
-        self.next_due_ms += self.interval_ms
+        self.next_due_ms = (self.next_due_ms + self.interval_ms) & MASK32
+        # keep the cadence, unless we fell behind by more than an interval
+        ahead = (self.next_due_ms - now) & MASK32
+        if not 0 < ahead <= self.interval_ms:
+            self.next_due_ms = (now + self.interval_ms) & MASK32
+        self._scheduled = True
+        self._counts[Metric.PINGS_SENT] += 1
         return ping
 
     def on_recv_ping(self, ping: Ping) -> Pong:
         return ping.to_pong()
 
-    @monotonic
-    def on_recv_pong(self, pong: Pong, now: int):
-        if (ping := self.outstanding.pop(pong.id, None)) is None:
+    def on_recv_pong(self, pong: Pong, now: Optional[int] = None):
+        if (ping := self.outstanding.pop(int(pong.id), None)) is None:
             return None
 
-        rtt_sample = float(UInt32(now) - UInt32(ping.ms))
+        rtt_sample = float((self._now_ms(now) - ping.ms) & MASK32)
+        self._counts[Metric.PONGS_RECEIVED] += 1
+        self._rtt.record(int(rtt_sample))
 
         self.rtt.note_sample(rtt_sample)
         self.jitter_rtp.note_sample(rtt_sample)
         self.jitter_std.note_sample(rtt_sample)
 
-    @monotonic
-    def prune(self, now: int):
-        now = UInt32(now)
+    def prune(self, now: Optional[int] = None):
+        now = self._now_ms(now)
         for ping_id, ping in list(self.outstanding.items()):
             stale = ping.ms + self.interval_ms
-            if (now - stale) < HALF_UINT32:
+            if (now - stale) & MASK32 < HALF_UINT32:
+                self._counts[Metric.PINGS_LOST] += 1
                 yield self.outstanding.pop(ping_id)
 
 
@@ -77,27 +112,39 @@ class JitterExtension:
 
     def init(self, connection: ConnectionType):
         self.connection = connection
+        self.ping_manager.clock = connection.clock
+        if (metrics := getattr(connection, "metrics", None)) is not None:
+            self.ping_manager.set_metrics(metrics)
 
     def on_tick(self):
         if self.connection is None:
             raise RuntimeError("Extension not initialised yet")
 
-        if self.ping_manager.is_due():
-            self.connection.send_record(ping := self.ping_manager.make_ping())
+        now = to_ms(self.connection.now)
+        if self.ping_manager.is_due(now=now):
+            ping = self.ping_manager.make_ping(now=now)
+            self.connection.send_record(ping)
             s.PING_SENT.send(self, ping=ping)
-        for pruned in self.ping_manager.prune():
+        for pruned in self.ping_manager.prune(now=now):
             s.PING_LOST.send(self, ping=pruned)
 
+    def record_handlers(self) -> Dict[RecType, RecordHandler]:
+        return {RecType.PING: self.on_ping, RecType.PONG: self.on_pong}
+
     def on_record(self, record: RecordType) -> bool:
+        handler = self.record_handlers().get(record.TYPE)
+        return handler is not None and handler(record)
+
+    def on_ping(self, ping: Ping) -> bool:
         if self.connection is None:
             raise RuntimeError("Extension not initialised yet")
+        pong = self.ping_manager.on_recv_ping(ping)
+        self.connection.send_record(pong)
+        s.PONG_SENT.send(self, pong=pong)
+        return True
 
-        if isinstance(record, Pong):
-            self.ping_manager.on_recv_pong(record)
-        elif isinstance(record, Ping):
-            pong = self.ping_manager.on_recv_ping(record)
-            self.connection.send_record(pong)
-            s.PONG_SENT.send(self, pong=pong)
-        else:
-            return False
+    def on_pong(self, pong: Pong) -> bool:
+        if self.connection is None:
+            raise RuntimeError("Extension not initialised yet")
+        self.ping_manager.on_recv_pong(pong, now=to_ms(self.connection.now))
         return True
@@ -9,6 +9,12 @@ from .envelope import (
 )
 from .headers import PacketHeader, PacketFlags, RecordHeader
 from .fragmenter import Fragmenter, Defragmenter
+from .compression import (
+    ZlibCompressor,
+    ZstdCompressor,
+    StreamCompressor,
+    train_dictionary,
+)
 
 __all__ = [
     "Record",
@@ -28,4 +34,8 @@ __all__ = [
     "RecordHeader",
     "Fragmenter",
     "Defragmenter",
+    "ZlibCompressor",
+    "ZstdCompressor",
+    "StreamCompressor",
+    "train_dictionary",
 ]
@@ -5,13 +5,20 @@ from typing import (
     Type,
     Dict,
     Tuple,
+    Optional,
 )
 from typing_extensions import Self
 
 from .headers import RecordHeader
 from ...utils import UInt16, UInt8
 from ...utils.packable import PackableMeta, PackerType
-from ...interfaces import RecordFlags, RecType, RecordType, RecordHeaderType
+from ...interfaces import (
+    RecordFlags,
+    RecType,
+    RecordType,
+    RecordHeaderType,
+    CompressorType,
+)
 
 
 class RecordMeta(PackableMeta):
@@ -30,19 +37,40 @@ class RecordMeta(PackableMeta):
 class Record(metaclass=RecordMeta):
     TYPE: ClassVar[RecType]
     RELIABLE_BY_DEFAULT: ClassVar[bool] = False
+    URGENT_BY_DEFAULT: ClassVar[bool] = False
     _packer: ClassVar[PackerType]
 
     def flags(self) -> RecordFlags:
+        flags = RecordFlags.NONE
         if self.RELIABLE_BY_DEFAULT:
-            return RecordFlags.RELIABLE
-        return RecordFlags.NONE
+            flags = RecordFlags.RELIABLE
+        if self.URGENT_BY_DEFAULT:
+            flags |= RecordFlags.URGENT
+        return flags
+
+    def pack_payload(self) -> bytes:
+        """The record's fields packed, without header or compression."""
+        return self._packer.pack(self)
 
-    def pack(self) -> bytes:
-        payload = self._packer.pack(self)
+    def pack(
+        self,
+        compressor: Optional[CompressorType] = None,
+        urgent: bool = False,
+    ) -> bytes:
+        payload = self.pack_payload()
+        flags = self.flags()
+        if urgent:
+            flags |= RecordFlags.URGENT
+
+        if compressor is not None:
+            compressed = compressor.compress(payload)
+            if compressed is not None:
+                payload = compressed
+                flags |= RecordFlags.COMPRESSED
 
         header = RecordHeader(
             type=UInt8(self.TYPE),
-            flags=UInt8(self.flags()),
+            flags=UInt8(flags),
             length=UInt16(len(payload)),
         )
         return header.pack() + payload
@@ -52,6 +80,7 @@ class Record(metaclass=RecordMeta):
         cls,
         buffer: BytesIO,
         header: RecordHeader | None = None,
+        compressor: Optional[CompressorType] = None,
     ) -> Tuple[Self | RecordType, RecordHeader]:
         if header is None:
             header = RecordHeader.unpack(buffer)
@@ -60,12 +89,18 @@ class Record(metaclass=RecordMeta):
             record_class = cls._registry.get(RecType(int(header.type)))
             if record_class is None:
                 raise KeyError(f"Unknown record type: {header.type}")
-            return record_class.unpack(buffer, header)
+            return record_class.unpack(buffer, header, compressor)
 
         if header.type != cls.TYPE:
             raise ValueError(
                 f"Type mismatch: header={header.type}, class={cls.TYPE}"
             )
 
+        if RecordFlags.COMPRESSED & header.flags:
+            if compressor is None:
+                raise ValueError("Compressed record but no compressor set")
+            payload = buffer.read(int(header.length))
+            buffer = BytesIO(compressor.decompress(payload))
+
         record = cls(**cls._packer.unpack(buffer))
         return record, header
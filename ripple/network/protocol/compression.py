@@ -0,0 +1,267 @@
+import zlib
+import struct
+from collections import Counter, OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from ...utils.seq import seq_newer
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+# Raw deflate, no zlib header/adler32: the record header already frames it
+_WBITS = -15
+# Largest record payload we are willing to inflate
+MAX_DECOMPRESSED_SIZE = 1 << 16
+# Deflate can only reference the last 32KiB of a dictionary
+_WINDOW = 1 << 15
+
+
+def train_dictionary(
+    samples: Iterable[bytes],
+    size: int = 4096,
+    segment: int = 8,
+) -> bytes:
+    """
+    Build a preset dictionary from captured record payloads.
+
+    Counts fixed-size segments across samples (once per sample, so layouts
+    shared by many records win over a single long repetitive one) and
+    concatenates the most common ones. Deflate favours short match
+    distances, so the most frequent segments are placed at the end.
+    """
+    counts: Counter = Counter()
+    for sample in samples:
+        seen = {
+            sample[i : i + segment]
+            for i in range(0, max(len(sample) - segment + 1, 0))
+        }
+        counts.update(seen)
+
+    chosen = []
+    used = 0
+    for chunk, count in counts.most_common():
+        if count < 2 or used + len(chunk) > size:
+            break
+        chosen.append(chunk)
+        used += len(chunk)
+    return b"".join(reversed(chosen))
+
+
+class ZlibCompressor:
+    """
+    Deflate based record compressor with an optional preset dictionary.
+
+    Both peers must be configured with the same dictionary; it is never
+    sent on the wire. Payloads smaller than `threshold`, or that do not
+    shrink, are left untouched (compress returns None).
+    """
+
+    def __init__(
+        self,
+        dictionary: bytes = b"",
+        level: int = 6,
+        threshold: int = 64,
+        max_size: int = MAX_DECOMPRESSED_SIZE,
+    ):
+        self.dictionary = dictionary
+        self.level = level
+        self.threshold = threshold
+        self.max_size = max_size
+        self._zdict = {"zdict": dictionary} if dictionary else {}
+
+    @classmethod
+    def from_samples(cls, samples: Iterable[bytes], size: int = 4096, **kw):
+        return cls(dictionary=train_dictionary(samples, size=size), **kw)
+
+    def compress(self, payload: bytes) -> Optional[bytes]:
+        if len(payload) < self.threshold:
+            return None
+        compressor = zlib.compressobj(
+            self.level, zlib.DEFLATED, _WBITS, **self._zdict
+        )
+        compressed = compressor.compress(payload) + compressor.flush()
+        if len(compressed) >= len(payload):
+            return None
+        return compressed
+
+    def decompress(self, payload: bytes) -> bytes:
+        decompressor = zlib.decompressobj(_WBITS, **self._zdict)
+        data = decompressor.decompress(payload, self.max_size)
+        if decompressor.unconsumed_tail or not decompressor.eof:
+            raise ValueError("Compressed record is corrupt or too large")
+        return data
+
+
+class ZstdCompressor:
+    """
+    Zstandard record compressor, requires the `zstandard` package.
+
+    Dictionaries can be trained with `zstandard.train_dictionary` through
+    `from_samples`, which generally beats the deflate preset dictionary.
+    """
+
+    def __init__(
+        self,
+        dictionary: bytes = b"",
+        level: int = 3,
+        threshold: int = 64,
+        max_size: int = MAX_DECOMPRESSED_SIZE,
+    ):
+        if zstandard is None:
+            raise RuntimeError("ZstdCompressor requires `zstandard`")
+        self.dictionary = dictionary
+        self.threshold = threshold
+        self.max_size = max_size
+
+        zdict = None
+        if dictionary:
+            zdict = zstandard.ZstdCompressionDict(dictionary)
+        self._compressor = zstandard.ZstdCompressor(
+            level=level,
+            dict_data=zdict,
+            write_content_size=False,
+            write_checksum=False,
+            write_dict_id=False,
+        )
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+
+    @classmethod
+    def from_samples(cls, samples: Iterable[bytes], size: int = 4096, **kw):
+        if zstandard is None:
+            raise RuntimeError("ZstdCompressor requires `zstandard`")
+        zdict = zstandard.train_dictionary(size, list(samples))
+        return cls(dictionary=zdict.as_bytes(), **kw)
+
+    def compress(self, payload: bytes) -> Optional[bytes]:
+        if len(payload) < self.threshold:
+            return None
+        compressed = self._compressor.compress(payload)
+        if len(compressed) >= len(payload):
+            return None
+        return compressed
+
+    def decompress(self, payload: bytes) -> bytes:
+        try:
+            return self._decompressor.decompress(
+                payload, max_output_size=self.max_size
+            )
+        except zstandard.ZstdError as e:
+            raise ValueError("Compressed record is corrupt or too large") from e
+
+
+class StreamCompressor:
+    """
+    Per-connection packet compressor that compresses against shared history.
+
+    There is no ordered channel to keep a classic streaming context in sync,
+    so history is anchored on acknowledged reliable packets instead: the
+    sender uses the newest reliable payload the peer has ACKed as the
+    deflate dictionary, and tags the packet with that payload's rid. The
+    receiver keeps the last `history` reliable payloads it has seen, keyed
+    by rid, so it always holds the referenced baseline.
+
+    Unreliable packets are compressed against the same baseline but never
+    extend it, which makes a lost unreliable packet harmless (the context
+    is implicitly reset per packet), while the reliable stream keeps moving
+    its baseline forward as ACKs come in.
+
+    The receiver may have evicted a baseline by the time a packet is
+    retransmitted, so retransmits are compressed on their own again from
+    the payload kept until the packet is acked or given up on.
+    """
+
+    _prefix = struct.Struct("!BH")
+
+    def __init__(
+        self,
+        level: int = 6,
+        threshold: int = 32,
+        history: int = 256,
+        max_size: int = MAX_DECOMPRESSED_SIZE,
+    ):
+        self.level = level
+        self.threshold = threshold
+        self.history = history
+        self.max_size = max_size
+
+        # sender side
+        self._unacked: OrderedDict[int, bytes] = OrderedDict()
+        self._baseline_rid: Optional[int] = None
+        self._baseline: bytes = b""
+
+        # receiver side
+        self._received: OrderedDict[int, bytes] = OrderedDict()
+
+    # ==== Sender side ====
+    def note_sent(self, rid: int, payload: bytes) -> None:
+        self._unacked[rid] = payload
+
+    def forget(self, rid: int) -> None:
+        """`rid` will not be retransmitted any more."""
+        self._unacked.pop(rid, None)
+
+    def note_acked(self, rids: Iterable[int]) -> None:
+        for rid in rids:
+            payload = self._unacked.pop(int(rid), None)
+            if payload is None:
+                continue
+            if self._baseline_rid is None or seq_newer(
+                int(rid), self._baseline_rid
+            ):
+                self._baseline_rid = int(rid)
+                self._baseline = payload[-_WINDOW:]
+
+    def compress(
+        self, payload: bytes, baseline: bool = True
+    ) -> Optional[bytes]:
+        if len(payload) < self.threshold:
+            return None
+        if self._baseline_rid is None or not baseline:
+            prefix = self._prefix.pack(0, 0)
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, _WBITS)
+        else:
+            prefix = self._prefix.pack(1, self._baseline_rid)
+            compressor = zlib.compressobj(
+                self.level, zlib.DEFLATED, _WBITS, zdict=self._baseline
+            )
+        compressed = prefix + compressor.compress(payload) + compressor.flush()
+        if len(compressed) >= len(payload):
+            return None
+        return compressed
+
+    def recompress(self, rid: int) -> Optional[Tuple[bytes, bool]]:
+        """
+        Payload to retransmit `rid` with, compressed without a baseline,
+        and whether it is compressed. None once `rid` is acked or forgotten.
+        """
+        if (payload := self._unacked.get(rid)) is None:
+            return None
+        if (compressed := self.compress(payload, baseline=False)) is None:
+            return payload, False
+        return compressed, True
+
+    # ==== Receiver side ====
+    def note_received(self, rid: int, payload: bytes) -> None:
+        self._received[rid] = payload[-_WINDOW:]
+        self._received.move_to_end(rid)
+        if len(self._received) > self.history:
+            self._received.popitem(last=False)
+
+    def decompress(self, payload: bytes) -> bytes:
+        has_baseline, rid = self._prefix.unpack_from(payload)
+        if has_baseline:
+            baseline = self._received.get(rid)
+            if baseline is None:
+                raise ValueError(f"Unknown compression baseline {rid}")
+            decompressor = zlib.decompressobj(_WBITS, zdict=baseline)
+        else:
+            decompressor = zlib.decompressobj(_WBITS)
+        data = decompressor.decompress(
+            payload[self._prefix.size :], self.max_size
+        )
+        if decompressor.unconsumed_tail or not decompressor.eof:
+            raise ValueError("Compressed packet is corrupt or too large")
+        return data
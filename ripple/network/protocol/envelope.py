@@ -1,9 +1,9 @@
-from typing import List
+from typing import List, Optional
 from dataclasses import dataclass, field
 from io import BytesIO
 
 from .base_record import Record, RecordType
-from ...interfaces import RecordFlags, RecordType
+from ...interfaces import RecordFlags, RecordType, CompressorType
 
 
 class RecordTooLarge(Exception):
@@ -46,16 +46,20 @@ class EnvelopeBuilder:
     """
     Streaming packer that rolls over to a new envelope when budget is exceeded.
     Produces N envelopes and an index describing what was packed where.
+    Records are compressed with `compressor` (if any) before budgeting.
     """
 
     def __init__(
         self,
         budget: int,
+        compressor: Optional[CompressorType] = None,
     ):
         self.budget = budget
+        self.compressor = compressor
         self._current_envelope = Envelope()
         self._envelopes: List[Envelope] = []
         self._index: List[PackedRecord] = []
+        self.pending_bytes = 0
 
     def seal_envelope(self):
         if not self._current_envelope:
@@ -63,8 +67,8 @@ class EnvelopeBuilder:
         self._envelopes.append(self._current_envelope)
         self._current_envelope = Envelope()
 
-    def add(self, record: RecordType):
-        payload = record.pack()
+    def add(self, record: RecordType, urgent: bool = False):
+        payload = record.pack(self.compressor, urgent)
         payload_size = len(payload)
         rollover_size = payload_size + len(self._current_envelope)
         if rollover_size > self.budget:
@@ -73,6 +77,7 @@ class EnvelopeBuilder:
             self.seal_envelope()
 
         self._current_envelope.extend(payload)
+        self.pending_bytes += payload_size
         if RecordFlags.RELIABLE in record.flags():
             self._current_envelope.reliable = True
 
@@ -94,18 +99,19 @@ class EnvelopeBuilder:
         if self._envelopes:
             self._envelopes = []
             self._index = []
+            self.pending_bytes = 0
         return PackResult(envelopes=envelopes, index=index)
 
 
 class EnvelopeOpener:
-    def __init__(self):
-        pass
+    def __init__(self, compressor: Optional[CompressorType] = None):
+        self.compressor = compressor
 
     def unpack(self, payload: BytesIO) -> List[RecordType]:
         buffer_size = len(payload.getvalue())
         records = []
 
         while payload.tell() < buffer_size:
-            record, _ = Record.unpack(payload)
+            record, _ = Record.unpack(payload, compressor=self.compressor)
             records.append(record)
         return records
@@ -3,7 +3,10 @@ from typing import List, Dict, Optional
 from dataclasses import dataclass, field
 from io import BytesIO
 
-from ...utils import monotonic, UInt8, UInt16, UInt32
+from ...utils import UInt8, UInt16, UInt32
+from ...core.clock import DEFAULT_CLOCK
+from ...core.metrics import Metric, MetricsRegistry, NULL_METRICS
+from ...interfaces import ClockType
 from .headers import FragmentHeader
 
 
@@ -15,11 +18,14 @@ class Fragment:
 
 class Fragmenter:
     def __init__(self, mtu: int):
-        self.mtu = mtu
-        self.fragment_size = mtu - FragmentHeader.size()
+        self.set_mtu(mtu)
         self._msg_id = UInt16(0)
         self._fragments: List[Fragment] = []
 
+    def set_mtu(self, mtu: int):
+        self.mtu = mtu
+        self.fragment_size = mtu - FragmentHeader.size()
+
     def _get_msg_id(self):
         msg_id = self._msg_id
         self._msg_id = self._msg_id + 1
@@ -67,8 +73,7 @@ class Fragmenter:
 
 
 class FragmentBucket:
-    @monotonic
-    def __init__(self, now):
+    def __init__(self, now: float):
         self.fragments: List[bytes] = []
         self.crc32 = UInt32(0)
         self.created_at = now
@@ -99,17 +104,26 @@ class FragmentBucket:
 
 
 class Defragmenter:
-    def __init__(self, capacity: int = 128, ttl: float = 5.0):
+    def __init__(
+        self,
+        capacity: int = 128,
+        ttl: float = 5.0,
+        metrics: Optional[MetricsRegistry] = None,
+        clock: ClockType = DEFAULT_CLOCK,
+    ):
         self.capacity = capacity
         self.ttl = ttl
+        self.clock = clock
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._counts = self.metrics.counts
         self._buckets: Dict[UInt16, FragmentBucket] = {}
         self._reconstructed: List[bytes] = []
 
-    @monotonic
-    def _expire(self, now):
-        for idx, bucket in self._buckets.items():
+    def _expire(self, now: float):
+        for idx, bucket in list(self._buckets.items()):
             if now - bucket.created_at > self.ttl:
                 self._buckets.pop(idx)
+                self._counts[Metric.FRAGMENTS_EXPIRED] += 1
 
     def _evict(self):
         if len(self._buckets) <= self.capacity:
@@ -119,14 +133,20 @@ class Defragmenter:
             key=lambda kv: kv[1].created_at,
         )
         self._buckets.pop(oldest_key, None)
+        self._counts[Metric.FRAGMENTS_EVICTED] += 1
 
-    def register_fragment(self, fragment: BytesIO) -> Optional[bytes]:
-        self._expire()
+    def register_fragment(
+        self, fragment: BytesIO, now: Optional[float] = None
+    ) -> Optional[bytes]:
+        if now is None:
+            now = self.clock.now()
+        self._expire(now)
 
         header = FragmentHeader.unpack(fragment)
+        self._counts[Metric.FRAGMENTS_RECEIVED] += 1
         bucket = self._buckets.get(header.msg_id)
         if bucket is None:
-            bucket = FragmentBucket()
+            bucket = FragmentBucket(now)
             self._buckets[header.msg_id] = bucket
             self._evict()
 
@@ -134,6 +154,7 @@ class Defragmenter:
         if bucket.can_reconstruct:
             self._buckets.pop(header.msg_id)
             self._reconstructed.append(bucket.reconstruct())
+            self._counts[Metric.FRAGMENTS_REASSEMBLED] += 1
 
     def finish(self) -> List[bytes]:
         if self._reconstructed:
@@ -1,11 +1,12 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import ClassVar
+from dataclasses import dataclass, field
+from typing import ClassVar, List, Optional
 
 from .base_record import Record, RecType
 from ...utils import UInt8, UInt16, UInt32
 from ...interfaces import DisconnectReason
 from ...utils.packable import BytesField
+from ...utils.seq import MASK16
 from ...ecs.snapshot import DeltaSnapshot, Snapshot
 
 
@@ -55,18 +56,20 @@ class Disconnect(Record):
 @dataclass(slots=True)
 class Ack(Record):
     TYPE: ClassVar[RecType] = RecType.ACK
+    # held acks inflate the peer's RTT estimate
+    URGENT_BY_DEFAULT = True
 
     ack_base: UInt16 = UInt16(0)
     mask: UInt16 = UInt16(0)
 
-    def expand_to_seqs(self):
-        out = [self.ack_base]
-        mask = self.mask
+    def expand_to_seqs(self) -> List[int]:
+        base = int(self.ack_base)
+        out = [base]
+        mask = int(self.mask)
         bit = 1
         while mask:
             if mask & 1:
-                seq = self.ack_base - bit
-                out.append(seq)
+                out.append((base - bit) & MASK16)
             mask >>= 1
             bit += 1
         return out
@@ -75,6 +78,8 @@ class Ack(Record):
 @dataclass(slots=True)
 class Ping(Record):
     TYPE: ClassVar[RecType] = RecType.PING
+    # pings and pongs time the round trip, never hold them back
+    URGENT_BY_DEFAULT = True
     id: UInt16
     ms: UInt32
 
@@ -89,10 +94,21 @@ class Pong(Ping):
 
 @dataclass(slots=True)
 class Delta(Record):
+    """
+    Unreliable: it is encoded against the newest snapshot the peer acked, a
+    lost one is superseded by the next tick's. Packed once, however many
+    connections it is sent on.
+    """
+
     TYPE: ClassVar[RecType] = RecType.DELTA
-    RELIABLE_BY_DEFAULT = True
 
     snapshot: DeltaSnapshot
+    payload: Optional[bytes] = field(default=None, compare=False, repr=False)
+
+    def pack_payload(self) -> bytes:
+        if self.payload is None:
+            self.payload = self._packer.pack(self)
+        return self.payload
 
 
 @dataclass(slots=True)
@@ -103,6 +119,15 @@ class Snapshot(Record):
     snapshot: Snapshot
 
 
+@dataclass(slots=True)
+class SnapshotAck(Record):
+    """Newest snapshot the client holds, baseline for the next Delta."""
+
+    TYPE: ClassVar[RecType] = RecType.SNAPSHOT_ACK
+
+    snapshot_id: UInt16
+
+
 @dataclass(slots=True)
 class Input(Record):
     TYPE: ClassVar[RecType] = RecType.INPUT
@@ -111,3 +136,24 @@ class Input(Record):
     key: UInt16
     modifiers: UInt8
     up_down: UInt8
+
+
+@dataclass(slots=True)
+class MtuProbe(Record):
+    TYPE: ClassVar[RecType] = RecType.MTU_PROBE
+
+    id: UInt16
+    padding: BytesField
+
+    def to_ack(self, size: int) -> MtuProbeAck:
+        return MtuProbeAck(id=self.id, size=UInt16(size))
+
+
+@dataclass(slots=True)
+class MtuProbeAck(Record):
+    TYPE: ClassVar[RecType] = RecType.MTU_PROBE_ACK
+    # the prober gives up on probes not acked within its timeout
+    URGENT_BY_DEFAULT = True
+
+    id: UInt16
+    size: UInt16
@@ -0,0 +1,345 @@
+"""
+Lossy link simulation, in-process or over loopback.
+
+    clock = SimulatedClock()
+    network = SimulatedNetwork(clock, seed=1)
+    network.link(server_addr, client_addr, LinkConfig(latency_ms=40, loss=0.02))
+    server = ReliableConnection(
+        server_cfg, clock=clock, endpoint_factory=network.endpoint
+    )
+
+`SimulatedEndpoint` replaces the socket entirely, `ImpairedUdpEndpoint`
+keeps a real UDP socket and only delays or drops datagrams before they
+are sent, for when the peer lives in another process.
+"""
+
+import heapq
+import itertools
+import random
+from dataclasses import dataclass
+from enum import Enum, auto
+from typing import Dict, List, Optional, Tuple
+
+from .transport import UdpEndpoint
+from ..core.clock import DEFAULT_CLOCK
+from ..core.metrics import Metric, MetricsRegistry, NULL_METRICS
+from ..core.models import Address, UdpEndpointConfig
+from ..interfaces import ClockType
+from ..utils.ringbuffer import RingBuffer
+
+
+class Distribution(Enum):
+    CONSTANT = auto()
+    UNIFORM = auto()
+    NORMAL = auto()
+    PARETO = auto()
+
+
+@dataclass
+class GilbertElliott:
+    """Two state burst loss model; the chain moves once per packet."""
+
+    p_good_to_bad: float = 0.01
+    p_bad_to_good: float = 0.3
+    loss_good: float = 0.0
+    loss_bad: float = 0.5
+
+
+@dataclass
+class LinkConfig:
+    latency_ms: float = 0.0
+    # spread around latency_ms, meaning depends on `distribution`
+    jitter_ms: float = 0.0
+    distribution: Distribution = Distribution.UNIFORM
+    # Bernoulli loss, applied on top of `bursts`
+    loss: float = 0.0
+    bursts: Optional[GilbertElliott] = None
+    # probability that a packet is held back by an extra `reorder_ms`
+    reorder: float = 0.0
+    reorder_ms: float = 10.0
+    duplicate: float = 0.0
+    # serialisation rate; packets queue behind each other once exceeded
+    bandwidth_bps: Optional[int] = None
+    # tail drop once the bandwidth queue holds more than this much delay
+    queue_ms: float = 100.0
+    # larger datagrams are silently dropped, like a path MTU with DF set
+    mtu: Optional[int] = None
+
+
+@dataclass
+class LinkStats:
+    sent: int = 0
+    delivered: int = 0
+    lost: int = 0
+    queue_dropped: int = 0
+    mtu_dropped: int = 0
+    duplicated: int = 0
+    reordered: int = 0
+
+
+class Link:
+    """One direction of a simulated path."""
+
+    def __init__(self, config: LinkConfig, rng: random.Random):
+        self.config = config
+        self.rng = rng
+        self.stats = LinkStats()
+        self._bad = False
+        self._busy_until = 0.0
+
+    def _lost(self) -> bool:
+        cfg = self.config
+        if (bursts := cfg.bursts) is not None:
+            if self._bad:
+                self._bad = self.rng.random() >= bursts.p_bad_to_good
+            else:
+                self._bad = self.rng.random() < bursts.p_good_to_bad
+            loss = bursts.loss_bad if self._bad else bursts.loss_good
+            if loss and self.rng.random() < loss:
+                return True
+        return bool(cfg.loss) and self.rng.random() < cfg.loss
+
+    def _delay(self) -> float:
+        cfg = self.config
+        latency, jitter = cfg.latency_ms, cfg.jitter_ms
+        if jitter and cfg.distribution is Distribution.UNIFORM:
+            latency += self.rng.uniform(-jitter, jitter)
+        elif jitter and cfg.distribution is Distribution.NORMAL:
+            latency += self.rng.gauss(0.0, jitter)
+        elif jitter and cfg.distribution is Distribution.PARETO:
+            # heavy tail, only ever adds delay
+            latency += jitter * (self.rng.paretovariate(2.5) - 1.0)
+        if cfg.reorder and self.rng.random() < cfg.reorder:
+            self.stats.reordered += 1
+            latency += cfg.reorder_ms
+        return max(latency, 0.0) / 1000.0
+
+    def schedule(self, size: int, now: float) -> List[float]:
+        """Delivery times for a datagram sent at `now`, empty if dropped."""
+        cfg = self.config
+        self.stats.sent += 1
+        if cfg.mtu is not None and size > cfg.mtu:
+            self.stats.mtu_dropped += 1
+            return []
+
+        departs = now
+        if cfg.bandwidth_bps:
+            start = max(now, self._busy_until)
+            if start - now > cfg.queue_ms / 1000.0:
+                self.stats.queue_dropped += 1
+                return []
+            self._busy_until = start + size * 8 / cfg.bandwidth_bps
+            departs = self._busy_until
+
+        if self._lost():
+            self.stats.lost += 1
+            return []
+
+        deliveries = [departs + self._delay()]
+        if cfg.duplicate and self.rng.random() < cfg.duplicate:
+            self.stats.duplicated += 1
+            deliveries.append(departs + self._delay())
+        self.stats.delivered += len(deliveries)
+        return deliveries
+
+
+Route = Tuple[Tuple[str, int], Tuple[str, int]]
+
+
+class SimulatedNetwork:
+    """
+    Delivers datagrams between `SimulatedEndpoint`s in-process, driven by
+    `clock`. Paths without a configured link are perfect.
+    """
+
+    def __init__(self, clock: ClockType = DEFAULT_CLOCK, seed: int = 0):
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.default = LinkConfig()
+        self.links: Dict[Route, Link] = {}
+        self.endpoints: Dict[Tuple[str, int], "SimulatedEndpoint"] = {}
+        self._in_flight: List[tuple] = []
+        self._order = itertools.count()
+
+    def link(
+        self,
+        a: Address,
+        b: Address,
+        config: LinkConfig,
+        reverse: Optional[LinkConfig] = None,
+    ) -> Tuple[Link, Link]:
+        """Impair a -> b with `config` and b -> a with `reverse` (or same)."""
+        forward = Link(config, random.Random(self.rng.random()))
+        backward = Link(reverse or config, random.Random(self.rng.random()))
+        self.links[(a.bind_address, b.bind_address)] = forward
+        self.links[(b.bind_address, a.bind_address)] = backward
+        return forward, backward
+
+    def _link_for(self, route: Route) -> Link:
+        if (link := self.links.get(route)) is None:
+            link = Link(self.default, random.Random(self.rng.random()))
+            self.links[route] = link
+        return link
+
+    def endpoint(
+        self,
+        cfg: UdpEndpointConfig,
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> "SimulatedEndpoint":
+        """Usable as ReliableConnection.endpoint_factory."""
+        return SimulatedEndpoint(self, cfg, metrics=metrics)
+
+    def transmit(
+        self, src: Tuple[str, int], dst: Tuple[str, int], payload: bytes
+    ) -> None:
+        now = self.clock.now()
+        for deliver_at in self._link_for((src, dst)).schedule(
+            len(payload), now
+        ):
+            heapq.heappush(
+                self._in_flight,
+                (deliver_at, next(self._order), dst, src, payload),
+            )
+
+    def deliver(self) -> int:
+        """Hand every datagram that is due to its endpoint."""
+        now = self.clock.now()
+        delivered = 0
+        in_flight = self._in_flight
+        while in_flight and in_flight[0][0] <= now:
+            _, _, dst, src, payload = heapq.heappop(in_flight)
+            if (endpoint := self.endpoints.get(dst)) is not None:
+                endpoint._receive(payload, src)
+                delivered += 1
+        return delivered
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+
+class SimulatedEndpoint:
+    """In-process stand-in for UdpEndpoint attached to a SimulatedNetwork."""
+
+    def __init__(
+        self,
+        network: SimulatedNetwork,
+        cfg: UdpEndpointConfig,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.network = network
+        self.cfg = cfg
+        self.max_datagram_size = cfg.rx.max_size
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._counts = self.metrics.counts
+        self.rx_queue = RingBuffer(
+            "rx",
+            cfg.rx.capacity,
+            cfg.rx.drop_policy,
+            metrics=self.metrics,
+            drop_metric=Metric.RX_DROPPED,
+        )
+        self.tx_queue = RingBuffer(
+            "tx",
+            cfg.tx.capacity,
+            cfg.tx.drop_policy,
+            metrics=self.metrics,
+            drop_metric=Metric.TX_DROPPED,
+        )
+        if self.address in network.endpoints:
+            raise OSError(f"Address {self.address} already in use")
+        network.endpoints[self.address] = self
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.cfg.local_addr.bind_address
+
+    def set_max_datagram_size(self, size: int):
+        self.max_datagram_size = size
+
+    def send(self, payload: bytes, addr: Optional[Tuple[str, int]] = None):
+        return self.tx_queue.push((payload, addr))
+
+    def try_recv(self):
+        return self.rx_queue.pop()
+
+    def _receive(self, payload: bytes, src: Tuple[str, int]):
+        # recvfrom truncates datagrams larger than the buffer
+        payload = payload[: self.max_datagram_size]
+        self._counts[Metric.PACKETS_RECEIVED] += 1
+        self._counts[Metric.BYTES_RECEIVED] += len(payload)
+        self.rx_queue.push((payload, src))
+
+    def tick(self, rx_budget_ms=0.5, tx_budget_ms=0.5, max_rx=64, max_tx=64):
+        self.network.deliver()
+        self.flush(max_tx=max_tx)
+
+    def flush(self, tx_budget_ms=0.5, max_tx=64):
+        for _ in range(max_tx):
+            if (item := self.tx_queue.pop()) is None:
+                break
+            payload, addr = item
+            if addr is None:
+                if self.cfg.remote_addr is None:
+                    raise OSError("Destination address required")
+                addr = self.cfg.remote_addr.bind_address
+            self._counts[Metric.PACKETS_SENT] += 1
+            self._counts[Metric.BYTES_SENT] += len(payload)
+            self.network.transmit(self.address, addr, payload)
+
+    def close(self):
+        self.network.endpoints.pop(self.address, None)
+
+    def __repr__(self):
+        return (
+            f"<SimulatedEndpoint local={self.cfg.local_addr} "
+            f"remote={self.cfg.remote_addr}>"
+        )
+
+
+class ImpairedUdpEndpoint(UdpEndpoint):
+    """
+    Real UDP endpoint whose outgoing datagrams go through a `Link` first,
+    for impairing traffic to a peer in another process over loopback.
+    """
+
+    def __init__(
+        self,
+        cfg: UdpEndpointConfig,
+        link: LinkConfig,
+        clock: ClockType = DEFAULT_CLOCK,
+        seed: int = 0,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        super().__init__(cfg, metrics=metrics)
+        self.clock = clock
+        self.link = Link(link, random.Random(seed))
+        self._held: List[tuple] = []
+        self._order = itertools.count()
+        # the base class may have bound a quiet tick on the instance
+        self._base_tick = self.tick
+        self.tick = self._impaired_tick
+
+    def send(self, payload: bytes, addr: Optional[Tuple[str, int]] = None):
+        now = self.clock.now()
+        for deliver_at in self.link.schedule(len(payload), now):
+            heapq.heappush(
+                self._held, (deliver_at, next(self._order), payload, addr)
+            )
+        return True
+
+    def _release(self):
+        now = self.clock.now()
+        while self._held and self._held[0][0] <= now:
+            _, _, payload, addr = heapq.heappop(self._held)
+            super().send(payload, addr)
+
+    def _impaired_tick(
+        self, rx_budget_ms=0.5, tx_budget_ms=0.5, max_rx=64, max_tx=64
+    ):
+        self._release()
+        self._base_tick(rx_budget_ms, tx_budget_ms, max_rx, max_tx)
+
+    def flush(self, tx_budget_ms=0.5, max_tx=64):
+        self._release()
+        super().flush(tx_budget_ms, max_tx)
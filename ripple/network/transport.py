@@ -1,20 +1,45 @@
+import errno
 import socket
 import select
 import time
 from typing import Optional, Tuple
 
 from ..utils.ringbuffer import RingBuffer
-from ..core.metrics import Event, Timer
+from ..core.metrics import Event, Timer, Metric, MetricsRegistry, NULL_METRICS
 from ..core.models import UdpEndpointConfig
 from ..diagnostics import signals as s
+from ..diagnostics.capture import CaptureWriter, Direction
 
 
 class UdpEndpoint:
-    def __init__(self, cfg: UdpEndpointConfig):
+    def __init__(
+        self,
+        cfg: UdpEndpointConfig,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
         self.cfg = cfg
+        self.max_datagram_size = cfg.rx.max_size
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._counts = self.metrics.counts
+        self.capture: Optional[CaptureWriter] = None
         self.sock = self._open_socket()
-        self.rx_queue = RingBuffer("rx", cfg.rx.capacity, cfg.rx.drop_policy)
-        self.tx_queue = RingBuffer("tx", cfg.tx.capacity, cfg.tx.drop_policy)
+        self.rx_queue = RingBuffer(
+            "rx",
+            cfg.rx.capacity,
+            cfg.rx.drop_policy,
+            metrics=self.metrics,
+            drop_metric=Metric.RX_DROPPED,
+        )
+        self.tx_queue = RingBuffer(
+            "tx",
+            cfg.tx.capacity,
+            cfg.tx.drop_policy,
+            metrics=self.metrics,
+            drop_metric=Metric.TX_DROPPED,
+        )
+        if not s.enabled():
+            self.tick = self._tick_quiet
+            self._drain = self._drain_quiet
 
     @property
     def address(self):
@@ -33,6 +58,20 @@ class UdpEndpoint:
 
         return sock
 
+    def set_max_datagram_size(self, size: int):
+        """Size of the receive buffer handed to recvfrom."""
+        self.max_datagram_size = size
+
+    def start_capture(self, writer: CaptureWriter):
+        """Record every datagram sent or received to `writer`."""
+        self.capture = writer
+
+    def stop_capture(self) -> Optional[CaptureWriter]:
+        writer, self.capture = self.capture, None
+        if writer is not None:
+            writer.flush()
+        return writer
+
     def send(self, payload: bytes, addr: Optional[Tuple[str, int]] = None):
         return self.tx_queue.push((payload, addr))
 
@@ -45,6 +84,16 @@ class UdpEndpoint:
         self._drain("tx", max_tx, tx_budget_ms, self._tx)
         s.TICK_EVENT.send(event=Event.TICK_TIME, delta=timer.delta())
 
+    def _tick_quiet(
+        self, rx_budget_ms=0.5, tx_budget_ms=0.5, max_rx=64, max_tx=64
+    ):
+        self._drain("rx", max_rx, rx_budget_ms, self._rx)
+        self._drain("tx", max_tx, tx_budget_ms, self._tx)
+
+    def flush(self, tx_budget_ms=0.5, max_tx=64):
+        """Push queued datagrams to the socket without waiting for a tick."""
+        self._drain("tx", max_tx, tx_budget_ms, self._tx)
+
     def _drain(self, name, max_msg, budget, drainer):
         timer = Timer()
         deadline = timer.start + budget / 1000.0
@@ -60,14 +109,24 @@ class UdpEndpoint:
             buffer_name=name, event=Event.DRAIN_TIME, time=timer.delta()
         )
 
+    def _drain_quiet(self, name, max_msg, budget, drainer):
+        deadline = time.perf_counter() + budget / 1000.0
+        x = 0
+        while x < max_msg and time.perf_counter() < deadline and drainer():
+            x += 1
+
     def _rx(self):
         r, _, _ = select.select([self.sock], [], [], 0)
         if not r:
             return False
         try:
-            data, addr = self.sock.recvfrom(self.cfg.rx.max_size)
+            data, addr = self.sock.recvfrom(self.max_datagram_size)
         except BlockingIOError:
             return False
+        self._counts[Metric.PACKETS_RECEIVED] += 1
+        self._counts[Metric.BYTES_RECEIVED] += len(data)
+        if self.capture is not None:
+            self.capture.write(Direction.RX, data)
         self.rx_queue.push((data, addr))
         return True
 
@@ -81,11 +140,25 @@ class UdpEndpoint:
             else:
                 self.sock.send(payload)
         except BlockingIOError:
+            self._counts[Metric.SEND_ERRORS] += 1
             self.tx_queue.emit(Event.DEQUEUE_DROPPED)
             return False
+        except OSError as e:
+            if e.errno != errno.EMSGSIZE:
+                raise
+            # Larger than the path MTU with DF set, e.g. a failed MTU probe
+            self._counts[Metric.SEND_ERRORS] += 1
+            self.tx_queue.emit(Event.DEQUEUE_DROPPED)
+            return True
+        self._counts[Metric.PACKETS_SENT] += 1
+        self._counts[Metric.BYTES_SENT] += len(payload)
+        if self.capture is not None:
+            self.capture.write(Direction.TX, payload)
         return True
 
     def close(self):
+        if self.capture is not None:
+            self.stop_capture().close()
         self.sock.close()
 
     def __repr__(self):
@@ -1,21 +1,7 @@
-from dataclasses import dataclass
-
 from ..utils import UInt16
+from ..utils.seq import MASK16, seq_distance, seq_lt
 from ..network.protocol import Ack
 
-MAX16 = 1 << 16
-HALF16 = 1 << 15
-
-
-def seq_lt(a: UInt16, b: UInt16) -> bool:
-    return (a - b) > HALF16
-    # return ((a - b) & 0xFFFF) > HALF16
-
-
-def seq_distance(newer: UInt16, older: UInt16) -> UInt16:
-    """Unsigned distance from older -> newer in [0, 65535]."""
-    return (newer - older) & 0xFFFF
-
 
 class AckMask:
     """
@@ -33,13 +19,14 @@ class AckMask:
 
         self.capacity = capacity_bits
         self.capacity_mask = (1 << self.capacity) - 1
-        self.base_seq = UInt16(0)
+        # plain ints, see utils.seq
+        self.base_seq = 0
         # LSB-first window
-        self.bitmap = UInt16(0)
+        self.bitmap = 0
         self.initialised = False
 
     def note_recv(self, seq: int | UInt16) -> None:
-        seq = UInt16(seq)
+        seq = int(seq) & MASK16
         if not self.initialised:
             self.base_seq = seq
             self.initialised = True
@@ -57,13 +44,13 @@ class AckMask:
             distance = seq_distance(self.base_seq, seq)
             self._mark_received(distance - 1)
 
-    def _slide_forward(self, seq: UInt16, distance: UInt16) -> None:
+    def _slide_forward(self, seq: int, distance: int) -> None:
         # slide the bitmap mask => e.g. 0b1101
         # With a distance of 2, the window will slide to 0b110100
         self.bitmap = (self.bitmap << distance) & self.capacity_mask
         self.base_seq = seq
 
-    def _mark_received(self, distance: UInt16) -> None:
+    def _mark_received(self, distance: int) -> None:
         # seq < base; set a bit behind the base if in range
         if 0 <= distance < self.capacity:
             self.bitmap |= 1 << distance
@@ -71,7 +58,4 @@ class AckMask:
     def to_ack_record(self, max_bytes: int = 8) -> Ack:
         nbits = min(self.capacity, max_bytes * 8)
         mask = self.bitmap & ((1 << nbits) - 1)
-        return Ack(
-            ack_base=max(UInt16(0), self.base_seq),
-            mask=UInt16(mask),
-        )
+        return Ack(ack_base=UInt16(self.base_seq), mask=UInt16(mask))
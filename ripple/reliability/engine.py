@@ -3,7 +3,9 @@ from typing import Optional
 from .ackmask import AckMask
 from .resend_queue import ResendQueue
 from ..network.protocol import Ack
-from ..utils import monotonic
+from ..core.clock import DEFAULT_CLOCK
+from ..core.metrics import MetricsRegistry
+from ..interfaces import ClockType
 
 
 class ReliabilityEngine:
@@ -15,9 +17,14 @@ class ReliabilityEngine:
       in your transport loop (not included here).
     """
 
-    def __init__(self, ack_bits: int = 64):
+    def __init__(
+        self,
+        ack_bits: int = 64,
+        metrics: Optional[MetricsRegistry] = None,
+        clock: ClockType = DEFAULT_CLOCK,
+    ):
         self.rx = AckMask(capacity_bits=ack_bits)
-        self.tx = ResendQueue()
+        self.tx = ResendQueue(metrics=metrics, clock=clock)
         self._pending_ack_dirty = False
 
     # ==== Receiver side ====
@@ -32,19 +39,19 @@ class ReliabilityEngine:
         return self.rx.to_ack_record(max_bytes=max_bytes)
 
     # ==== Sender side ====
-    @monotonic
-    def note_sent(self, seq: int, payload: bytes, now: float) -> None:
+    def note_sent(
+        self, seq: int, payload: bytes, now: Optional[float] = None
+    ) -> None:
         self.tx.on_send(seq, payload, now=now)
 
-    @monotonic
-    def note_ack_record(self, rec: Ack, now: float) -> None:
+    def note_ack_record(self, rec: Ack, now: Optional[float] = None) -> None:
         seqs = rec.expand_to_seqs()
         self.tx.on_acked(seqs, now=now)
 
-    @monotonic
-    def due_retransmits(self, now: float):
+    def due_retransmits(self, now: Optional[float] = None):
         yield from self.tx.due_timeouts(now=now)
 
-    @monotonic
-    def on_retransmit(self, seq: int, now: float) -> Optional[bytes]:
+    def on_retransmit(
+        self, seq: int, now: Optional[float] = None
+    ) -> Optional[bytes]:
         return self.tx.on_retransmit(seq, now=now)
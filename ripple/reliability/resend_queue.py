@@ -1,7 +1,10 @@
 from dataclasses import dataclass
 from typing import Dict, Iterable, Optional
 from ..diagnostics.rto import RtoEstimator
-from ..utils import clamp, monotonic
+from ..core.metrics import Metric, Latency, MetricsRegistry, NULL_METRICS
+from ..core.clock import DEFAULT_CLOCK
+from ..interfaces import ClockType
+from ..utils import clamp
 
 
 @dataclass
@@ -18,6 +21,8 @@ class ResendQueue:
         backoff: float = 1.5,
         min_rto: float = 0.1,
         max_rto: float = 2.0,
+        metrics: Optional[MetricsRegistry] = None,
+        clock: ClockType = DEFAULT_CLOCK,
     ):
         self.pending: Dict[int, Pending] = {}
         self.rto = RtoEstimator()
@@ -25,47 +30,64 @@ class ResendQueue:
         self.backoff = backoff
         self.min_rto = min_rto
         self.max_rto = max_rto
+        self.clock = clock
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._counts = self.metrics.counts
+        self._ack_rtt = self.metrics.latencies[Latency.ACK_RTT_US]
 
-    @monotonic
     def on_send(
         self,
         seq: int,
         payload: bytes,
-        now: float,
+        now: Optional[float] = None,
     ):
+        if now is None:
+            now = self.clock.now()
         self.pending[seq] = Pending(payload=payload, sent_at=now, retries=0)
+        self._counts[Metric.RELIABLE_SENT] += 1
 
-    @monotonic
     def on_acked(
         self,
         seqs: Iterable[int],
-        now: float,
+        now: Optional[float] = None,
     ) -> None:
         """Clear acked packets and sample RTT for those never retransmitted."""
+        if now is None:
+            now = self.clock.now()
         for seq in seqs:
             p = self.pending.pop(seq, None)
-            if p and p.retries == 0:
+            if p is None:
+                continue
+            self._counts[Metric.RELIABLE_ACKED] += 1
+            if p.retries == 0:
                 self.rto.note_sample(now - p.sent_at)
+                self._ack_rtt.record(int((now - p.sent_at) * 1e6))
 
     def _effective_rto(self, retries: int) -> float:
         r = (self.rto.rto or 0.25) * (self.backoff**retries)
         return clamp(r, self.min_rto, self.max_rto)
 
-    @monotonic
-    def due_timeouts(self, now: float):
+    def due_timeouts(self, now: Optional[float] = None):
+        if now is None:
+            now = self.clock.now()
         for seq, p in self.pending.items():
             eff = self._effective_rto(p.retries)
             if now - p.sent_at >= eff:
                 yield seq, p
 
-    @monotonic
-    def on_retransmit(self, seq: int, now: float) -> Optional[bytes]:
+    def on_retransmit(
+        self, seq: int, now: Optional[float] = None
+    ) -> Optional[bytes]:
+        if now is None:
+            now = self.clock.now()
         p = self.pending.get(seq)
         if not p:
             return None
         if p.retries >= self.max_retries:
             self.pending.pop(seq, None)
+            self._counts[Metric.RELIABLE_LOST] += 1
             return None
+        self._counts[Metric.RESENT] += 1
         p.retries += 1
         p.sent_at = now
         return p.payload
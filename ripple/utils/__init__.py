@@ -1,27 +1,15 @@
-import time
-from typing import Callable
-
-from .packable_types import UInt8, UInt16, UInt32, BytesField
+from .packable_types import UInt8, UInt16, UInt32, VarUInt, BytesField
 
 
 def clamp(value, lowest, highest):
     return min(highest, max(value, lowest))
 
 
-def monotonic(fn: Callable):
-    def _monotonic(*args, **kwargs):
-        now = kwargs.get("now")
-        kwargs["now"] = time.monotonic() if now is None else now
-        return fn(*args, **kwargs)
-
-    return _monotonic
-
-
 __all__ = [
     "UInt8",
     "UInt16",
     "UInt32",
+    "VarUInt",
     "BytesField",
     "clamp",
-    "monotonic",
 ]
@@ -20,7 +20,14 @@ from enum import IntFlag, IntEnum
 from dataclasses import dataclass, field
 from inspect import isclass
 
-from .packable_types import UIntBase, UInt8, UInt16, UInt32, BytesField
+from .packable_types import (
+    UIntBase,
+    UInt8,
+    UInt16,
+    UInt32,
+    VarUInt,
+    BytesField,
+)
 from ..interfaces import PackerType
 
 
@@ -71,6 +78,10 @@ def make_packer(cls) -> Packer:
             continue
         elif not isclass(ann_type):
             continue
+        elif issubclass(ann_type, VarUInt):
+            # variable size, packs itself like a nested Packable
+            packable_fields.append((field, ann_type))
+            continue
         elif issubclass(ann_type, UIntBase):
             fmt = ann_type._struct_format
         elif issubclass(ann_type, (IntEnum, IntFlag)):
@@ -270,5 +281,5 @@ class Packable(metaclass=PackableMeta):
         return cls(**parameters)
 
 
-Packables = UInt8 | UInt16 | UInt32 | BytesField | Packable
+Packables = UInt8 | UInt16 | UInt32 | VarUInt | BytesField | Packable
 PackablesType = Type[Packables]
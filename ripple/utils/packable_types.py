@@ -239,6 +239,42 @@ class UInt32(UIntBase):
         return Q16_16(self / Q16_16_SCALE)
 
 
+class VarUInt(UIntBase):
+    """
+    Unsigned int packed as a LEB128 varint: 7 bits per byte, high bit set
+    on all but the last byte. Values below 128 take one byte and below
+    16384 two, so wide ids cost no more than a UInt16 while they're small.
+    """
+
+    _mask = (1 << 64) - 1
+    _max_bytes = 10
+
+    def pack(self) -> bytes:
+        value = int(self)
+        if value < 0x80:
+            return bytes((value,))
+        out = bytearray()
+        while value >= 0x80:
+            out.append(value & 0x7F | 0x80)
+            value >>= 7
+        out.append(value)
+        return bytes(out)
+
+    @classmethod
+    def unpack(cls, buffer: BytesIO) -> Self:
+        value = shift = 0
+        for _ in range(cls._max_bytes):
+            chunk = buffer.read(1)
+            if not chunk:
+                raise ValueError("buffer too small for unpacking")
+            byte = chunk[0]
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return cls(value)
+            shift += 7
+        raise ValueError("VarUInt is too long")
+
+
 class Q16_16(float):
     def to_uint32(self) -> UInt32:
         return UInt32(self * Q16_16_SCALE)
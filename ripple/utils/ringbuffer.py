@@ -1,5 +1,7 @@
 from ..core.models import DropPolicy
-from ..core.metrics import Event
+from typing import Optional
+
+from ..core.metrics import Event, Metric, MetricsRegistry, NULL_METRICS
 from ..diagnostics import signals as s
 
 
@@ -9,6 +11,8 @@ class RingBuffer:
         name: str,
         capacity: int,
         drop_policy: DropPolicy,
+        metrics: Optional[MetricsRegistry] = None,
+        drop_metric: Metric = Metric.RING_DROPPED,
     ):
         self.name = name
         self._buf = [None] * capacity
@@ -17,6 +21,11 @@ class RingBuffer:
         self._tail = 0
         self._size = 0
         self.drop_policy = drop_policy
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._counts = self.metrics.counts
+        self._drop_metric = drop_metric
+        if not s.enabled():
+            self.emit = self._emit_nothing
 
     @property
     def full(self):
@@ -35,9 +44,11 @@ class RingBuffer:
     def push(self, item):
         if self.full:
             if self.drop_policy == DropPolicy.NEWEST:
+                self._counts[self._drop_metric] += 1
                 self.emit(Event.ENQUEUE_DROP_NEWEST)
                 return False
             self._move_head()
+            self._counts[self._drop_metric] += 1
             self.emit(Event.ENQUEUE_DROP_OLDEST)
         self._buf[self._tail] = item
         self._move_tail()
@@ -57,6 +68,9 @@ class RingBuffer:
     def emit(self, event):
         s.RING_EVENT.send(self, buffer_name=self.name, event=event)
 
+    def _emit_nothing(self, event):
+        pass
+
     def _move_head(self):
         self._head = (self._head + 1) % self._capacity
         self._size -= 1
@@ -0,0 +1,37 @@
+"""
+Wrapping sequence arithmetic on plain ints.
+
+Every operation on a `UInt*` goes through a Python level `__new__` to mask
+the result, which adds up for counters touched per packet. Hot paths keep
+their counters as bare ints with these helpers and only hand them to the
+`UInt*` typed headers and records at the wire boundary, where `struct`
+rejects anything out of range.
+"""
+
+MASK16 = 0xFFFF
+HALF16 = 1 << 15
+MASK32 = 0xFFFFFFFF
+HALF32 = 1 << 31
+
+
+def seq_next(seq: int, mask: int = MASK16) -> int:
+    return (seq + 1) & mask
+
+
+def seq_add(seq: int, delta: int, mask: int = MASK16) -> int:
+    return (seq + delta) & mask
+
+
+def seq_distance(newer: int, older: int, mask: int = MASK16) -> int:
+    """Unsigned distance from older -> newer in [0, mask]."""
+    return (newer - older) & mask
+
+
+def seq_lt(a: int, b: int, mask: int = MASK16) -> bool:
+    """True if `a` is older than `b`, wrap-safe."""
+    return ((a - b) & mask) > (mask >> 1) + 1
+
+
+def seq_newer(a: int, b: int, mask: int = MASK16) -> bool:
+    """True if `a` is newer than `b`, wrap-safe."""
+    return 0 < ((a - b) & mask) <= mask >> 1
@@ -6,7 +6,6 @@ import pytest
 from ripple.network.protocol import RecType, Record
 from ripple.utils import BytesField
 from ripple.ecs.utils import IdGenerator
-from ripple.ecs.entity import Component, Entity
 from ripple.ecs.snapshot import Snapshot
 
 
@@ -30,6 +29,4 @@ def reset():
         for id_field in id_fields:
             cast(IdGenerator, dc_fields[id_field].default_factory).reset()
 
-    _reset(Component, "component_id")
-    _reset(Entity, "entity_id")
     _reset(Snapshot, "id")
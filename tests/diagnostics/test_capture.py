@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+from ripple import Address, UdpEndpointConfig
+from ripple.connection import ReliableConnection
+from ripple.diagnostics.capture import (
+    CaptureReader,
+    CaptureWriter,
+    Direction,
+    replay,
+)
+from ripple.network.protocol import Ping
+from ripple.utils import UInt16, UInt32
+
+
+@pytest.fixture
+def get_connection():
+    connections = []
+
+    def _get_connection(local_port, remote_port):
+        cfg = UdpEndpointConfig(
+            local_addr=Address("127.0.0.1", local_port),
+            remote_addr=Address("127.0.0.1", remote_port),
+        )
+        connections.append(conn := ReliableConnection(cfg))
+        return conn
+
+    yield _get_connection
+
+    for conn in connections:
+        conn.close()
+
+
+def test_it_roundtrips_packets(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    with CaptureWriter(path) as writer:
+        writer.write(Direction.RX, b"hello", timestamp_ns=10)
+        writer.write(Direction.TX, b"", timestamp_ns=20)
+
+    with CaptureReader(path) as reader:
+        packets = [(p.timestamp_ns, p.direction, p.payload) for p in reader]
+
+    assert packets == [(10, Direction.RX, b"hello"), (20, Direction.TX, b"")]
+
+
+def test_it_rotates_files(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    with CaptureWriter(path, max_bytes=64, backups=2) as writer:
+        for i in range(10):
+            writer.write(Direction.RX, bytes(20), timestamp_ns=i)
+
+    assert os.path.exists(path + ".1")
+    assert os.path.exists(path + ".2")
+    assert not os.path.exists(path + ".3")
+    for name in (path, path + ".1", path + ".2"):
+        assert os.path.getsize(name) <= 64
+
+
+def test_it_ignores_a_truncated_tail(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    with CaptureWriter(path) as writer:
+        writer.write(Direction.RX, b"complete", timestamp_ns=1)
+        writer.write(Direction.RX, b"truncated", timestamp_ns=2)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+
+    with CaptureReader(path) as reader:
+        assert [p.payload for p in reader] == [b"complete"]
+
+
+def test_it_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_capture.bin"
+    path.write_bytes(b"garbage")
+
+    with pytest.raises(ValueError):
+        CaptureReader(str(path))
+
+
+def test_it_replays_a_live_capture(tmp_path, get_connection):
+    path = str(tmp_path / "capture.bin")
+    sender = get_connection(7061, 7062)
+    receiver = get_connection(7062, 7061)
+    receiver.endpoint.start_capture(CaptureWriter(path))
+
+    for i in range(3):
+        sender.send_record(Ping(id=UInt16(i), ms=UInt32(i)))
+        sender.flush()
+    live = []
+    for _ in range(200):
+        receiver.tick()
+        live.extend(receiver.recv_all())
+        if len(live) == 3:
+            break
+    receiver.endpoint.stop_capture().close()
+
+    offline = get_connection(7063, 7064)
+    assert replay(path, offline) == 3
+    assert offline.recv_all() == live
+
+
+def test_it_keeps_the_original_pacing(tmp_path, get_connection):
+    path = str(tmp_path / "capture.bin")
+    connection = get_connection(7065, 7066)
+    with CaptureWriter(path) as writer:
+        for ts in (0, 1_000_000_000, 3_000_000_000):
+            writer.write(Direction.RX, b"", timestamp_ns=ts)
+
+    now = 0
+    sleeps = []
+
+    def sleep(seconds):
+        nonlocal now
+        sleeps.append(seconds)
+        now += int(seconds * 1e9)
+
+    replay(path, connection, speed=2.0, sleep=sleep, clock=lambda: now)
+
+    assert sleeps == [0.5, 1.0]
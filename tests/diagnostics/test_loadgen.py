@@ -0,0 +1,22 @@
+from ripple.diagnostics.loadgen import LoadConfig, run
+
+
+def test_it_runs_clients_against_a_simulated_server():
+    config = LoadConfig(
+        clients=3,
+        duration=0.5,
+        tick_hz=60,
+        input_hz=20,
+        entities=8,
+        history=8,
+        simulated=True,
+    )
+    report = run(config)
+
+    assert all(client.welcomed for client in report.clients)
+    assert all(client.snapshots > 0 for client in report.clients)
+    assert report.inputs_received > 0
+    assert report.latency_us.count == sum(c.snapshots for c in report.clients)
+    assert report.tick_us.count == report.ticks
+    assert len(report.client_rates("bytes_received")) == 3
+    assert "3/3 welcomed" in report.summary()
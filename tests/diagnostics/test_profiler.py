@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from ripple import Address, UdpEndpointConfig
+from ripple.connection import ReliableConnection
+from ripple.core.metrics import MetricsRegistry
+from ripple.diagnostics.profiler import TickProfiler
+from ripple.diagnostics import signals as s
+
+
+class SlowExtension:
+    def init(self, connection):
+        pass
+
+    def on_tick(self):
+        time.sleep(0.002)
+
+    def on_record(self, record):
+        return False
+
+
+@pytest.fixture
+def get_connection():
+    connections = []
+
+    def _get_connection(port, **kwargs):
+        cfg = UdpEndpointConfig(
+            local_addr=Address("127.0.0.1", port),
+            remote_addr=Address("127.0.0.1", port + 100),
+        )
+        connections.append(conn := ReliableConnection(cfg, **kwargs))
+        return conn
+
+    yield _get_connection
+
+    for conn in connections:
+        conn.close()
+
+
+def test_it_samples_at_the_configured_rate():
+    profiler = TickProfiler(sample_rate=0.25)
+
+    sampled = [profiler.should_sample() for _ in range(8)]
+
+    assert sampled == [True, False, False, False] * 2
+
+
+def test_it_computes_rolling_percentiles():
+    profiler = TickProfiler(window=4)
+    for delta_ms in (100, 1, 2, 3, 4):
+        profiler.start()
+        profiler._record("stage", delta_ms * 1_000_000)
+        profiler.finish()
+
+    assert profiler.percentiles("stage", qs=(0, 100)) == {0: 1.0, 100: 4.0}
+
+
+def test_it_times_every_stage_and_extension(get_connection):
+    profiler = TickProfiler(budget_ms=1000)
+    conn = get_connection(
+        7071, extenstions=[SlowExtension()], profiler=profiler
+    )
+
+    conn.tick()
+
+    stages = profiler.last.stages
+    assert list(stages) == [
+        "endpoint",
+        "incoming",
+        "acks",
+        "SlowExtension",
+        "retransmits",
+        "outgoing",
+    ]
+    assert stages["SlowExtension"] >= 2_000_000
+    assert profiler.last.total_ns >= sum(stages.values())
+    assert isinstance(conn.metrics, MetricsRegistry)
+    assert conn.metrics.timings["tick.SlowExtension"].count == 1
+
+
+def test_it_reports_slow_ticks(get_connection):
+    slow = []
+    signalled = []
+    profiler = TickProfiler(budget_ms=1, on_slow_tick=slow.append)
+    conn = get_connection(
+        7072, extenstions=[SlowExtension()], profiler=profiler
+    )
+
+    def capture(sender, sample):
+        signalled.append(sample)
+
+    s.SLOW_TICK.connect(capture, sender=conn)
+    conn.tick()
+
+    assert len(slow) == 1 and slow[0].slow
+    assert signalled == slow
+    assert profiler.slow_ticks == 1
+
+
+def test_it_reports_slow_ticks_that_were_not_sampled(get_connection):
+    slow = []
+    profiler = TickProfiler(
+        sample_rate=0.0, budget_ms=1, on_slow_tick=slow.append
+    )
+    conn = get_connection(
+        7073, extenstions=[SlowExtension()], profiler=profiler
+    )
+
+    conn.tick()  # the first tick is always sampled
+    conn.tick()
+
+    assert len(slow) == 2
+    assert slow[1].total_ns >= 2_000_000
+    assert slow[1].stages == {}
+    assert profiler.last is slow[0]
@@ -0,0 +1,120 @@
+import urllib.request
+
+import pytest
+
+from ripple import Address, UdpEndpointConfig
+from ripple.connection import ReliableConnection
+from ripple.core.metrics import Latency, Metric
+from ripple.diagnostics.prometheus import PrometheusExporter, OTHER_LABEL
+
+
+@pytest.fixture
+def connections():
+    opened = []
+
+    def _connections(*ports):
+        for port in ports:
+            cfg = UdpEndpointConfig(
+                local_addr=Address("127.0.0.1", port),
+                remote_addr=Address("127.0.0.1", port + 100),
+            )
+            opened.append(ReliableConnection(cfg))
+        return opened[-len(ports) :]
+
+    yield _connections
+
+    for conn in opened:
+        conn.close()
+
+
+def test_it_renders_counters_gauges_and_histograms(connections):
+    (conn,) = connections(7051)
+    conn.metrics.inc(Metric.BYTES_SENT, 42)
+    conn.metrics.observe(Latency.ACK_RTT_US, 1000)
+    exporter = PrometheusExporter()
+    label = exporter.register(conn)
+
+    text = exporter.render()
+
+    assert label == "127.0.0.1:7151"
+    assert 'ripple_bytes_sent_total{connection="127.0.0.1:7151"} 42' in text
+    assert (
+        'ripple_ring_fill_ratio{connection="127.0.0.1:7151",queue="rx"} 0.0'
+        in text
+    )
+    assert 'ripple_ack_rtt_us_count{connection="127.0.0.1:7151"} 1' in text
+    assert (
+        'ripple_ack_rtt_us_bucket{connection="127.0.0.1:7151",le="+Inf"} 1'
+        in text
+    )
+    assert "ripple_connections 1" in text
+
+
+def test_it_bounds_label_cardinality(connections):
+    exporter = PrometheusExporter(max_series=2)
+    labels = [
+        exporter.register(conn, name=f"c{i}")
+        for i, conn in enumerate(connections(7052, 7053, 7054, 7055))
+    ]
+
+    assert labels == ["c0", "c1", OTHER_LABEL, OTHER_LABEL]
+    samples = exporter.collect()
+    assert set(samples) == {"c0", "c1", OTHER_LABEL}
+    assert samples[OTHER_LABEL].members == 2
+
+
+def test_it_serves_metrics_over_http(connections):
+    (conn,) = connections(7056)
+    exporter = PrometheusExporter(port=0)
+    exporter.register(conn, name="client")
+    exporter.start()
+    try:
+        host, port = exporter.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as r:
+            body = r.read().decode()
+            content_type = r.headers["Content-Type"]
+    finally:
+        exporter.stop()
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert 'ripple_packets_sent_total{connection="client"} 0' in body
+
+
+def test_it_renders_registry_timings_and_gauges(connections):
+    (conn,) = connections(7057)
+    conn.metrics.timing_ns("tick.incoming", 3000)
+    conn.metrics.gauge("rx_fill_pct", 12.5)
+    exporter = PrometheusExporter()
+    exporter.register(conn, name="c")
+
+    text = exporter.render()
+
+    assert "# TYPE ripple_timing_us histogram" in text
+    assert (
+        'ripple_timing_us_bucket{connection="c",name="tick.incoming",'
+        'le="+Inf"} 1' in text
+    )
+    assert (
+        'ripple_timing_us_sum{connection="c",name="tick.incoming"} 3' in text
+    )
+    assert 'ripple_gauge{connection="c",name="rx_fill_pct"} 12.5' in text
+
+
+def test_other_counters_survive_an_unregister(connections):
+    exporter = PrometheusExporter(max_series=0)
+    first, second = connections(7058, 7059)
+    for conn in (first, second):
+        conn.metrics.inc(Metric.BYTES_SENT, 10)
+        conn.metrics.timing_ns("tick.incoming", 1000)
+        exporter.register(conn)
+
+    exporter.unregister(first)
+    first.metrics.inc(Metric.BYTES_SENT, 100)
+
+    text = exporter.render()
+    assert 'ripple_bytes_sent_total{connection="other"} 20' in text
+    assert "ripple_connections 1" in text
+    assert (
+        'ripple_timing_us_count{connection="other",name="tick.incoming"} 2'
+        in text
+    )
@@ -0,0 +1,65 @@
+import pytest
+
+from ripple import Address, UdpEndpointConfig, DropPolicy
+from ripple.connection import ReliableConnection
+from ripple.network.protocol import Ping
+from ripple.utils import UInt16, UInt32
+from ripple.utils.ringbuffer import RingBuffer
+from ripple.diagnostics import signals as s
+
+
+@pytest.fixture
+def diagnostics_off():
+    s.set_diagnostics_level(s.DiagnosticsLevel.OFF)
+    yield
+    s.set_diagnostics_level(s.DiagnosticsLevel.ON)
+
+
+def test_ring_buffer_does_not_emit_when_off(diagnostics_off):
+    events = []
+
+    def capture(_, **kwargs):
+        events.append(kwargs)
+
+    s.RING_EVENT.connect(capture)
+    try:
+        ring = RingBuffer("rx", 2, DropPolicy.NEWEST)
+        ring.push(1)
+        ring.pop()
+    finally:
+        s.RING_EVENT.disconnect(capture)
+
+    assert events == []
+
+
+def test_null_signals_cover_every_signal():
+    for name in dir(s):
+        if isinstance(getattr(s, name), s.NamedSignal):
+            assert getattr(s.null_signals, name) is s.NULL_SIGNAL
+
+
+def test_connection_runs_without_signals(diagnostics_off):
+    sender = ReliableConnection(
+        UdpEndpointConfig(
+            local_addr=Address("127.0.0.1", 7041),
+            remote_addr=Address("127.0.0.1", 7042),
+        )
+    )
+    receiver = ReliableConnection(
+        UdpEndpointConfig(
+            local_addr=Address("127.0.0.1", 7042),
+            remote_addr=Address("127.0.0.1", 7041),
+        )
+    )
+    try:
+        assert sender.signals is s.null_signals
+        sender.send_record(Ping(id=UInt16(1), ms=UInt32(5)))
+        sender.flush()
+        for _ in range(100):
+            receiver.tick()
+            if (record := receiver.recv_record()) is not None:
+                break
+        assert record == Ping(id=UInt16(1), ms=UInt32(5))
+    finally:
+        sender.close()
+        receiver.close()
@@ -0,0 +1,93 @@
+import pytest
+from dataclasses import dataclass
+
+from ripple.ecs.observability import Observable
+from ripple.utils import UInt8, UInt16, UInt32
+from ripple.utils.packable import make_packer
+
+np = pytest.importorskip("numpy")
+
+from ripple.ecs.columnar import ColumnarStore  # noqa: E402
+
+
+@pytest.fixture
+def observables():
+    @dataclass
+    class Pos(Observable):
+        x: UInt16
+        y: UInt16 = UInt16(0)
+
+    @dataclass
+    class Vel(Observable):
+        dx: UInt8
+        dy: UInt32 = UInt32(0)
+
+    return Pos, Vel
+
+
+def test_it_uses_the_field_dtypes(observables):
+    Pos, Vel = observables
+    store = ColumnarStore()
+    store.add(1, Pos(UInt16(1)))
+    store.add(1, Vel(UInt8(2)))
+
+    ((pos, vel),) = store.query(Pos, Vel)
+    assert pos.x.dtype == np.uint16
+    assert vel.dx.dtype == np.uint8
+    assert vel.dy.dtype == np.uint32
+
+
+def test_it_moves_entities_between_tables(observables):
+    Pos, Vel = observables
+    store = ColumnarStore(capacity=1)
+    for eid in range(3):
+        store.add(eid, Pos(UInt16(eid)))
+    store.add(1, Vel(UInt8(5)))
+
+    assert store.get(1, Pos) == {"x": 1, "y": 0}
+    assert store.get(1, Vel) == {"dx": 5, "dy": 0}
+    only_pos = [pos.entities.tolist() for (pos,) in store.query(Pos)]
+    assert sorted(sum(only_pos, [])) == [0, 1, 2]
+
+    store.remove(1, Vel)
+    store.purge_entity(0)
+    assert len(store) == 2
+    assert store.get(2, Pos) == {"x": 2, "y": 0}
+    assert list(store.query(Vel)) == []
+
+
+def test_it_runs_systems_over_views(observables):
+    Pos, Vel = observables
+    store = ColumnarStore()
+    for eid in range(100):
+        store.add(eid, Pos(UInt16(eid), UInt16(eid)))
+        store.add(eid, Vel(UInt8(1), UInt32(2)))
+    store.clear_dirty(Pos)
+
+    for pos, vel in store.query(Pos, Vel):
+        pos.x += vel.dx
+        pos.y += vel.dy
+
+    assert store.get(10, Pos) == {"x": 11, "y": 12}
+    ((pos,),) = store.query(Pos)
+    assert (pos.dirty == 0b11).all()
+
+
+def test_it_only_packs_dirty_rows(observables):
+    Pos, _ = observables
+    store = ColumnarStore()
+    for eid in range(4):
+        store.add(eid, Pos(UInt16(eid), UInt16(0x0102)))
+    store.clear_dirty(Pos)
+
+    store.set(2, Pos, x=UInt16(300))
+    store.set(3, Pos, x=UInt16(3))
+
+    packer = make_packer(Pos)
+    assert list(store.pack_dirty(Pos)) == [
+        (2, packer.pack(Pos(UInt16(300), UInt16(0x0102))))
+    ]
+
+    ((pos,),) = store.query(Pos)
+    pos.mark_dirty("y", where=pos.x < 2)
+    assert [eid for eid, _ in store.pack_dirty(Pos)] == [0, 1, 2]
@@ -0,0 +1,36 @@
+import pytest
+
+from ripple.ecs.history import SnapshotHistory
+from ripple.ecs.snapshot import Snapshot
+from ripple.utils import UInt16
+
+
+def test_it_keeps_the_last_snapshots_across_the_id_wrap():
+    history = SnapshotHistory(4)
+    snapshots = [Snapshot(id=UInt16(i & 0xFFFF)) for i in range(65534, 65540)]
+    for snapshot in snapshots:
+        history.add(snapshot)
+
+    assert history.latest is snapshots[-1]
+    assert history.get(65534) is None
+    assert 65535 not in history
+    assert [history.get(s.id) for s in snapshots[2:]] == snapshots[2:]
+
+
+def test_the_latest_snapshot_only_moves_forward():
+    history = SnapshotHistory(4)
+    newer, older = Snapshot(id=UInt16(2)), Snapshot(id=UInt16(1))
+    history.add(newer)
+    history.add(older)
+    assert history.latest is newer
+    assert history.get(1) is older
+
+    history.clear()
+    assert history.latest is None
+    assert 2 not in history
+
+
+@pytest.mark.parametrize("size", [0, 3, 1 << 17])
+def test_the_size_must_be_a_power_of_two(size):
+    with pytest.raises(ValueError):
+        SnapshotHistory(size)
@@ -0,0 +1,91 @@
+import pytest
+from dataclasses import dataclass
+
+from ripple.ecs.interest import GridInterest
+from ripple.ecs.observability import Observable
+from ripple.ecs.snapshot import Snapshot
+from ripple.ecs.world import World
+from ripple.utils import UInt16
+
+
+@dataclass
+class Pos(Observable):
+    x: UInt16
+    y: UInt16
+
+
+@dataclass
+class Score(Observable):
+    points: UInt16
+
+
+@pytest.fixture(scope="function")
+def world():
+    return World(entities={})
+
+
+def _tick(world, grid):
+    grid.update()
+    return Snapshot.from_world(world)
+
+
+def test_it_indexes_entities_by_cell(world: World):
+    near = world.create_entity(Pos(UInt16(10), UInt16(10)))
+    grid = GridInterest(world, Pos, cell_size=16)
+    far = world.create_entity(Pos(UInt16(100), UInt16(10)))
+    scores = world.create_entity(Score(UInt16(0)))
+    grid.update()
+
+    assert grid.entity_cells == {near.entity_id: (0, 0), far.entity_id: (6, 0)}
+    assert grid.visible((1, 1)) == {near.entity_id, scores.entity_id}
+
+
+def test_it_follows_moves_and_despawns(world: World):
+    pos = Pos(UInt16(10), UInt16(10))
+    mover = world.create_entity(pos)
+    gone = world.create_entity(Pos(UInt16(0), UInt16(0)))
+    grid = GridInterest(world, Pos, cell_size=16)
+    _tick(world, grid)
+
+    pos.x = UInt16(40)
+    world.destroy_entity(gone)
+    _tick(world, grid)
+    assert grid.entity_cells == {mover.entity_id: (2, 0)}
+    assert grid.cells == {(2, 0): {mover.entity_id}}
+
+
+def test_clients_in_the_same_cell_share_the_filtered_snapshot(world: World):
+    near = world.create_entity(Pos(UInt16(10), UInt16(10)))
+    world.create_entity(Pos(UInt16(200), UInt16(200)))
+    grid = GridInterest(world, Pos, cell_size=16)
+    snapshot = _tick(world, grid)
+
+    filtered = grid.filter(snapshot, 1, 2)
+    assert grid.filter(snapshot, 15, 15) is filtered
+    assert list(filtered.entities) == [near.entity_id]
+    assert filtered.id == snapshot.id
+    assert filtered.interest == (0, 0)
+    assert grid.filter(_tick(world, grid), 1, 2) is not filtered
+
+
+def test_entering_and_leaving_the_area_spawn_and_despawn(world: World):
+    pos = Pos(UInt16(10), UInt16(10))
+    mover = world.create_entity(pos)
+    other = world.create_entity(Pos(UInt16(100), UInt16(10)))
+    grid = GridInterest(world, Pos, cell_size=16, radius=0)
+    before = grid.filter(_tick(world, grid), 10, 10)
+
+    pos.x = UInt16(100)
+    after = grid.filter(_tick(world, grid), 10, 10)
+    delta = after.get_delta_from(before)
+    assert delta.despawns == [mover.entity_id]
+    assert delta.spawns == []
+
+    seen_from_there = grid.filter(_tick(world, grid), 100, 10)
+    delta = seen_from_there.get_delta_from(after)
+    assert {e.id for e in delta.spawns} == {mover.entity_id, other.entity_id}
+
+
+def test_it_checks_the_grid_settings(world: World):
+    with pytest.raises(ValueError):
+        GridInterest(world, Pos, cell_size=0)
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import pytest
+from dataclasses import asdict, dataclass
 
 from ripple.ecs.observability import Observable
 from ripple.utils import UInt16, UInt8
@@ -11,8 +12,10 @@ def test_it_can_make_an_observable_object():
         field2: UInt16 = UInt16(0)
 
     model = MyModel(UInt8(1))
-    assert model._values == {"field1": UInt8(1), "field2": UInt16(0)}
-    assert model._dirty == set()
+    assert asdict(model) == {"field1": UInt8(1), "field2": UInt16(0)}
+    assert model._fields == ("field1", "field2")
+    assert model._dirty == 0
+    assert not hasattr(model, "__dict__")
 
 
 def test_it_can_observe_fields_changing():
@@ -23,7 +26,51 @@ def test_it_can_observe_fields_changing():
 
     model = MyModel(UInt8(1))
     model.field1 += 1
-    assert model._values == {"field1": UInt8(2), "field2": UInt16(0)}
+    assert asdict(model) == {"field1": UInt8(2), "field2": UInt16(0)}
     assert model.field1 == 2
     assert model.field2 == 0
-    assert model._dirty == {"field1"}
+    assert model._dirty == 0b01
+    assert list(model._dirty_fields()) == ["field1"]
+
+    model.field2 = UInt16(0)
+    assert model._dirty == 0b01
+    model.field2 = UInt16(5)
+    assert model._dirty == 0b11
+
+
+def test_it_checks_field_types():
+    @dataclass
+    class MyModel(Observable):
+        field1: UInt8
+
+    model = MyModel(UInt8(1))
+    with pytest.raises(ValueError):
+        model.field1 = UInt16(1)
+    with pytest.raises(AttributeError):
+        model.other = UInt8(1)
+
+
+def test_subclasses_extend_the_mask():
+    @dataclass
+    class Base(Observable):
+        field1: UInt8
+
+    @dataclass
+    class Child(Base):
+        field2: UInt16 = UInt16(0)
+
+    child = Child(UInt8(1))
+    child.field2 = UInt16(3)
+    assert Child._fields == ("field1", "field2")
+    assert child._dirty == 0b10
+
+
+def test_assigning_values_does_not_mark_them_dirty():
+    @dataclass
+    class MyModel(Observable):
+        field1: UInt8
+
+    model = MyModel(UInt8(1))
+    model._assign({"field1": UInt8(4)})
+    assert model.field1 == 4
+    assert model._dirty == 0
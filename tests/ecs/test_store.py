@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from unittest import mock
 
 from ripple.ecs.store import Store
-from ripple.utils import UInt16
+from ripple.utils import UInt16, VarUInt
 from ripple.utils.packable import Packer
 from ripple.ecs.observability import Observable
 from ripple.ecs.entity import Component
@@ -31,6 +31,7 @@ def make_component():
             instance=instance,
             type=type(instance),
             packer=mock.Mock(),
+            component_id=VarUInt(0),
         )
 
     return _make_component
@@ -83,3 +84,117 @@ def test_it_can_query_multiple_components(observables, make_component):
         assert isinstance(v, Vel)
         assert v.dx == i * 2
         assert v.dy == i * 3
+
+
+def test_it_moves_entities_between_archetypes(observables, make_component):
+    Pos, Vel = observables
+    store = Store()
+    eid = UInt16(1)
+    vel = make_component(Vel(UInt16(1)))
+
+    store.add_component(eid, make_component(Pos(UInt16(1))))
+    store.add_component(eid, vel)
+    assert len(store.archetypes[frozenset({Pos, Vel})]) == 1
+    assert len(store.archetypes[frozenset({Pos})]) == 0
+
+    store.remove_component(eid, vel)
+    assert len(store.archetypes[frozenset({Pos, Vel})]) == 0
+    assert store.get_component(eid, Pos).x == 1
+    with pytest.raises(KeyError):
+        store.get_component(eid, Vel)
+
+
+def test_it_keeps_rows_consistent_on_removal(observables, make_component):
+    Pos, _ = observables
+    store = Store()
+    for i in range(4):
+        store.add_component(UInt16(i), make_component(Pos(UInt16(i))))
+
+    store.purge_entity(UInt16(0))
+    store.purge_entity(UInt16(2))
+
+    assert sorted(eid for eid, _ in store.get_components(Pos)) == [1, 3]
+    for i in (1, 3):
+        assert store.get_component(UInt16(i), Pos).x == i
+
+
+def test_it_queries_every_matching_archetype(observables, make_component):
+    Pos, Vel = observables
+    store = Store()
+    store.add_component(UInt16(0), make_component(Pos(UInt16(0))))
+    store.add_component(UInt16(1), make_component(Pos(UInt16(1))))
+    store.add_component(UInt16(1), make_component(Vel(UInt16(1))))
+    assert sorted(eid for eid, _ in store.get_components(Pos)) == [0, 1]
+
+    # archetypes created after a query show up in the next one
+    store.add_component(UInt16(2), make_component(Vel(UInt16(2))))
+    assert sorted(eid for eid, _ in store.get_components(Vel)) == [1, 2]
+
+
+def test_it_replaces_a_component_of_the_same_type(
+    observables, make_component
+):
+    Pos, _ = observables
+    store = Store()
+    store.add_component(UInt16(0), make_component(Pos(UInt16(0))))
+    replacement = Pos(UInt16(5))
+    store.add_component(UInt16(0), make_component(replacement))
+
+    assert store.get_component(UInt16(0), Pos) is replacement
+    assert len(list(store.get_components(Pos))) == 1
+
+
+def test_registered_queries_follow_new_archetypes(observables, make_component):
+    Pos, Vel = observables
+    store = Store()
+    query = store.query(Pos, without=[Vel])
+    moving = store.query(Pos, with_=[Vel])
+
+    for i in range(3):
+        store.add_component(UInt16(i), make_component(Pos(UInt16(i))))
+    store.add_component(UInt16(1), make_component(Vel(UInt16(1))))
+
+    assert [eid for eid, _ in query] == [0, 2]
+    assert [(eid, len(row)) for eid, row in moving] == [(1, 1)]
+
+    store.purge_entity(UInt16(0))
+    assert [eid for eid, _ in query] == [2]
+
+
+def test_queries_can_filter_on_changes(observables, make_component):
+    Pos, _ = observables
+    store = Store()
+    positions = [Pos(UInt16(i)) for i in range(3)]
+    for i, pos in enumerate(positions):
+        store.add_component(UInt16(i), make_component(pos))
+
+    query = store.query(Pos, changed=[Pos])
+    assert [eid for eid, _ in query] == [0, 1, 2]
+    assert list(query) == []
+
+    positions[1].x = UInt16(7)
+    positions[2].x = UInt16(2)  # same value, not a change
+    assert [eid for eid, _ in query] == [1]
+
+    # a system's own writes don't show up on its next run
+    positions[2].x = UInt16(5)
+    assert [pos.x for _, (pos,) in query] == [5]
+    for _, (pos,) in store.query(Pos):
+        pos.x = UInt16(pos.x + 1)
+    assert [eid for eid, _ in query] == [0, 1, 2]
+    for _, (pos,) in query:
+        pos.x = UInt16(pos.x + 1)
+    assert list(query) == []
+
+
+def test_components_created_before_a_run_count_as_changed_when_added(
+    observables, make_component
+):
+    Pos, _ = observables
+    store = Store()
+    pending = Pos(UInt16(1))
+    query = store.query(Pos, changed=[Pos])
+    assert list(query) == []
+
+    store.add_component(UInt16(0), make_component(pending))
+    assert [eid for eid, _ in query] == [0]
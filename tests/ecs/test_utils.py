@@ -1,4 +1,13 @@
-from ripple.ecs.utils import IdGenerator
+import pytest
+
+from ripple.ecs.utils import (
+    GENERATION_MASK,
+    HandleAllocator,
+    IdGenerator,
+    handle_generation,
+    handle_index,
+    make_handle,
+)
 from ripple.utils import UInt16
 
 
@@ -17,3 +26,53 @@ def test_it_wraps_around():
     gen.id = UInt16(0xFFFF)
     val = gen()
     assert int(val) == 0
+
+
+def test_handles_recycle_slots_with_a_new_generation():
+    handles = HandleAllocator()
+    first, second = handles(), handles()
+    assert [handle_index(h) for h in (first, second)] == [0, 1]
+    assert handle_generation(second) == 0
+
+    handles.release(first)
+    assert not handles.is_alive(first)
+    third = handles()
+    assert handle_index(third) == 0
+    assert handle_generation(third) == 1
+    assert handles.is_alive(third) and not handles.is_alive(first)
+    assert len(handles) == 2
+
+    with pytest.raises(ValueError):
+        handles.release(first)
+
+
+def test_handles_retire_slots_instead_of_wrapping():
+    handles = HandleAllocator()
+    handle = handles()
+    for _ in range(GENERATION_MASK):
+        handles.release(handle)
+        handle = handles()
+    assert handle_index(handle) == 0
+    handles.release(handle)
+    assert handle_index(handles()) == 1
+
+
+def test_recycled_handles_stay_small_on_the_wire():
+    handles = HandleAllocator()
+    fresh = [handles() for _ in range(256)]
+    assert all(len(handle.pack()) <= 2 for handle in fresh)
+    assert len(fresh[0].pack()) == 1
+
+    for handle in fresh:
+        handles.release(handle)
+    recycled = [handles() for _ in range(256)]
+    assert {handle_generation(handle) for handle in recycled} == {1}
+    assert all(len(handle.pack()) <= 2 for handle in recycled)
+    assert len(recycled[0].pack()) == 1
+
+
+def test_handles_round_trip_their_index_and_generation():
+    for index, generation in ((0, 0), (5, 1), (300, 15), (7, 16), (1, 4095)):
+        handle = make_handle(index, generation)
+        assert handle_index(handle) == index
+        assert handle_generation(handle) == generation
@@ -1,10 +1,11 @@
 import pytest
 from dataclasses import dataclass, asdict
+from io import BytesIO
 
 from ripple.ecs.world import World
-from ripple.ecs.snapshot import Snapshot, ComponentSnapshot
+from ripple.ecs.snapshot import ComponentSnapshot, DeltaSnapshot, Snapshot
 from ripple.ecs.observability import Observable
-from ripple.utils import UInt16, BytesField
+from ripple.utils import UInt8, UInt16, VarUInt, BytesField
 
 
 @dataclass
@@ -30,21 +31,25 @@ def test_it_can_make_a_world_snapshot(world: World):
     expected_snapshot = {
         "id": UInt16(0),
         "entities": {
-            UInt16(0): {
+            VarUInt(0): {
                 "version": UInt16(0),
-                "id": UInt16(0),
+                "id": VarUInt(0),
                 "components": {
-                    UInt16(0): {
-                        "id": UInt16(0),
+                    VarUInt(0): {
+                        "id": VarUInt(0),
                         "version": UInt16(0),
+                        "type_id": UInt16(0),
                         "data": {
                             "payload": b"\x00\x01",
                             "length": UInt16(2),
                         },
+                        "type": Pos,
+                        "changed": 0,
                     }
                 },
             }
         },
+        "interest": None,
     }
     assert asdict(snapshot) == expected_snapshot
 
@@ -82,7 +87,10 @@ def test_it_cannot_apply_snapshots_from_different_component(world: World):
     pos_component = list(entity.components.values())[0]
 
     bad = ComponentSnapshot(
-        id=UInt16(9999), version=UInt16(1), data=BytesField(b"")
+        id=VarUInt(9999),
+        version=UInt16(1),
+        type_id=UInt16(0),
+        data=BytesField(b""),
     )
     with pytest.raises(
         ValueError, match="Cannot apply delta from other component"
@@ -100,6 +108,7 @@ def test_it_cannot_apply_snapshots_from_version_too_far_in_the_future(
     future = ComponentSnapshot(
         id=pos_component.component_id,
         version=pos_component.version_id + 2,
+        type_id=UInt16(0),
         data=BytesField(b""),
     )
     with pytest.raises(ValueError, match="Version too far in the future"):
@@ -120,3 +129,122 @@ def test_it_yields_the_same_snapshot_after_applying_a_delta(world: World):
     delta_snapshot = snapshot_t1.apply_delta(delta)
 
     assert snapshot_t2 == delta_snapshot
+
+
+def test_it_recycles_entity_ids_per_world(world: World):
+    first = world.create_entity(Pos(UInt16(1)))
+    world.destroy_entity(first)
+    second = world.create_entity(Pos(UInt16(1)))
+
+    assert second.entity_id != first.entity_id
+    assert not world.entity_ids.is_alive(first.entity_id)
+    assert len(world.entity_ids) == len(world.component_ids) == 1
+    # a fresh world starts over
+    assert World().create_entity().entity_id == 0
+
+
+@dataclass
+class Vel(Observable):
+    dx: UInt16
+
+
+def test_snapshots_only_rebuild_changed_entities(world: World):
+    pos = Pos(UInt16(1))
+    vel = Vel(UInt16(1))
+    moving = world.create_entity(pos, vel)
+    still = world.create_entity(Pos(UInt16(5)))
+    gone = world.create_entity(Pos(UInt16(6)))
+    first = Snapshot.from_world(world)
+    assert not world.dirty_entities
+
+    pos.x = UInt16(2)
+    world.destroy_entity(gone)
+    spawned = world.create_entity(Pos(UInt16(7)))
+    assert world.dirty_entities == {
+        moving.entity_id,
+        gone.entity_id,
+        spawned.entity_id,
+    }
+    second = Snapshot.from_world(world)
+
+    eid = still.entity_id
+    assert second.entities[eid] is first.entities[eid]
+    before = first.entities[moving.entity_id].components
+    after = second.entities[moving.entity_id].components
+    pos_id, vel_id = moving.components
+    assert after[vel_id] is before[vel_id]
+    assert after[pos_id].version == before[pos_id].version + 1
+    assert set(second.entities) == {
+        moving.entity_id,
+        still.entity_id,
+        spawned.entity_id,
+    }
+
+    world.snapshot_entities = None
+    assert Snapshot.from_world(world).entities == second.entities
+
+
+def test_destroyed_components_stop_marking_entities(world: World):
+    pos = Pos(UInt16(1))
+    entity = world.create_entity(pos)
+    world.destroy_entity(entity)
+    Snapshot.from_world(world)
+
+    pos.x = UInt16(2)
+    assert not world.dirty_entities
+
+
+@dataclass
+class Transform(Observable):
+    x: UInt16
+    y: UInt16
+    angle: UInt8 = UInt8(0)
+
+
+def test_deltas_only_carry_changed_fields(world: World):
+    transform = Transform(UInt16(1), UInt16(2))
+    entity = world.create_entity(transform)
+    (cid,) = entity.components
+    t1 = Snapshot.from_world(world)
+    transform.y = UInt16(3)
+    t2 = Snapshot.from_world(world)
+    transform.angle = UInt8(9)
+    t3 = Snapshot.from_world(world)
+
+    update = t2.get_delta_from(t1).updates[entity.entity_id].updates[cid]
+    assert update.mask == 0b010
+    assert update.data == b"\x00\x03"
+    full = t2.entities[entity.entity_id].components[cid]
+    assert len(update.pack()) < len(full.pack())
+
+    # two versions apart, the mask comes from comparing the fields
+    update = t3.get_delta_from(t1).updates[entity.entity_id].updates[cid]
+    assert update.mask == 0b110
+    assert update.data == b"\x00\x03\x09"
+    assert t1.apply_delta(t3.get_delta_from(t1)) == t3
+
+
+def test_deltas_apply_in_place_on_a_mirror(world: World):
+    transform = Transform(UInt16(1), UInt16(2))
+    entity = world.create_entity(transform)
+    mirror = World()
+    mirror.register_component_type(Transform)
+
+    empty = Snapshot(id=UInt16(100))
+    t1 = Snapshot.from_world(world)
+    mirror.apply_delta(t1.get_delta_from(empty))
+    mirrored = mirror.entities[entity.entity_id].get_component(Transform)
+    assert mirrored == transform
+
+    transform.x = UInt16(40)
+    t2 = Snapshot.from_world(world)
+    delta = t2.get_delta_from(t1)
+    wire = DeltaSnapshot.unpack(BytesIO(delta.pack()))
+    mirror.apply_delta(wire)
+    mirrored_entity = mirror.entities[entity.entity_id]
+    assert mirrored_entity.get_component(Transform) is mirrored
+    assert mirrored == Transform(UInt16(40), UInt16(2))
+
+    # snapshots off the wire resolve component types through a world
+    base = Snapshot.unpack(BytesIO(t1.pack()))
+    assert base.apply_delta(wire, mirror) == t2
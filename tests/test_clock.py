@@ -0,0 +1,134 @@
+import pytest
+
+from ripple import Address, UdpEndpointConfig
+from ripple.connection import ReliableConnection
+from ripple.core.clock import SimulatedClock, to_ms
+from ripple.core.metrics import Metric
+from ripple.network.health.ping_manager import JitterExtension, PingManager
+from ripple.network.protocol import Ping
+from ripple.utils import BytesField, UInt16, UInt32
+
+
+@pytest.fixture
+def clock():
+    return SimulatedClock(start=100.0)
+
+
+@pytest.fixture
+def get_connection(clock):
+    connections = []
+
+    def _get_connection(local_port, remote_port, **kwargs):
+        cfg = UdpEndpointConfig(
+            local_addr=Address("127.0.0.1", local_port),
+            remote_addr=Address("127.0.0.1", remote_port),
+        )
+        conn = ReliableConnection(cfg, clock=clock, **kwargs)
+        connections.append(conn)
+        return conn
+
+    yield _get_connection
+
+    for conn in connections:
+        conn.close()
+
+
+def test_simulated_clock_only_moves_forward(clock):
+    clock.advance(1.5)
+    clock.sleep(0.5)
+
+    assert clock.now() == 102.0
+    with pytest.raises(ValueError):
+        clock.advance(-1)
+
+
+def test_to_ms_wraps():
+    assert to_ms(1.5) == 1500
+    assert to_ms(2**32 / 1000 + 1) == 1000
+
+
+def test_tick_reads_the_clock_once(get_connection, clock):
+    conn = get_connection(7081, 7082)
+    clock.advance(3)
+    conn.tick()
+
+    assert conn.now == 103.0
+
+
+class _CountingClock(SimulatedClock):
+    reads = 0
+
+    def now(self):
+        self.reads += 1
+        return super().now()
+
+
+def test_sending_uses_the_tick_time():
+    clock = _CountingClock(start=100.0)
+    cfg = UdpEndpointConfig(
+        local_addr=Address("127.0.0.1", 7087),
+        remote_addr=Address("127.0.0.1", 7088),
+    )
+    conn = ReliableConnection(cfg, clock=clock)
+    try:
+        conn.tick()
+        reads = clock.reads
+        clock.advance(1)
+        conn.send_record(Ping(id=UInt16(0), ms=UInt32(0)))
+        conn.flush()
+
+        assert clock.reads == reads
+        assert conn.now == 100.0
+    finally:
+        conn.close()
+
+
+def test_retransmits_follow_the_simulated_clock(
+    get_connection, clock, ReliableRecord
+):
+    conn = get_connection(7083, 7084)
+    get_connection(7084, 7083)
+    conn.send_record(ReliableRecord(blob=BytesField(b"x")))
+    conn.tick()
+    (pending,) = conn.reliability.tx.pending.values()
+    assert pending.sent_at == 100.0
+
+    conn.tick()
+    assert pending.retries == 0
+
+    clock.advance(conn.reliability.tx.max_rto)
+    conn.tick()
+    assert pending.retries == 1
+
+
+def test_ping_manager_reads_milliseconds_from_its_clock(clock):
+    pm = PingManager(interval_ms=100, clock=clock)
+
+    ping = pm.make_ping()
+    assert ping.ms == 100_000
+    assert not pm.is_due()
+
+    clock.advance(0.1)
+    assert pm.is_due()
+
+
+def test_ping_manager_resets_its_schedule_after_falling_behind():
+    pm = PingManager(interval_ms=100)
+    pm.make_ping(now=0)
+    pm.make_ping(now=10_000)
+
+    assert pm.next_due_ms == UInt32(10_100)
+
+
+def test_jitter_extension_pings_on_the_connection_clock(
+    get_connection, clock
+):
+    extension = JitterExtension(interval_ms=1000)
+    conn = get_connection(7085, 7086, extenstions=[extension])
+    get_connection(7086, 7085)
+
+    for _ in range(5):
+        conn.tick()
+        clock.advance(0.5)
+
+    assert conn.metrics.counts[Metric.PINGS_SENT] == 3
@@ -0,0 +1,150 @@
+from io import BytesIO
+
+import pytest
+
+from ripple.network.protocol import (
+    Ping,
+    EnvelopeBuilder,
+    EnvelopeOpener,
+    RecordHeader,
+    ZlibCompressor,
+    StreamCompressor,
+    train_dictionary,
+)
+from ripple.interfaces import RecordFlags
+from ripple.utils import UInt16, UInt32, BytesField
+
+
+def test_it_compresses_records_above_threshold(ReliableRecord):
+    compressor = ZlibCompressor(threshold=16)
+    record = ReliableRecord(blob=BytesField(b"abc" * 100))
+
+    payload = record.pack(compressor)
+    header = RecordHeader.unpack(BytesIO(payload))
+
+    assert RecordFlags.COMPRESSED & header.flags
+    assert len(payload) < len(record.pack())
+
+    unpacked, _ = ReliableRecord.unpack(BytesIO(payload), compressor=compressor)
+    assert unpacked.blob == b"abc" * 100
+
+
+def test_it_skips_compression_below_threshold():
+    compressor = ZlibCompressor(threshold=64)
+    ping = Ping(id=UInt16(1), ms=UInt32(2))
+
+    payload = ping.pack(compressor)
+    header = RecordHeader.unpack(BytesIO(payload))
+
+    assert not RecordFlags.COMPRESSED & header.flags
+    assert payload == ping.pack()
+
+
+def test_it_skips_compression_when_it_does_not_shrink(ReliableRecord):
+    compressor = ZlibCompressor(threshold=0)
+    record = ReliableRecord(blob=BytesField(bytes(range(40))))
+
+    assert compressor.compress(record.pack()) is None
+
+
+def test_it_refuses_compressed_records_without_compressor(ReliableRecord):
+    compressor = ZlibCompressor(threshold=16)
+    record = ReliableRecord(blob=BytesField(b"abc" * 100))
+
+    with pytest.raises(ValueError):
+        ReliableRecord.unpack(BytesIO(record.pack(compressor)))
+
+
+def test_a_trained_dictionary_improves_the_ratio():
+    samples = [
+        b"component:position;x=%d;y=%d;component:velocity" % (i, i * 2)
+        for i in range(50)
+    ]
+    dictionary = train_dictionary(samples, size=512)
+    plain = ZlibCompressor(threshold=0)
+    trained = ZlibCompressor(dictionary=dictionary, threshold=0)
+
+    sample = b"component:position;x=77;y=154;component:velocity"
+    compressed = trained.compress(sample)
+
+    assert dictionary
+    assert compressed is not None
+    assert len(compressed) < len(plain.compress(sample) or sample)
+    assert trained.decompress(compressed) == sample
+
+
+def test_it_roundtrips_compressed_envelopes(ReliableRecord):
+    compressor = ZlibCompressor(threshold=16)
+    builder = EnvelopeBuilder(budget=1200, compressor=compressor)
+    opener = EnvelopeOpener(compressor=compressor)
+
+    builder.add(Ping(id=UInt16(1), ms=UInt32(1)))
+    builder.add(ReliableRecord(blob=BytesField(b"x" * 2000)))
+    builder.add(Ping(id=UInt16(2), ms=UInt32(2)))
+    result = builder.finish()
+
+    assert len(result.envelopes) == 1
+    records = opener.unpack(BytesIO(result.envelopes[0].payload))
+    assert [type(r) for r in records] == [Ping, ReliableRecord, Ping]
+    assert records[1].blob == b"x" * 2000
+
+
+def test_it_rejects_oversized_decompression():
+    compressor = ZlibCompressor(threshold=0, max_size=100)
+    compressed = compressor.compress(b"a" * 1000)
+
+    with pytest.raises(ValueError):
+        compressor.decompress(compressed)
+
+
+def test_stream_compressor_uses_acked_payload_as_baseline():
+    sender = StreamCompressor()
+    receiver = StreamCompressor()
+    first = bytes(range(200))
+    second = bytes(range(200))[:-1] + b"!"
+
+    standalone = sender.compress(second)
+    sender.note_sent(7, first)
+    receiver.note_received(7, first)
+    sender.note_acked([7])
+    against_baseline = sender.compress(second)
+
+    assert against_baseline is not None
+    assert standalone is None or len(against_baseline) < len(standalone)
+    assert receiver.decompress(against_baseline) == second
+
+
+def test_stream_compressor_only_moves_to_newer_baselines():
+    sender = StreamCompressor()
+    sender.note_sent(0xFFFF, b"old" * 20)
+    sender.note_sent(1, b"new" * 20)
+
+    sender.note_acked([1])
+    sender.note_acked([0xFFFF])
+
+    assert sender._baseline_rid == 1
+
+
+def test_stream_compressor_rejects_unknown_baselines():
+    sender = StreamCompressor()
+    receiver = StreamCompressor()
+    sender.note_sent(3, b"a" * 100)
+    sender.note_acked([3])
+
+    with pytest.raises(ValueError):
+        receiver.decompress(sender.compress(b"a" * 100))
+
+
+def test_stream_compressor_recompresses_without_the_baseline():
+    sender = StreamCompressor()
+    receiver = StreamCompressor()
+    sender.note_sent(3, b"a" * 100)
+    sender.note_acked([3])
+    sender.note_sent(4, b"a" * 100)
+
+    payload, compressed = sender.recompress(4)
+    assert compressed
+    assert receiver.decompress(payload) == b"a" * 100
+
+    sender.forget(4)
+    assert sender.recompress(4) is None
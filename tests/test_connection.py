@@ -1,10 +1,15 @@
+from io import BytesIO
+
 import pytest
 
 from ripple import Address, UdpEndpointConfig
+from ripple.core.models import FlushPolicy
 from ripple.connection import ReliableConnection
-from ripple.network.protocol import Ping
-from ripple.core.metrics import Timer
-from ripple.utils import UInt16, UInt32, BytesField
+from ripple.interfaces import RecordFlags
+from ripple.network.protocol import Ping, ZlibCompressor, StreamCompressor
+from ripple.network.protocol.records import Input
+from ripple.core.metrics import Timer, Metric
+from ripple.utils import UInt8, UInt16, UInt32, BytesField
 from ripple.diagnostics import signals as s
 
 
@@ -12,14 +17,14 @@ from ripple.diagnostics import signals as s
 def get_connection():
     connections = []
 
-    def _get_connection(local_port, remote_port, mtu=1200):
+    def _get_connection(local_port, remote_port, mtu=1200, **kwargs):
         local_addr = Address("127.0.0.1", local_port)
         remote_addr = Address("127.0.0.1", remote_port)
         cfg = UdpEndpointConfig(
             local_addr=local_addr,
             remote_addr=remote_addr,
         )
-        conn = ReliableConnection(cfg, mtu=mtu)
+        conn = ReliableConnection(cfg, mtu=mtu, **kwargs)
         connections.append(conn)
         return conn
 
@@ -228,3 +233,216 @@ def test_it_can_deal_with_a_fragmented_package(get_connection, ReliableRecord):
         receiver.tick()
 
     assert record.blob == b"a" * 40
+
+
+def test_it_compresses_records_before_fragmenting(
+    get_connection, ReliableRecord
+):
+    compressor = ZlibCompressor(threshold=16)
+    sender = get_connection(7017, 7018, mtu=100, compressor=compressor)
+    receiver = get_connection(7018, 7017, mtu=100, compressor=compressor)
+
+    sender.send_record(ReliableRecord(blob=BytesField(b"abcd" * 100)))
+    assert len(sender.fragmenter._fragments) == 0
+
+    timer = Timer()
+    while (record := receiver.recv_record()) is None:
+        if timer.delta() > 0.02:
+            assert False, "Did not receive all records"
+        sender.tick()
+        receiver.tick()
+
+    assert record.blob == b"abcd" * 100
+
+
+def test_it_can_stream_compress_against_acked_packets(
+    get_connection, ReliableRecord
+):
+    sender = get_connection(
+        7019, 7020, stream_compressor=StreamCompressor(threshold=0)
+    )
+    receiver = get_connection(
+        7020, 7019, stream_compressor=StreamCompressor(threshold=0)
+    )
+
+    received = []
+    for i in range(3):
+        blob = bytes(range(200))[:-1] + bytes([i])
+        sender.send_record(ReliableRecord(blob=BytesField(blob)))
+        timer = Timer()
+        while (record := receiver.recv_record()) is None:
+            if timer.delta() > 0.05:
+                assert False, "Did not receive in time"
+            sender.tick()
+            receiver.tick()
+        received.append(record.blob.payload)
+        # make sure the ack made it back before sending the next one
+        while sender.reliability.tx.pending:
+            if timer.delta() > 0.05:
+                assert False, "Did not receive ack in time"
+            sender.tick()
+            receiver.tick()
+
+    assert [r[-1] for r in received] == [0, 1, 2]
+    assert sender.stream_compressor._baseline_rid is not None
+
+
+def _receive_for(receiver, seconds):
+    timer = Timer()
+    records = []
+    while timer.delta() < seconds:
+        receiver.tick()
+        records.extend(receiver.recv_all())
+    return records
+
+
+def _input(key):
+    return Input(key=UInt16(key), modifiers=UInt8(0), up_down=UInt8(0))
+
+
+def test_it_holds_records_until_the_hold_time_expires(get_connection):
+    policy = FlushPolicy(max_hold_ms=10_000)
+    sender = get_connection(7021, 7022, flush_policy=policy)
+    receiver = get_connection(7022, 7021)
+
+    sender.send_record(_input(1))
+    sender.tick()
+    assert _receive_for(receiver, 0.01) == []
+
+    sender.flush()
+    records = _receive_for(receiver, 0.01)
+    assert [r.key for r in records] == [1]
+
+
+def test_urgent_records_bypass_the_hold(get_connection):
+    policy = FlushPolicy(max_hold_ms=10_000)
+    sender = get_connection(7023, 7024, flush_policy=policy)
+    receiver = get_connection(7024, 7023)
+
+    sender.send_record(_input(1))
+    sender.send_record(_input(2), urgent=True)
+
+    records = _receive_for(receiver, 0.01)
+    assert [r.key for r in records] == [1, 2]
+
+
+def test_urgent_records_carry_the_flag():
+    payload = _input(1).pack(urgent=True)
+    _, header = Input.unpack(BytesIO(payload))
+    assert RecordFlags.URGENT & header.flags
+
+
+def test_acks_are_not_held(get_connection, ReliableRecord):
+    policy = FlushPolicy(max_hold_ms=10_000)
+    sender = get_connection(7031, 7032)
+    receiver = get_connection(7032, 7031, flush_policy=policy)
+
+    sender.send_record(ReliableRecord(blob=BytesField(b"x")))
+    sender.flush()
+    assert len(_receive_for(receiver, 0.01)) == 1
+
+    _receive_for(sender, 0.01)
+    assert len(sender.reliability.tx.pending) == 0
+
+
+def test_it_flushes_once_the_size_threshold_is_reached(get_connection):
+    input_size = len(_input(1).pack())
+    policy = FlushPolicy(max_bytes=3 * input_size, max_hold_ms=10_000)
+    sender = get_connection(7025, 7026, flush_policy=policy)
+    receiver = get_connection(7026, 7025)
+
+    for i in range(2):
+        sender.send_record(_input(i))
+    assert _receive_for(receiver, 0.01) == []
+
+    sender.send_record(_input(2))
+    records = _receive_for(receiver, 0.01)
+    assert [r.key for r in records] == [0, 1, 2]
+
+
+class _RecordingExtension:
+    def __init__(self, consume=False):
+        self.consume = consume
+        self.seen = []
+
+    def init(self, connection):
+        pass
+
+    def on_tick(self):
+        pass
+
+    def on_record(self, record):
+        self.seen.append(type(record))
+        return self.consume
+
+
+class _PingOnlyExtension(_RecordingExtension):
+    def record_handlers(self):
+        return {Ping.TYPE: self.on_record}
+
+
+class _InputExtension(_RecordingExtension):
+    def init(self, connection):
+        self.connection = connection
+
+    def on_tick(self):
+        self.connection.send_record(_input(1))
+
+
+def test_acks_share_the_tick_datagram(get_connection, ReliableRecord):
+    sender = get_connection(7033, 7034)
+    receiver = get_connection(7034, 7033, extenstions=[_InputExtension()])
+    sent = []
+    send = receiver.endpoint.send
+    receiver.endpoint.send = lambda payload: sent.append(send(payload))
+
+    sender.send_record(ReliableRecord(blob=BytesField(b"x")))
+    sender.flush()
+    timer = Timer()
+    while not receiver.recv_all():
+        assert timer.delta() < 1, "Record was not received in time"
+        sent.clear()
+        receiver.tick()
+    # the ack and the extension's record leave in one datagram
+    assert len(sent) == 1
+
+    receiver.endpoint.flush()
+    records = _receive_for(sender, 0.01)
+    assert records and all(isinstance(r, Input) for r in records)
+    assert len(sender.reliability.tx.pending) == 0
+
+
+def test_it_dispatches_records_by_type(get_connection, ReliableRecord):
+    ping_only = _PingOnlyExtension(consume=True)
+    catch_all = _RecordingExtension()
+    sender = get_connection(7027, 7028)
+    receiver = get_connection(
+        7028, 7027, extenstions=[ping_only, catch_all]
+    )
+
+    sender.send_record(Ping(id=UInt16(1), ms=UInt32(1)))
+    sender.send_record(ReliableRecord(blob=BytesField(b"x")))
+    sender.flush()
+    records = _receive_for(receiver, 0.01)
+
+    assert ping_only.seen == [Ping]
+    assert catch_all.seen == [ReliableRecord]
+    assert [type(r) for r in records] == [ReliableRecord]
+
+
+def test_it_counts_traffic_in_the_connection_metrics(
+    get_connection, ReliableRecord
+):
+    sender = get_connection(7029, 7030)
+    receiver = get_connection(7030, 7029)
+
+    sender.send_record(ReliableRecord(blob=BytesField(b"x" * 100)))
+    sender.flush()
+    _receive_for(receiver, 0.01)
+
+    sent = sender.metrics.snapshot()
+    received = receiver.metrics.snapshot()
+    assert sent[Metric.PACKETS_SENT] == 1
+    assert sent[Metric.RELIABLE_SENT] == 1
+    assert received[Metric.PACKETS_RECEIVED] == 1
+    assert received[Metric.BYTES_RECEIVED] == sent[Metric.BYTES_SENT]
@@ -0,0 +1,43 @@
+import pytest
+
+from ripple.core.server.delta_cache import DeltaCache
+from ripple.ecs.snapshot import Snapshot
+
+
+def test_it_encodes_each_delta_once():
+    cache = DeltaCache()
+    base, target = Snapshot(), Snapshot()
+
+    record = cache.get(target, base)
+    assert cache.get(target, base) is record
+    nearby = Snapshot(id=target.id, interest=(0, 0))
+    assert cache.get(nearby, base) is not record
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert record.pack_payload() is record.pack_payload()
+
+
+def test_it_evicts_the_least_recently_used_delta():
+    cache = DeltaCache(2)
+    base, first, second, third = (Snapshot() for _ in range(4))
+    kept = cache.get(first, base)
+    cache.get(second, base)
+    cache.get(first, base)
+    cache.get(third, base)
+
+    assert len(cache) == 2
+    assert cache.get(first, base) is kept
+    cache.get(second, base)
+    assert cache.misses == 4
+
+
+def test_it_does_not_mix_up_snapshots_with_the_same_ids():
+    cache = DeltaCache()
+    base, target = Snapshot(), Snapshot()
+    record = cache.get(target, base)
+    again = Snapshot(id=target.id)
+    assert cache.get(again, base) is not record
+
+
+def test_the_size_must_be_positive():
+    with pytest.raises(ValueError):
+        DeltaCache(0)
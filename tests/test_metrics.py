@@ -0,0 +1,149 @@
+import threading
+
+import pytest
+
+from ripple.core.metrics import (
+    Histogram,
+    Latency,
+    Metric,
+    MetricsRegistry,
+    NULL_METRICS,
+    _bucket_index,
+    _bucket_upper,
+)
+from ripple.core.models import DropPolicy
+from ripple.reliability.resend_queue import ResendQueue
+from ripple.utils.ringbuffer import RingBuffer
+
+
+def test_histogram_buckets_are_contiguous():
+    previous = -1
+    for value in range(5000):
+        index = _bucket_index(value, 3)
+        assert index in (previous, previous + 1)
+        assert value <= _bucket_upper(index, 3)
+        previous = index
+
+
+def test_histogram_percentiles_stay_within_relative_error():
+    histogram = Histogram(sub_bits=3)
+    for value in range(1, 1001):
+        histogram.record(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot.count == 1000
+    assert snapshot.mean == pytest.approx(500.5)
+    assert 500 <= snapshot.percentile(50) <= 500 * (1 + 1 / 8)
+    assert 990 <= snapshot.percentile(99) <= 990 * (1 + 1 / 8)
+    assert snapshot.percentile(100) >= 1000
+
+
+def test_histogram_clamps_values_to_range():
+    histogram = Histogram(max_value=100)
+    histogram.record(-5)
+    histogram.record(10_000)
+
+    assert histogram.counts[0] == 1
+    assert histogram.counts[-1] == 1
+
+
+def test_snapshots_can_be_diffed():
+    metrics = MetricsRegistry()
+    metrics.inc(Metric.BYTES_SENT, 100)
+    metrics.observe(Latency.PING_RTT_MS, 20)
+    first = metrics.snapshot()
+
+    metrics.inc(Metric.BYTES_SENT, 50)
+    metrics.observe(Latency.PING_RTT_MS, 40)
+    metrics.timing_ns("tick", 2_000_000)
+    second = metrics.snapshot()
+
+    diff = second.diff(first)
+    assert diff[Metric.BYTES_SENT] == 50
+    assert diff.latency(Latency.PING_RTT_MS).count == 1
+    assert diff.latency(Latency.PING_RTT_MS).mean == 40
+    assert diff.timings["tick"].count == 1
+    assert diff.elapsed >= 0
+
+
+def test_histogram_snapshots_can_be_merged():
+    a, b = Histogram(), Histogram()
+    a.record(10)
+    b.record(30)
+    b.record(50)
+
+    merged = a.snapshot().merge(b.snapshot())
+    assert merged.count == 3
+    assert merged.mean == 30
+    with pytest.raises(ValueError):
+        merged.merge(Histogram(sub_bits=2).snapshot())
+
+
+def test_ring_buffer_counts_drops():
+    metrics = MetricsRegistry()
+    ring = RingBuffer(
+        "tx", 1, DropPolicy.NEWEST, metrics, drop_metric=Metric.TX_DROPPED
+    )
+    ring.push(1)
+    ring.push(2)
+
+    assert metrics.counts[Metric.TX_DROPPED] == 1
+
+
+def test_components_without_a_registry_share_the_null_one():
+    ring = RingBuffer("tx", 1, DropPolicy.NEWEST)
+    queue = ResendQueue()
+    assert ring.metrics is NULL_METRICS and queue.metrics is NULL_METRICS
+
+    ring.push(1)
+    ring.push(2)
+    queue.on_send(1, b"a", now=0.0)
+    queue.on_acked([1], now=0.05)
+    snapshot = NULL_METRICS.snapshot()
+    assert not any(snapshot.counters)
+    assert snapshot.latency(Latency.ACK_RTT_US).count == 0
+
+
+def test_resend_queue_counts_resends_and_losses():
+    metrics = MetricsRegistry()
+    queue = ResendQueue(max_retries=1, metrics=metrics)
+    queue.on_send(1, b"a", now=0.0)
+    queue.on_send(2, b"b", now=0.0)
+    queue.on_acked([1], now=0.05)
+    queue.on_retransmit(2, now=1.0)
+    queue.on_retransmit(2, now=2.0)
+
+    snapshot = metrics.snapshot()
+    assert snapshot[Metric.RELIABLE_SENT] == 2
+    assert snapshot[Metric.RELIABLE_ACKED] == 1
+    assert snapshot[Metric.RESENT] == 1
+    assert snapshot[Metric.RELIABLE_LOST] == 1
+    assert snapshot.ratio(Metric.RESENT, of=Metric.RELIABLE_SENT) == 0.5
+    assert snapshot.latency(Latency.ACK_RTT_US).percentile(50) >= 50_000
+
+
+def test_snapshots_can_be_taken_while_new_names_are_added():
+    registry = MetricsRegistry()
+    errors = []
+    done = threading.Event()
+
+    def scrape():
+        while not done.is_set():
+            try:
+                registry.snapshot()
+            except RuntimeError as e:
+                errors.append(e)
+                return
+
+    scraper = threading.Thread(target=scrape)
+    scraper.start()
+    try:
+        for i in range(20_000):
+            registry.timing_ns(f"tick.stage{i}", 1000)
+            registry.gauge(f"queue{i}", 1.0)
+    finally:
+        done.set()
+        scraper.join()
+
+    assert errors == []
+    assert len(registry.snapshot().timings) == 20_000
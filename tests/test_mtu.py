@@ -0,0 +1,119 @@
+import pytest
+
+from ripple import Address, UdpEndpointConfig
+from ripple.connection import ReliableConnection
+from ripple.core.metrics import Timer
+from ripple.network.protocol import PacketHeader
+from ripple.network.health.mtu import (
+    BASE_MTU,
+    PROBE_OVERHEAD,
+    MtuDiscoveryExtension,
+    PathMtuProber,
+    ProbeState,
+)
+
+
+def run_search(prober, path_mtu, now=0.0, rounds=500):
+    for _ in range(rounds):
+        if not prober.is_due(now=now):
+            now += prober.probe_timeout
+            prober.on_timeout(now=now)
+            continue
+        probe = prober.make_probe(now=now)
+        size = PROBE_OVERHEAD + len(probe.padding.payload)
+        if size <= path_mtu:
+            prober.on_probe_ack(probe.to_ack(size), now=now)
+        if prober.state is ProbeState.COMPLETE:
+            break
+    return now
+
+
+def test_probes_are_sized_to_the_candidate():
+    prober = PathMtuProber(base_mtu=1200, max_mtu=1472)
+    probe = prober.make_probe(now=0.0)
+    assert PacketHeader.size() + len(probe.pack()) == 1472
+
+
+def test_it_converges_on_the_path_mtu():
+    prober = PathMtuProber(base_mtu=1200, max_mtu=9000, step=8)
+    run_search(prober, path_mtu=1400)
+
+    assert prober.state is ProbeState.COMPLETE
+    assert 1400 - 8 <= prober.mtu <= 1400
+
+
+def test_it_takes_the_max_mtu_straight_away_when_possible():
+    prober = PathMtuProber(base_mtu=1200, max_mtu=1472)
+    probe = prober.make_probe(now=0.0)
+    mtu = prober.on_probe_ack(probe.to_ack(1472), now=0.0)
+
+    assert mtu == 1472
+    assert prober.state is ProbeState.COMPLETE
+
+
+def test_it_falls_back_to_base_mtu_on_a_black_hole():
+    prober = PathMtuProber(base_mtu=1200, max_mtu=1472, confirm_interval=1)
+    now = run_search(prober, path_mtu=1472)
+    assert prober.mtu == 1472
+
+    now += prober.confirm_interval
+    mtu = None
+    for _ in range(prober.max_probes):
+        assert prober.is_due(now=now)
+        prober.make_probe(now=now)
+        now += prober.probe_timeout
+        mtu = prober.on_timeout(now=now)
+
+    assert mtu == 1200
+    assert prober.state is ProbeState.SEARCHING
+
+
+def test_a_fallback_keeps_the_default_connection_budget():
+    prober = PathMtuProber()
+    assert prober.base_mtu == BASE_MTU
+    assert BASE_MTU - PacketHeader.size() == ReliableConnection.mtu
+
+
+def test_probing_starts_from_the_connection_budget():
+    cfg = UdpEndpointConfig(local_addr=Address("127.0.0.1", 7035))
+    extension = MtuDiscoveryExtension()
+    connection = ReliableConnection(cfg, mtu=1000, extenstions=[extension])
+    try:
+        assert extension.prober.base_mtu == 1000 + PacketHeader.size()
+        assert extension.prober.mtu == extension.prober.base_mtu
+    finally:
+        connection.close()
+
+
+def test_it_rejects_a_base_below_the_probe_overhead():
+    with pytest.raises(ValueError):
+        PathMtuProber(base_mtu=PROBE_OVERHEAD - 1)
+
+
+def test_connections_raise_their_budget_over_loopback():
+    connections = []
+    for local, remote in ((7031, 7032), (7032, 7031)):
+        cfg = UdpEndpointConfig(
+            local_addr=Address("127.0.0.1", local),
+            remote_addr=Address("127.0.0.1", remote),
+        )
+        extension = MtuDiscoveryExtension(
+            base_mtu=1200, max_mtu=1472, probe_timeout=0.05
+        )
+        connections.append(ReliableConnection(cfg, extenstions=[extension]))
+    sender, receiver = connections
+
+    try:
+        timer = Timer()
+        while sender.mtu != 1472 - PacketHeader.size():
+            if timer.delta() > 1:
+                assert False, "MTU was not raised in time"
+            sender.tick()
+            receiver.tick()
+
+        assert sender.builder.budget == sender.mtu
+        assert sender.fragmenter.mtu == sender.mtu
+        assert receiver.endpoint.max_datagram_size >= 1472
+    finally:
+        for connection in connections:
+            connection.close()
@@ -16,6 +16,12 @@ from ripple.utils import UInt16, UInt32, BytesField
 from ripple.interfaces import RecordFlags
 
 
+def test_record_types_keep_their_wire_numbers():
+    assert RecType.INPUT == 11
+    assert RecType.RESERVED == 12
+    assert RecType.MTU_PROBE > RecType.RESERVED
+
+
 def test_ack_encode_decode():
     ack = Ack(ack_base=UInt16(100), mask=UInt16(0xABCD))
     payload = ack.pack()
@@ -26,7 +32,8 @@ def test_ack_encode_decode():
 
 def test_ack_flags():
     ack = Ack(ack_base=UInt16(1), mask=UInt16(0))
-    assert ack.flags() == RecordFlags.NONE
+    assert RecordFlags.URGENT in ack.flags()
+    assert RecordFlags.RELIABLE not in ack.flags()
 
 
 def test_ping_encode_decode():
@@ -38,7 +45,8 @@ def test_ping_encode_decode():
 
 def test_ping_flags():
     ping = Ping(id=UInt16(1), ms=UInt32(100))
-    assert ping.flags() == RecordFlags.NONE
+    assert RecordFlags.URGENT in ping.flags()
+    assert RecordFlags.RELIABLE not in ping.flags()
 
 
 def test_delta_encode_decode(ReliableRecord):
@@ -0,0 +1,196 @@
+import random
+
+import pytest
+
+from ripple import Address, UdpEndpointConfig
+from ripple.connection import ReliableConnection
+from ripple.core.clock import SimulatedClock
+from ripple.core.metrics import Metric
+from ripple.network.protocol import Ping, StreamCompressor
+from ripple.network.simulator import (
+    GilbertElliott,
+    ImpairedUdpEndpoint,
+    Link,
+    LinkConfig,
+    SimulatedNetwork,
+)
+from ripple.utils import BytesField, UInt16, UInt32
+
+
+SERVER = Address("10.0.0.1", 7000)
+CLIENT = Address("10.0.0.2", 7000)
+
+
+def schedule_many(config, count=10_000, seed=1, size=100):
+    link = Link(config, random.Random(seed))
+    return link, [link.schedule(size, now=0.0) for _ in range(count)]
+
+
+def test_bernoulli_loss_drops_the_configured_share():
+    link, _ = schedule_many(LinkConfig(loss=0.2))
+
+    assert link.stats.lost == pytest.approx(2000, rel=0.1)
+
+
+def test_gilbert_elliott_losses_come_in_bursts():
+    bursts = GilbertElliott(p_good_to_bad=0.02, p_bad_to_good=0.2, loss_bad=1)
+    bursty = LinkConfig(bursts=bursts)
+    _, deliveries = schedule_many(bursty)
+
+    lost = [not d for d in deliveries]
+    runs = sum(1 for a, b in zip(lost, lost[1:]) if b and not a)
+    assert sum(lost) / runs > 3
+
+
+def test_latency_jitter_and_duplicates():
+    config = LinkConfig(latency_ms=50, jitter_ms=10, duplicate=0.1)
+    link, deliveries = schedule_many(config)
+
+    times = [t for d in deliveries for t in d]
+    assert all(0.040 <= t <= 0.060 for t in times)
+    assert link.stats.duplicated == pytest.approx(1000, rel=0.15)
+
+
+def test_bandwidth_cap_serialises_and_tail_drops():
+    config = LinkConfig(bandwidth_bps=80_000, queue_ms=250)
+    link, deliveries = schedule_many(config, count=5, size=1000)
+
+    assert [d[0] for d in deliveries[:3]] == pytest.approx([0.1, 0.2, 0.3])
+    assert deliveries[3:] == [[], []]
+    assert link.stats.queue_dropped == 2
+
+
+def test_it_drops_datagrams_above_the_link_mtu():
+    link, deliveries = schedule_many(LinkConfig(mtu=99), count=1)
+
+    assert deliveries == [[]]
+    assert link.stats.mtu_dropped == 1
+
+
+def test_links_are_deterministic_per_seed():
+    config = LinkConfig(loss=0.1, jitter_ms=5, reorder=0.1)
+
+    assert schedule_many(config)[1] == schedule_many(config)[1]
+
+
+def make_pair(network, clock):
+    server = ReliableConnection(
+        UdpEndpointConfig(local_addr=SERVER, remote_addr=CLIENT),
+        clock=clock,
+        endpoint_factory=network.endpoint,
+    )
+    client = ReliableConnection(
+        UdpEndpointConfig(local_addr=CLIENT, remote_addr=SERVER),
+        clock=clock,
+        endpoint_factory=network.endpoint,
+    )
+    return server, client
+
+
+def test_reliable_records_survive_a_lossy_simulated_link(ReliableRecord):
+    clock = SimulatedClock()
+    network = SimulatedNetwork(clock, seed=3)
+    network.link(SERVER, CLIENT, LinkConfig(latency_ms=30, loss=0.3))
+    server, client = make_pair(network, clock)
+
+    for i in range(20):
+        server.send_record(ReliableRecord(blob=BytesField(bytes([i]))))
+        server.tick()
+    received = set()
+    for _ in range(1000):
+        clock.advance(0.01)
+        server.tick()
+        client.tick()
+        received.update(r.blob.payload for r in client.recv_all())
+        if len(received) == 20:
+            break
+
+    assert received == {bytes([i]) for i in range(20)}
+    assert server.metrics.counts[Metric.RESENT] > 0
+    assert clock.now() < 30
+
+
+def test_simulated_endpoints_respect_latency():
+    clock = SimulatedClock()
+    network = SimulatedNetwork(clock)
+    network.link(SERVER, CLIENT, LinkConfig(latency_ms=100))
+    server, client = make_pair(network, clock)
+
+    server.send_record(Ping(id=UInt16(1), ms=UInt32(1)))
+    server.flush()
+    client.tick()
+    assert client.recv_all() == []
+
+    clock.advance(0.1)
+    client.tick()
+    assert [r.ms for r in client.recv_all()] == [1]
+
+
+def test_impaired_udp_endpoint_holds_datagrams_back():
+    clock = SimulatedClock()
+    cfg = UdpEndpointConfig(
+        local_addr=Address("127.0.0.1", 7091),
+        remote_addr=Address("127.0.0.1", 7092),
+    )
+    sender = ReliableConnection(
+        cfg,
+        clock=clock,
+        endpoint_factory=lambda cfg, metrics: ImpairedUdpEndpoint(
+            cfg, LinkConfig(latency_ms=50), clock=clock, metrics=metrics
+        ),
+    )
+    receiver = ReliableConnection(
+        UdpEndpointConfig(
+            local_addr=Address("127.0.0.1", 7092),
+            remote_addr=Address("127.0.0.1", 7091),
+        ),
+        clock=clock,
+    )
+    try:
+        sender.send_record(Ping(id=UInt16(1), ms=UInt32(1)))
+        sender.flush()
+        assert sender.endpoint.metrics.counts[Metric.PACKETS_SENT] == 0
+
+        clock.advance(0.05)
+        sender.flush()
+        assert sender.endpoint.metrics.counts[Metric.PACKETS_SENT] == 1
+        for _ in range(100):
+            receiver.tick()
+            if records := receiver.recv_all():
+                break
+        assert [r.ms for r in records] == [1]
+    finally:
+        sender.close()
+        receiver.close()
+
+
+def test_retransmits_survive_an_evicted_compression_baseline(ReliableRecord):
+    clock = SimulatedClock()
+    network = SimulatedNetwork(clock)
+    server, client = make_pair(network, clock)
+    server.stream_compressor = StreamCompressor(threshold=0)
+    client.stream_compressor = StreamCompressor(threshold=0, history=2)
+
+    def step(blob=None):
+        if blob is not None:
+            server.send_record(ReliableRecord(blob=BytesField(blob)))
+        clock.advance(0.01)
+        server.tick()
+        client.tick()
+        return [r.blob.payload for r in client.recv_all()]
+
+    step(b"a" * 100)
+    step()
+    network.link(SERVER, CLIENT, LinkConfig(loss=1.0), LinkConfig())
+    step(b"b" * 100)  # lost, compressed against the first packet
+    step()
+    network.link(SERVER, CLIENT, LinkConfig())
+    # the receiver only keeps the last two baselines
+    others = [bytes([i]) * 100 for i in range(4)]
+    received = []
+    for blob in others:
+        received += step(blob)
+
+    for _ in range(100):
+        received += step()
+    assert sorted(received) == sorted(others + [b"b" * 100])
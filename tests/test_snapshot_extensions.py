@@ -0,0 +1,216 @@
+from dataclasses import dataclass
+from io import BytesIO
+
+from ripple.core.client.extensions import SnapshotAckExtension
+from ripple.core.server.delta_cache import DeltaCache
+from ripple.core.server.extensions import SnapshotExtension
+from ripple.ecs.observability import Observable
+from ripple.ecs.snapshot import Snapshot
+from ripple.ecs.world import World
+from ripple.network.protocol.records import (
+    Delta,
+    Hello,
+    Snapshot as SnapshotRecord,
+    SnapshotAck,
+)
+from ripple.utils import UInt8, UInt16, UInt32
+
+
+@dataclass
+class Pos(Observable):
+    x: UInt16
+    y: UInt16 = UInt16(0)
+
+
+class _Connection:
+    mtu = 1200
+
+    def __init__(self):
+        self.sent = []
+
+    def send_record(self, record, urgent=False):
+        self.sent.append(record)
+
+    def take(self):
+        sent, self.sent = self.sent, []
+        return sent
+
+
+HELLO = Hello(
+    protocol_version=UInt8(0), client_nonce=UInt32(0), app_id=UInt32(0)
+)
+
+
+def _server(history=4):
+    world = World(entities={})
+    pos = Pos(UInt16(0))
+    world.create_entity(pos)
+    current = []
+    extension = SnapshotExtension(lambda: current[-1], history)
+    connection = _Connection()
+    extension.init(connection)
+    extension.on_record(HELLO)
+
+    def tick():
+        pos.x += 1
+        current.append(Snapshot.from_world(world))
+        extension.on_tick()
+        return current[-1], connection.take()
+
+    return extension, tick
+
+
+def _ack(snapshot_id):
+    return SnapshotAck(snapshot_id=UInt16(snapshot_id))
+
+
+def test_it_sends_one_full_snapshot_until_it_is_acked():
+    extension, tick = _server()
+    first, sent = tick()
+    assert [type(r) for r in sent] == [SnapshotRecord]
+    assert sent[0].snapshot is first
+    assert tick()[1] == []
+
+    assert extension.on_record(_ack(first.id))
+    snapshot, sent = tick()
+    assert [type(r) for r in sent] == [Delta]
+    assert sent[0].snapshot.base_snapshot == first.id
+    assert sent[0].snapshot.target_snapshot == snapshot.id
+
+
+def test_deltas_follow_the_newest_acked_snapshot():
+    extension, tick = _server()
+    first, _ = tick()
+    extension.on_record(_ack(first.id))
+    second, _ = tick()
+    third, _ = tick()
+
+    extension.on_record(_ack(third.id))
+    # acks can arrive out of order, an older one does not move back
+    extension.on_record(_ack(second.id))
+    _, sent = tick()
+    assert sent[0].snapshot.base_snapshot == third.id
+
+
+def test_it_falls_back_to_a_full_snapshot_once_the_ack_is_too_old():
+    extension, tick = _server(history=4)
+    first, _ = tick()
+    extension.on_record(_ack(first.id))
+    for _ in range(3):
+        _, sent = tick()
+        assert isinstance(sent[0], Delta)
+    _, sent = tick()
+    assert isinstance(sent[0], SnapshotRecord)
+
+
+def test_the_client_rebuilds_and_acks_snapshots():
+    server, tick = _server()
+    world = World(entities={})
+    world.register_component_type(Pos)
+    rebuilt = []
+    client = SnapshotAckExtension(world, 4, rebuilt.append)
+    connection = _Connection()
+    client.init(connection)
+
+    def deliver(records):
+        for record in records:
+            # over the wire, as the rebuild needs the world's types
+            record, _ = type(record).unpack(BytesIO(record.pack()))
+            assert not client.on_record(record)
+        for ack in connection.take():
+            server.on_record(ack)
+
+    snapshot, sent = tick()
+    deliver(sent)
+    assert rebuilt[-1] == snapshot
+
+    tick()  # lost
+    snapshot, sent = tick()
+    deliver(sent)
+    assert rebuilt[-1] == snapshot
+    assert server.baseline is snapshot
+
+
+def test_the_stream_recovers_from_a_lost_ack():
+    server, tick = _server()
+    client = SnapshotAckExtension(World(entities={}), history=4)
+    connection = _Connection()
+    client.init(connection)
+
+    snapshot, sent = tick()
+    client.on_record(sent[0])
+    assert len(connection.take()) == 1  # lost
+    client.on_tick()
+    assert connection.sent == []
+
+    assert tick()[1] == []
+    client.on_tick()
+    (ack,) = connection.take()
+    assert ack.snapshot_id == snapshot.id
+    server.on_record(ack)
+
+    _, sent = tick()
+    assert isinstance(sent[0], Delta)
+    assert sent[0].snapshot.base_snapshot == snapshot.id
+
+
+def test_the_client_drops_deltas_without_their_base():
+    client = SnapshotAckExtension(World(entities={}), history=4)
+    connection = _Connection()
+    client.init(connection)
+    base, target = Snapshot(), Snapshot()
+
+    client.on_record(Delta(snapshot=target.get_delta_from(base)))
+    assert client.dropped == 1
+    assert connection.sent == []
+
+    client.on_record(SnapshotRecord(snapshot=base))
+    client.on_record(Delta(snapshot=target.get_delta_from(base)))
+    assert [r.snapshot_id for r in connection.sent] == [base.id, target.id]
+
+
+def test_the_client_drops_updates_of_unknown_component_types():
+    server, tick = _server()
+    client = SnapshotAckExtension(World(entities={}))
+    connection = _Connection()
+    client.init(connection)
+
+    def deliver(records):
+        for record in records:
+            record, _ = type(record).unpack(BytesIO(record.pack()))
+            client.on_record(record)
+        for ack in connection.take():
+            server.on_record(ack)
+
+    base, sent = tick()
+    deliver(sent)
+    _, sent = tick()
+    assert sent[0].snapshot.updates
+    deliver(sent)
+
+    assert client.dropped == 1
+    assert client.history.latest.id == base.id
+
+
+def test_clients_on_the_same_baseline_share_the_delta():
+    world = World(entities={})
+    world.create_entity(Pos(UInt16(0)))
+    current = [Snapshot.from_world(world)]
+    cache = DeltaCache()
+    connections = []
+    for _ in range(2):
+        extension = SnapshotExtension(lambda: current[-1], cache=cache)
+        connection = _Connection()
+        extension.init(connection)
+        extension.on_record(HELLO)
+        extension.on_tick()
+        extension.on_record(_ack(current[-1].id))
+        connections.append((extension, connection))
+
+    current.append(Snapshot.from_world(world))
+    for extension, connection in connections:
+        connection.take()
+        extension.on_tick()
+    (first,), (second,) = (c.sent for _, c in connections)
+    assert first is second
+    assert cache.misses == 1
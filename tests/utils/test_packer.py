@@ -3,7 +3,7 @@ from typing import Dict, List, Tuple, Set
 from io import BytesIO
 from dataclasses import dataclass
 
-from ripple.utils import UInt8, UInt16, UInt32, BytesField
+from ripple.utils import UInt8, UInt16, UInt32, VarUInt, BytesField
 from ripple.utils.packable import (
     Packable,
     StructPacker,
@@ -232,3 +232,38 @@ def test_it_can_pack_mixed_field_packable():
     unpacked = MixedPackable.unpack(stream)
     assert instance == unpacked
     assert not stream.read()
+
+
+@pytest.mark.parametrize(
+    "value, size",
+    [(0, 1), (127, 1), (128, 2), (16383, 2), (16384, 3), ((1 << 64) - 1, 10)],
+)
+def test_varuint_packs_to_a_varint(value, size):
+    payload = VarUInt(value).pack()
+    assert len(payload) == size
+    assert VarUInt.unpack(BytesIO(payload)) == value
+
+
+def test_varuint_rejects_truncated_buffers():
+    with pytest.raises(ValueError):
+        VarUInt.unpack(BytesIO(VarUInt(300).pack()[:1]))
+
+
+def test_it_can_pack_varuint_fields():
+    @dataclass
+    class WithIds(Packable):
+        id: VarUInt
+        version: UInt16
+        children: Dict[VarUInt, UInt8]
+        gone: List[VarUInt]
+
+    instance = WithIds(
+        VarUInt(1 << 20),
+        UInt16(3),
+        {VarUInt(5): UInt8(1), VarUInt(300): UInt8(2)},
+        [VarUInt(7)],
+    )
+    payload = instance.pack()
+    # 3 + 2 + (2 + 1 + 1 + 2 + 1) + (2 + 1)
+    assert len(payload) == 15
+    assert WithIds.unpack(BytesIO(payload)) == instance
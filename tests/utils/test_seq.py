@@ -0,0 +1,39 @@
+import pytest
+
+from ripple.utils import UInt16
+from ripple.utils.seq import (
+    MASK32,
+    seq_add,
+    seq_distance,
+    seq_lt,
+    seq_newer,
+    seq_next,
+)
+
+
+def test_it_wraps_like_uint16():
+    for seq in (0, 1, 0x7FFF, 0xFFFE, 0xFFFF):
+        assert seq_next(seq) == UInt16(seq) + 1
+        assert seq_add(seq, 300) == UInt16(seq) + 300
+        assert seq_distance(seq, 10) == (UInt16(seq) - 10) & 0xFFFF
+
+
+@pytest.mark.parametrize(
+    "a, b, older",
+    [
+        (1, 2, True),
+        (2, 1, False),
+        (0xFFFF, 0, True),
+        (0, 0xFFFF, False),
+        (5, 5, False),
+    ],
+)
+def test_it_orders_sequences_across_the_wrap(a, b, older):
+    assert seq_lt(a, b) is older
+    assert seq_newer(b, a) is older
+
+
+def test_it_supports_other_widths():
+    assert seq_next(MASK32, MASK32) == 0
+    assert seq_lt(MASK32, 0, MASK32)
+    assert seq_newer(0, MASK32, MASK32)